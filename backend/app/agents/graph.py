@@ -82,7 +82,8 @@ def create_agent_graph() -> StateGraph:
         is_execution_success,
         {
             "success": "format_response",  # Format before saving
-            "error": "correct_error"
+            "error": "correct_error",
+            "rejected": "fail"  # Server busy, retrying with corrected SQL won't help
         }
     )
     
@@ -1,14 +1,15 @@
 """LangGraph workflow nodes."""
-import json
 from typing import Dict, Any
 from ..models.state import AgentState
 from ..services.conversation import conversation_service
+from ..services.schema_cache import schema_cache
 from ..services.history_search import history_search_service
 from ..database.schema import schema_manager
 from ..tools.intent_analyzer import intent_analyzer
 from ..tools.sql_writer import sql_writer
 from ..tools.sql_validator import sql_validator
 from ..tools.sql_executor import sql_executor
+from ..services.result_store import result_store
 from ..tools.error_corrector import error_corrector
 from ..tools.response_formatter import response_formatter
 from ..tools.fast_response_builder import build_fast_response
@@ -71,39 +72,13 @@ async def retrieve_schema_node(state: AgentState) -> AgentState:
     schema_text = None
     schema_source = "default"
 
-    # 1) Build from registry: either selected target_tables or all active definitions.
-    registry_defs = []
-    if target_tables:
-        for tn in target_tables:
-            td = await history_manager.get_table_definition(tn)
-            if td and td.get("is_active", False):
-                registry_defs.append(td)
-    else:
-        registry_defs = await history_manager.list_table_definitions(active_only=True)
-
-    if registry_defs:
+    # 1) Build from registry: either selected target_tables or all active definitions
+    #    (compiled once per table set and registry version).
+    compiled = await schema_cache.get(target_tables)
+    if compiled is not None:
         schema_source = "registry"
-        bc_db, bc_explicit = await history_manager.get_registry_business_context()
-        if bc_explicit:
-            business_context = bc_db
-        else:
-            business_context = schema_manager.load_schema().get("business_context") or {}
-        schema_dict = {
-            "tables": [
-                {
-                    "name": td["table_name"],
-                    "columns": td.get("columns", []) or [],
-                }
-                for td in registry_defs
-            ],
-            "relationships": [
-                r
-                for td in registry_defs
-                for r in (td.get("relationships", []) or [])
-            ],
-            "business_context": business_context,
-        }
-        schema_text = schema_manager.format_schema_as_text(schema_dict)
+        schema_dict = compiled["dict"]
+        schema_text = compiled["text"]
 
     # 2) Fallback to default schema file if registry is empty.
     if schema_dict is None:
@@ -160,7 +135,7 @@ async def search_history_node(state: AgentState) -> AgentState:
     
     similar = await history_search_service.find_similar_queries(
         question=state["question"],
-        top_k=5,
+        top_k=settings.few_shot_max_examples,
         exclude_conversation_id=state.get("conversation_id")
     )
     
@@ -200,7 +175,19 @@ async def execute_sql_node(state: AgentState) -> AgentState:
     """Execute SQL query."""
     state["current_stage"] = "executing_sql"
     
-    result = await sql_executor.execute_query(state["generated_sql"])
+    result = await sql_executor.execute_query(
+        state["generated_sql"],
+        intent=state.get("intent"),
+        conversation_id=state.get("conversation_id"),
+    )
+    if result.get("success"):
+        # State/SSE carry only the first page (the rest via GET /api/results/{id});
+        # history keeps every row, so pages outlive results.db's TTL
+        page = await result_store.save(result)
+        state["stored_result"] = {**page, "rows": result.get("rows", [])}
+        result = page
+    elif result.get("error_type") == "admission_rejected":
+        state["error_message"] = result["error"]
     state["execution_result"] = result
     
     return state
@@ -225,7 +212,8 @@ async def correct_error_node(state: AgentState) -> AgentState:
         error_message=error_msg,
         schema=state["schema"]["text"],
         conversation_history=state.get("conversation_history", []),
-        retry_count=retry_count
+        retry_count=retry_count,
+        intent=state.get("intent")
     )
     
     # Update state with corrected SQL
@@ -274,14 +262,15 @@ async def save_success_node(state: AgentState) -> AgentState:
             f"Đã trả về {state['execution_result'].get('count', 0)} dòng"
         )
     
-    await conversation_service.save_assistant_response(
+    state["assistant_message_id"] = await conversation_service.save_assistant_response(
         conversation_id=state["conversation_id"],
         content=response_content,
         sql=state["generated_sql"],
-        result=state.get("execution_result"),
+        result=state.get("stored_result", state.get("execution_result")),
         metadata={
             "format_method": state.get("format_method", "python"),
             "has_llm_summary": state.get("has_llm_summary", False),
+            "intent": state.get("intent"),
         }
     )
     
@@ -291,7 +280,7 @@ async def save_success_node(state: AgentState) -> AgentState:
         question=state["question"],
         generated_sql=state["generated_sql"],
         intent=state.get("intent"),
-        execution_result=json.dumps(state["execution_result"]),
+        execution_result=state.get("stored_result", state["execution_result"]),
         success=True
     )
     
@@ -356,9 +345,12 @@ def is_execution_success(state: AgentState) -> str:
     """Check if SQL execution succeeded.
     
     Returns:
-        'success' if succeeded, 'error' if failed
+        'success' if succeeded, 'rejected' if admission control turned the
+        query away (nothing for the LLM to fix), 'error' otherwise
     """
     result = state.get("execution_result", {})
     if result.get("success", False):
         return "success"
+    if result.get("error_type") == "admission_rejected":
+        return "rejected"
     return "error"
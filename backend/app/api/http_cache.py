@@ -0,0 +1,57 @@
+"""Conditional GET helpers (ETag / Last-Modified)."""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a weak ETag from the values that identify a representation."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def http_date(timestamp: Optional[str]) -> Optional[str]:
+    """Format a SQLite CURRENT_TIMESTAMP value (UTC) as an HTTP date."""
+    if not timestamp:
+        return None
+    try:
+        value = datetime.fromisoformat(str(timestamp)).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    return format_datetime(value, usegmt=True)
+
+
+def cache_headers(etag: str, last_modified: Optional[str]) -> Dict[str, str]:
+    """Validator headers; no-cache makes clients revalidate on every poll."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against validators."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = {_opaque_tag(tag.strip()) for tag in if_none_match.split(",")}
+        return "*" in candidates or _opaque_tag(etag) in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _opaque_tag(tag: str) -> str:
+    """Drop the weak prefix (If-None-Match uses weak comparison)."""
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def not_modified_response(etag: str, last_modified: Optional[str]) -> Response:
+    """Return an empty 304 carrying the validators."""
+    return Response(status_code=304, headers=cache_headers(etag, last_modified))
@@ -1,22 +1,37 @@
 """FastAPI routes with SSE streaming."""
 import json
-from fastapi import APIRouter, HTTPException
+import time
+from fastapi import APIRouter, HTTPException, Request, Response
 from fastapi.responses import StreamingResponse
-from typing import AsyncGenerator, List
+from typing import AsyncGenerator, List, Optional
 from ..models.schemas import (
     ChatRequest,
     ConversationResponse,
     ConversationsListResponse,
     ConversationListItem,
+    QueryResult,
     HealthResponse,
     FeedbackRequest,
     FeedbackResponse,
     SchemaTableDefinitionRequest,
     SchemaTableDefinitionResponse,
+    SchemaBulkImportResponse,
     SchemaDetectRequest,
     SchemaDetectResponse,
     SchemaBusinessContextRequest,
     SchemaBusinessContextResponse,
+    ResultPageResponse,
+    ResultCacheStatsResponse,
+    AdmissionStatsResponse,
+    WriteBatchStatsResponse,
+    MigrationStatusResponse,
+    FewShotIndexStatsResponse,
+    SearchResponse,
+    RetentionRunResponse,
+    SummaryRebuildResponse,
+    IndexAdvisorResponse,
+    IndexApplyRequest,
+    IndexApplyResponse,
 )
 from ..models.events import (
     StageEvent,
@@ -32,11 +47,20 @@ from ..models.events import (
     FormattedResponseEvent,
     CompleteEvent
 )
+from .http_cache import cache_headers, http_date, is_not_modified, make_etag, not_modified_response
 from ..agents.graph import agent_graph
 from ..services.conversation import conversation_service
+from ..database.connection import history_db
 from ..database.history import history_manager
+from ..database.retention import retention_manager
 from ..database.schema import schema_manager
+from ..database.summaries import summary_manager
+from ..services.few_shot_index import few_shot_index
+from ..services.index_advisor import index_advisor
+from ..services.result_store import result_store
 from ..tools.intent_analyzer import intent_analyzer
+from ..tools.sql_executor import sql_executor
+from ..config import settings
 from ..constants import STAGE_MESSAGES, STAGE_ICONS
 
 
@@ -191,7 +215,9 @@ async def stream_agent_execution(
                 result_event = ResultEvent(
                     rows=result.get("rows", []),
                     count=result.get("count", 0),
-                    columns=result.get("columns", [])
+                    columns=result.get("columns", []),
+                    result_id=result.get("result_id"),
+                    has_more=result.get("has_more", False),
                 )
                 yield format_sse_event("result", result_event.model_dump())
             else:
@@ -215,7 +241,8 @@ async def stream_agent_execution(
             success = state.get("current_stage") == "completed"
             complete_event = CompleteEvent(
                 success=success,
-                message="Truy vấn hoàn tất thành công!" if success else "Truy vấn thất bại"
+                message="Truy vấn hoàn tất thành công!" if success else "Truy vấn thất bại",
+                message_id=state.get("assistant_message_id"),
             )
             yield format_sse_event("complete", complete_event.model_dump())
             break
@@ -249,16 +276,37 @@ async def chat_stream(request: ChatRequest):
 
 
 @router.get("/conversations", response_model=ConversationsListResponse)
-async def get_conversations(limit: int = 50):
-    """Get list of all conversations.
+async def get_conversations(
+    request: Request,
+    response: Response,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+):
+    """Get list of conversations, most recently updated first.
+    
+    Supports If-None-Match: the ETag changes whenever a conversation is created,
+    updated or removed, so an unchanged sidebar poll returns 304 without
+    reading the page.
     
     Args:
         limit: Maximum number of conversations to return (default 50)
+        cursor: next_cursor from the previous page
         
     Returns:
-        List of conversations with summary info
+        List of conversations with summary info and the next page cursor
     """
-    conversations = await conversation_service.get_all_conversations(limit)
+    version = await history_manager.get_conversation_list_version()
+    etag = make_etag("conversations", limit, cursor, version["epoch"], version["version"])
+    if is_not_modified(request, etag, None):
+        return not_modified_response(etag, None)
+    
+    try:
+        conversations, next_cursor = await conversation_service.get_conversations_page(
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     items = [
         ConversationListItem(
@@ -270,22 +318,55 @@ async def get_conversations(limit: int = 50):
         for conv in conversations
     ]
     
+    response.headers.update(cache_headers(etag, None))
     return ConversationsListResponse(
         conversations=items,
-        count=len(items)
+        count=len(items),
+        next_cursor=next_cursor,
     )
 
 
+@router.get("/search", response_model=SearchResponse)
+async def search_history(q: str, limit: int = 20):
+    """Full-text search over past questions and generated SQL.
+    
+    Args:
+        q: Search words (all must match; the last one also as a prefix)
+        limit: Maximum number of hits (default 20)
+        
+    Returns:
+        Hits ranked by BM25 with highlighted snippets
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+    results = await history_manager.search_messages(q, limit=min(max(limit, 1), 100))
+    return SearchResponse(query=q, results=results, count=len(results))
+
+
 @router.get("/conversations/{conversation_id}", response_model=ConversationResponse)
-async def get_conversation(conversation_id: str):
+async def get_conversation(conversation_id: str, request: Request, response: Response):
     """Get conversation history.
     
+    Supports If-None-Match / If-Modified-Since. The ETag is derived from
+    updated_at, the newest message id and the feedback revision, checked
+    without reading message rows.
+    
     Args:
         conversation_id: Conversation UUID
         
     Returns:
         Full conversation with messages
     """
+    version = await history_manager.get_conversation_version(conversation_id)
+    if version is not None:
+        etag = make_etag(
+            conversation_id, version["updated_at"], version["last_message_id"], version["revision"]
+        )
+        last_modified = http_date(version["updated_at"])
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        response.headers.update(cache_headers(etag, last_modified))
+    
     conversation = await conversation_service.get_full_conversation(conversation_id)
     
     if not conversation:
@@ -294,24 +375,62 @@ async def get_conversation(conversation_id: str):
     return conversation
 
 
+@router.get("/conversations/{conversation_id}/messages/{message_id}/results", response_model=QueryResult)
+async def get_message_result(conversation_id: str, message_id: int):
+    """Get the stored result of one assistant message.
+
+    The conversation endpoint only returns result_hash, so result blobs are
+    decompressed when a result is actually shown.
+
+    Args:
+        conversation_id: Conversation UUID
+        message_id: Message ID
+
+    Returns:
+        Stored query result (first page, with result_id/has_more for the rest)
+    """
+    result = await conversation_service.get_message_result(conversation_id, message_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Message result not found")
+    return result
+
+
 @router.post("/feedback", response_model=FeedbackResponse)
 async def submit_feedback(request: FeedbackRequest):
     """Submit like/dislike feedback for a query response.
 
-    Updates the feedback column on the matching assistant message in conversation_messages.
+    Updates the feedback column on the assistant message and keeps the
+    few_shot_examples table and the in-memory few-shot index in sync. The message is identified by message_id,
+    or by its SQL for older clients.
 
     Args:
-        request: Feedback with conversation_id, sql, and status
+        request: Feedback with conversation_id, message_id or sql, and status
 
     Returns:
         Confirmation
+
+    Raises:
+        HTTPException: 404 if no assistant message matches
     """
     status = request.status if request.status != "none" else None
-    await history_manager.set_message_feedback(
-        conversation_id=request.conversation_id,
-        sql=request.sql,
-        status=status,
-    )
+    if request.message_id is not None:
+        found = await history_manager.set_feedback_by_message_id(
+            message_id=request.message_id,
+            status=status,
+            conversation_id=request.conversation_id,
+        )
+    elif request.sql:
+        found = await history_manager.set_message_feedback(
+            conversation_id=request.conversation_id,
+            sql=request.sql,
+            status=status,
+        ) is not None
+    else:
+        raise HTTPException(status_code=400, detail="Either message_id or sql is required")
+    if not found:
+        raise HTTPException(status_code=404, detail="Message not found")
+    # Apply the like/unlike to the in-memory few-shot index right away
+    await few_shot_index.sync()
     return FeedbackResponse(
         status=request.status,
         message="Feedback saved"
@@ -331,6 +450,83 @@ async def health_check():
     )
 
 
+@router.get("/results/{result_id}", response_model=ResultPageResponse)
+async def get_result_page(result_id: str, offset: int = 0, limit: Optional[int] = None):
+    """Fetch a page of a materialized query result.
+
+    Args:
+        result_id: Result set ID from the 'result' SSE event
+        offset: Row number to start from (pass 'next_offset' of the previous page)
+        limit: Page size (default RESULT_PAGE_SIZE, capped at MAX_RESULT_PAGE_SIZE)
+    """
+    page = await result_store.get_page(result_id, offset=offset, limit=limit)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Result set not found or expired")
+    return page
+
+
+@router.get("/admin/result-cache", response_model=ResultCacheStatsResponse)
+async def get_result_cache_stats():
+    """Return hit/miss and bytes-saved statistics for the SQL result cache."""
+    return sql_executor.cache_stats()
+
+
+@router.get("/admin/admission", response_model=AdmissionStatsResponse)
+async def get_admission_stats():
+    """Return running/queued heavy queries and admission counters."""
+    return sql_executor.admission_stats()
+
+
+@router.get("/admin/write-batching", response_model=WriteBatchStatsResponse)
+async def get_write_batching_stats():
+    """Return group-commit batch sizes and commit latency for the history database."""
+    return history_db.write_stats()
+
+
+@router.get("/admin/few-shot-index", response_model=FewShotIndexStatsResponse)
+async def get_few_shot_index_stats():
+    """Return the size and change-log position of the in-memory few-shot index."""
+    return few_shot_index.stats()
+
+
+@router.get("/admin/migrations", response_model=MigrationStatusResponse)
+async def get_migration_status():
+    """Return the history.db schema version and what the last startup migrated."""
+    if history_manager.migration_status is None:
+        raise HTTPException(status_code=503, detail="History database not initialized")
+    return history_manager.migration_status
+
+
+@router.post("/admin/retention/run", response_model=RetentionRunResponse)
+async def run_retention():
+    """Archive conversations past the retention policies and vacuum history.db."""
+    return await retention_manager.run_once()
+
+
+@router.post("/admin/summaries/rebuild", response_model=SummaryRebuildResponse)
+async def rebuild_summaries():
+    """Create missing summary tables and recompute all of them from the staff table."""
+    return await summary_manager.rebuild()
+
+
+@router.get("/admin/indexes/recommendations", response_model=IndexAdvisorResponse)
+async def get_index_recommendations(history_limit: int = 1000, top_k: int = 10):
+    """Rank index proposals from EXPLAIN QUERY PLAN over executed query history.
+
+    Args:
+        history_limit: Number of distinct successful SQL statements to analyze
+        top_k: Maximum number of recommendations to return
+    """
+    return await index_advisor.recommend(history_limit=history_limit, top_k=top_k)
+
+
+@router.post("/admin/indexes/apply", response_model=IndexApplyResponse)
+async def apply_index_recommendations(request: IndexApplyRequest):
+    """Create recommended indexes in target.db."""
+    applied = await index_advisor.apply(names=request.names)
+    return IndexApplyResponse(applied=applied)
+
+
 @router.get(
     "/schema/business-context",
     response_model=SchemaBusinessContextResponse,
@@ -380,6 +576,87 @@ async def upsert_schema_table_definition(
     return table_def
 
 
+@router.post(
+    "/schema/tables:bulk",
+    response_model=SchemaBulkImportResponse,
+)
+async def bulk_import_schema_table_definitions(request: Request):
+    """Create or update many table definitions from an NDJSON body in one transaction.
+    
+    Each line is a SchemaTableDefinitionRequest object (the format of
+    GET /api/schema/export). The body is parsed as it streams in; if any line is
+    invalid nothing is written and the errors are returned with line numbers.
+    
+    Returns:
+        Imported/created/updated counts
+    """
+    started = time.perf_counter()
+    definitions = []
+    errors = []
+    async for line_no, line in _iter_ndjson_lines(request):
+        if not line.strip():
+            continue
+        try:
+            definition = SchemaTableDefinitionRequest.model_validate_json(line)
+        except ValueError as e:
+            errors.append({"line": line_no, "error": str(e).splitlines()[0]})
+            continue
+        definitions.append({
+            **definition.model_dump(),
+            "is_active": definition.is_active if definition.is_active is not None else True,
+        })
+        if len(definitions) > settings.schema_bulk_max_tables:
+            raise HTTPException(
+                status_code=413,
+                detail=f"At most {settings.schema_bulk_max_tables} definitions per import",
+            )
+
+    if errors:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": f"{len(errors)} invalid line(s); nothing imported", "errors": errors[:20]},
+        )
+
+    counts = await history_manager.bulk_upsert_table_definitions(definitions)
+    return SchemaBulkImportResponse(
+        imported=len(definitions),
+        created=counts["created"],
+        updated=counts["updated"],
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+
+
+async def _iter_ndjson_lines(request: Request):
+    """Yield (line number, line) pairs from a streamed request body."""
+    buffer = b""
+    line_no = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            yield line_no, line
+    if buffer:
+        yield line_no + 1, buffer
+
+
+@router.get("/schema/export")
+async def export_schema_table_definitions(active_only: bool = False):
+    """Stream the registry as NDJSON, one table definition per line.
+    
+    The output can be re-imported with POST /api/schema/tables:bulk.
+    """
+    async def generate() -> AsyncGenerator[str, None]:
+        async for definition in history_manager.iter_table_definitions(active_only=active_only):
+            yield json.dumps(definition, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="schema-registry.ndjson"'},
+    )
+
+
 @router.get(
     "/schema/tables",
     response_model=List[SchemaTableDefinitionResponse],
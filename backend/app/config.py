@@ -1,6 +1,6 @@
 """Configuration management using Pydantic Settings."""
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Any, Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -20,13 +20,83 @@ class Settings(BaseSettings):
     target_db_path: str = "data/target.db"
     history_db_path: str = "data/history.db"
     schema_path: str = "data/schema.json"
+    result_store_path: str = "data/results.db"
     
+    # SQLite Performance Profiles (see SQLITE_PRAGMA_PROFILES in constants.py)
+    history_db_profile: str = "balanced"
+    target_db_profile: str = "read_heavy"
+    result_store_profile: str = "balanced"
+    history_db_pragmas: Dict[str, Any] = {}     # Per-PRAGMA overrides, e.g. {"synchronous": "FULL"}
+    target_db_pragmas: Dict[str, Any] = {}
+    db_optimize_interval_minutes: int = 60      # Background PRAGMA optimize (0 = disabled)
+    history_db_group_commit_ms: float = 2.0     # Group-commit window for history writes (0 = disabled)
+    history_db_group_commit_max: int = 64       # Statements that flush a batch early
+
+    # History Retention
+    history_retention_days: int = 180           # Archive conversations idle longer than this (0 = keep forever)
+    history_max_size_mb: int = 0                # Archive oldest conversations while history.db exceeds this (0 = no limit)
+    history_archive_dir: str = "data/archive"   # Monthly compressed SQLite archives
+    history_vacuum_pages: int = 2000            # Free pages released per incremental vacuum run
+    history_retention_interval_minutes: int = 60  # Background retention + vacuum (0 = disabled)
+
     # Agent Configuration
     max_retry_attempts: int = 3
     query_timeout_seconds: int = 30
     max_rows_return: int = 1000
     max_conversation_messages: int = 10
-    
+    context_cache_conversations: int = 1024     # Conversations whose recent turns stay in memory
+    context_cache_messages: int = 50            # Recent messages cached per conversation
+
+    # Few-shot Examples
+    few_shot_embedding_backend: str = "hashed"  # hashed | sentence-transformers | fuzzy (token-sort ratio)
+    few_shot_embedding_dim: int = 1024          # Vector size of the hashed char n-gram encoder
+    few_shot_embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    few_shot_sync_interval_seconds: int = 30    # Re-sync the few-shot index with other workers' feedback (0 = off)
+    few_shot_change_retention_hours: int = 24   # Prune the few-shot change log; older readers reload fully
+    few_shot_ann_min_examples: int = 0          # Use the IVF index from this many examples (0 = always exact)
+    few_shot_ann_dir: str = "data/few_shot_ann" # Memory-mapped IVF builds
+    few_shot_ann_nprobe: int = 8                # Inverted lists scanned per query
+    few_shot_ann_rebuild_ratio: float = 0.1     # Pending inserts/deletes (fraction of the index) that trigger a rebuild
+    few_shot_max_examples: int = 3              # Few-shot examples in the SQL prompt (one per SQL skeleton)
+    few_shot_token_budget: int = 600            # Estimated prompt tokens the examples may use (0 = no limit)
+    few_shot_candidates: int = 20               # Nearest examples considered before deduplication
+
+    # Execution Engines
+    execution_engine: str = "sqlite"             # Default engine: sqlite | duckdb
+    analytic_execution_engine: str = "sqlite"    # Engine for aggregation/joining intents
+    duckdb_parquet_dir: Optional[str] = None     # Read Parquet exports instead of attaching target.db
+    duckdb_threads: Optional[int] = None         # DuckDB worker threads (default: all cores)
+
+    # Server-side Result Sets
+    result_page_size: int = 100                # Rows sent in SSE / stored in history per result
+    max_result_page_size: int = 1000           # Upper bound for GET /api/results/{id}?limit=
+    result_store_ttl_hours: int = 168          # Drop materialized results after this (0 = keep)
+
+    # Result Blobs (history DB)
+    result_blob_codec: str = "zlib"             # "zlib" or "zstd" (requires zstandard)
+    result_blob_level: int = 6                  # Compression level
+
+    # Admission Control (heavy = full scan of a large table / temp B-tree per EXPLAIN QUERY PLAN)
+    enable_admission_control: bool = True
+    admission_max_heavy_queries: int = 2             # Concurrent heavy queries across all users
+    admission_max_heavy_per_conversation: int = 1    # Concurrent heavy queries per conversation
+    admission_queue_timeout_seconds: float = 10.0    # Max wait for a heavy slot before rejecting
+    admission_light_scan_rows: int = 10000           # Full scans of smaller tables count as light
+    target_db_light_connections: int = 2             # target.db read connections reserved for light queries
+
+    # Summary Tables (materialized COUNT aggregates in target.db)
+    enable_summary_tables: bool = True          # Maintain summaries and rewrite matching queries
+
+    # Schema Registry
+    schema_bulk_max_tables: int = 20000              # Upper bound on definitions per bulk import
+
+    # Schema Cache
+    schema_cache_max_entries: int = 256              # Compiled registry schemas (per table set) kept in memory
+
+    # Result Cache
+    enable_result_cache: bool = True                 # Serve repeated SQL from memory
+    result_cache_max_bytes: int = 64 * 1024 * 1024   # LRU bound on cached result JSON
+
     # Response Formatting
     enable_llm_insights: bool = True           # Toggle LLM insights for aggregations
     format_with_llm_threshold: int = 100       # Rows > threshold use Python always
@@ -56,3 +56,31 @@ INTENT_TYPES = [
 
 # Intents that trigger the fast path (no SQL generation)
 FAST_PATH_INTENTS = {"greeting", "goodbye", "schema_request", "unknown"}
+
+# Intents routed to the analytic execution engine (scan/aggregate heavy)
+ANALYTIC_INTENTS = {"aggregation", "joining"}
+
+# SQLite PRAGMA profiles applied by DatabaseManager on connect.
+# Select per database with HISTORY_DB_PROFILE / TARGET_DB_PROFILE / RESULT_STORE_PROFILE.
+SQLITE_PRAGMA_PROFILES = {
+    # SQLite defaults: rollback journal, synchronous=FULL, no mmap, ~2 MB page cache
+    "default": {},
+    # Many small commits (history, results): WAL + NORMAL syncs only at checkpoints
+    "balanced": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -16384,  # 16 MB
+        "temp_store": "MEMORY",
+    },
+    # Large analytical reads (target): big mmap window and page cache
+    "read_heavy": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 1024 * 1024 * 1024,
+        "cache_size": -262144,  # 256 MB
+        "temp_store": "MEMORY",
+    },
+}
@@ -0,0 +1,150 @@
+"""Benchmark SQLite PRAGMA profiles against a history-like and a target-like workload.
+
+Usage:
+    python -m app.database.benchmark
+    python -m app.database.benchmark --profiles default balanced --writes 5000 --reads 200
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+from .connection import DatabaseManager, resolve_pragmas
+from ..constants import SQLITE_PRAGMA_PROFILES
+
+
+async def _write_workload(db: DatabaseManager, writes: int) -> float:
+    """Simulate chat turns: one small committed INSERT + UPDATE per message."""
+    await db.execute("CREATE TABLE conversations (id TEXT PRIMARY KEY, updated_at TIMESTAMP)")
+    await db.execute(
+        """
+        CREATE TABLE conversation_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    await db.execute("CREATE INDEX idx_conv_messages ON conversation_messages(conversation_id, timestamp)")
+    await db.executemany(
+        "INSERT INTO conversations (id, updated_at) VALUES (?, CURRENT_TIMESTAMP)",
+        [(f"c{i}",) for i in range(100)],
+    )
+
+    started = time.perf_counter()
+    for i in range(writes):
+        conversation_id = f"c{i % 100}"
+        await db.execute(
+            "INSERT INTO conversation_messages (conversation_id, role, content) VALUES (?, ?, ?)",
+            (conversation_id, "user" if i % 2 == 0 else "assistant", f"message {i} " * 8),
+        )
+        await db.execute(
+            "UPDATE conversations SET updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (conversation_id,),
+        )
+    return time.perf_counter() - started
+
+
+async def _read_workload(db: DatabaseManager, rows: int, reads: int) -> float:
+    """Simulate analytical queries over a staff table."""
+    await db.execute(
+        """
+        CREATE TABLE v_staff_hr_format (
+            id INTEGER PRIMARY KEY,
+            emp_no TEXT,
+            division TEXT,
+            job_level TEXT,
+            salary REAL
+        )
+        """
+    )
+    await db.executemany(
+        "INSERT INTO v_staff_hr_format (emp_no, division, job_level, salary) VALUES (?, ?, ?, ?)",
+        [(str(i), f"div {i % 12}", "ABCDE"[i % 5], 1000.0 + i % 997) for i in range(rows)],
+    )
+    queries = [
+        "SELECT division, COUNT(*) AS n, AVG(salary) FROM v_staff_hr_format GROUP BY division",
+        "SELECT job_level, MAX(salary) FROM v_staff_hr_format WHERE division = 'div 3' GROUP BY job_level",
+        "SELECT emp_no FROM v_staff_hr_format ORDER BY salary DESC LIMIT 20",
+    ]
+
+    started = time.perf_counter()
+    for i in range(reads):
+        await db.fetchall(queries[i % len(queries)])
+    return time.perf_counter() - started
+
+
+async def benchmark_profile(
+    profile: str,
+    writes: int = 2000,
+    reads: int = 100,
+    rows: int = 50000,
+    workdir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Run both workloads on fresh databases using one PRAGMA profile.
+
+    Args:
+        profile: Profile name from SQLITE_PRAGMA_PROFILES
+        writes: Number of committed message writes
+        reads: Number of analytical queries
+        rows: Rows in the synthetic staff table
+        workdir: Directory for the scratch databases (default: a temp dir)
+
+    Returns:
+        Stats dictionary with writes_per_sec and reads_per_sec
+    """
+    pragmas = resolve_pragmas(profile)
+    with tempfile.TemporaryDirectory(dir=workdir) as tmpdir:
+        history = DatabaseManager(os.path.join(tmpdir, "history.db"), pragmas)
+        target = DatabaseManager(os.path.join(tmpdir, "target.db"), pragmas)
+        try:
+            write_seconds = await _write_workload(history, writes)
+            read_seconds = await _read_workload(target, rows, reads)
+        finally:
+            await history.close()
+            await target.close()
+
+    return {
+        "profile": profile,
+        "writes": writes,
+        "write_seconds": round(write_seconds, 3),
+        "writes_per_sec": round(writes / write_seconds, 1) if write_seconds > 0 else float(writes),
+        "reads": reads,
+        "read_seconds": round(read_seconds, 3),
+        "reads_per_sec": round(reads / read_seconds, 1) if read_seconds > 0 else float(reads),
+    }
+
+
+async def run_benchmark(profiles: List[str], **kwargs) -> List[Dict[str, Any]]:
+    """Benchmark several profiles sequentially."""
+    return [await benchmark_profile(profile, **kwargs) for profile in profiles]
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Compare SQLite PRAGMA profiles")
+    parser.add_argument(
+        "--profiles",
+        nargs="+",
+        default=list(SQLITE_PRAGMA_PROFILES),
+        choices=list(SQLITE_PRAGMA_PROFILES),
+    )
+    parser.add_argument("--writes", type=int, default=2000, help="Committed message writes")
+    parser.add_argument("--reads", type=int, default=100, help="Analytical queries")
+    parser.add_argument("--rows", type=int, default=50000, help="Rows in the synthetic target table")
+    parser.add_argument("--workdir", help="Directory for scratch databases (use the real data disk)")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(
+        run_benchmark(args.profiles, writes=args.writes, reads=args.reads, rows=args.rows, workdir=args.workdir)
+    )
+    print(f"{'profile':<12} {'writes/sec':>12} {'reads/sec':>12}")
+    for r in results:
+        print(f"{r['profile']:<12} {r['writes_per_sec']:>12,.1f} {r['reads_per_sec']:>12,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,102 @@
 """Database connection management."""
+import asyncio
+import time
 import aiosqlite
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 from ..config import settings
+from ..constants import SQLITE_PRAGMA_PROFILES
+
+# PRAGMAs a profile may set (names are interpolated into SQL, so keep this closed)
+SUPPORTED_PRAGMAS = (
+    "busy_timeout",
+    "journal_mode",
+    "synchronous",
+    "mmap_size",
+    "cache_size",
+    "temp_store",
+    "wal_autocheckpoint",
+)
+
+# (version, name, step): step receives the connection inside the migration transaction
+Migration = Tuple[int, str, Callable[[aiosqlite.Connection], Awaitable[None]]]
+
+
+def resolve_pragmas(profile: str, overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Merge a named PRAGMA profile with per-database overrides.
+
+    Args:
+        profile: Profile name from SQLITE_PRAGMA_PROFILES
+        overrides: PRAGMA values replacing the profile's
+
+    Returns:
+        Ordered PRAGMA name -> value mapping
+
+    Raises:
+        ValueError: On an unknown profile or unsupported PRAGMA name
+    """
+    if profile not in SQLITE_PRAGMA_PROFILES:
+        raise ValueError(
+            f"Unknown SQLite profile '{profile}', expected one of {list(SQLITE_PRAGMA_PROFILES)}"
+        )
+    pragmas = {**SQLITE_PRAGMA_PROFILES[profile], **(overrides or {})}
+    unsupported = [name for name in pragmas if name not in SUPPORTED_PRAGMAS]
+    if unsupported:
+        raise ValueError(f"Unsupported PRAGMA(s): {', '.join(unsupported)}")
+    # busy_timeout first so a locked journal_mode switch waits instead of failing
+    return dict(sorted(pragmas.items(), key=lambda kv: SUPPORTED_PRAGMAS.index(kv[0])))
 
 
 class DatabaseManager:
-    """Async SQLite database connection manager."""
+    """Async SQLite database connection manager.
+    
+    With group commit enabled (group_commit_ms > 0), writes issued by concurrent
+    coroutines within the window, up to group_commit_max statements, share one
+    transaction and one commit. Each statement runs in its own SAVEPOINT so a
+    failing write only fails its own caller, and every caller's await resolves
+    after the shared commit. Group-commit connections always run with
+    synchronous=FULL, so that commit is fsynced before any await resolves; the
+    batch pays for one sync instead of one per statement.
+    """
     
-    def __init__(self, db_path: str):
+    def __init__(
+        self,
+        db_path: str,
+        pragmas: Optional[Dict[str, Any]] = None,
+        group_commit_ms: float = 0,
+        group_commit_max: int = 64,
+    ):
         """Initialize database manager.
         
         Args:
             db_path: Path to SQLite database file
+            pragmas: PRAGMAs applied on connect (see resolve_pragmas)
+            group_commit_ms: Write batching window in milliseconds (0 = commit every write);
+                enabling it forces synchronous=FULL
+            group_commit_max: Statements that flush a batch before the window ends
         """
         self.db_path = db_path
+        self.pragmas = dict(pragmas or {})
+        if group_commit_ms > 0:
+            # A resolved group-commit write must survive power loss, not only a crash
+            self.pragmas["synchronous"] = "FULL"
+        self.group_commit_ms = group_commit_ms
+        self.group_commit_max = max(1, group_commit_max)
         self._connection: Optional[aiosqlite.Connection] = None
+        # (query, params, is_many, future) waiting for the next group commit
+        self._pending: List[Tuple[str, Any, bool, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        # Keeps VACUUM / incremental_vacuum out of a group-commit transaction
+        self._write_lock = asyncio.Lock()
+        self._stats = {
+            "batches": 0,
+            "statements": 0,
+            "max_batch_size": 0,
+            "failed_statements": 0,
+            "commit_ms_total": 0.0,
+            "last_commit_ms": 0.0,
+        }
     
     async def connect(self) -> aiosqlite.Connection:
         """Get or create database connection.
@@ -25,10 +107,127 @@ class DatabaseManager:
         if self._connection is None:
             self._connection = await aiosqlite.connect(self.db_path)
             self._connection.row_factory = aiosqlite.Row
+            for name, value in self.pragmas.items():
+                await self._connection.execute(f"PRAGMA {name} = {value}")
         return self._connection
     
+    async def optimize(self):
+        """Run PRAGMA optimize so the planner statistics stay current."""
+        conn = await self.connect()
+        await conn.execute("PRAGMA optimize")
+        await conn.commit()
+    
+    async def enable_incremental_vacuum(self) -> bool:
+        """Switch the database to auto_vacuum=INCREMENTAL.
+        
+        An existing database only changes mode after a full VACUUM, which runs
+        once here.
+        
+        Returns:
+            True if the mode was changed
+        """
+        await self._drain()
+        async with self._write_lock:
+            conn = await self.connect()
+            cursor = await conn.execute("PRAGMA auto_vacuum")
+            row = await cursor.fetchone()
+            if row[0] == 2:
+                return False
+            await conn.commit()
+            await conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            await conn.execute("VACUUM")
+            return True
+    
+    async def incremental_vacuum(self, pages: int) -> int:
+        """Return up to `pages` free pages to the filesystem.
+        
+        Args:
+            pages: Maximum number of freelist pages to release
+            
+        Returns:
+            Number of pages released
+        """
+        await self._drain()
+        async with self._write_lock:
+            conn = await self.connect()
+            before = await (await conn.execute("PRAGMA freelist_count")).fetchone()
+            # Each step of the PRAGMA frees one page, so it must be run to completion
+            cursor = await conn.execute(f"PRAGMA incremental_vacuum({int(pages)})")
+            await cursor.fetchall()
+            await conn.commit()
+            after = await (await conn.execute("PRAGMA freelist_count")).fetchone()
+            return before[0] - after[0]
+    
+    async def migrate(self, migrations: List[Migration]) -> Dict[str, Any]:
+        """Apply pending migrations, tracked by PRAGMA user_version.
+        
+        An up-to-date database costs a single PRAGMA read. Otherwise all pending
+        steps and the new user_version are committed in one BEGIN IMMEDIATE
+        transaction, so a failed step leaves the schema untouched and concurrent
+        processes starting on the same file migrate it only once.
+        
+        Args:
+            migrations: Steps ordered by version (versions start at 1)
+            
+        Returns:
+            Dictionary with from/to versions, applied step names and elapsed time
+        """
+        started = time.perf_counter()
+        latest = migrations[-1][0] if migrations else 0
+        await self._drain()
+        async with self._write_lock:
+            conn = await self.connect()
+            current = (await (await conn.execute("PRAGMA user_version")).fetchone())[0]
+            applied: List[str] = []
+            if current < latest:
+                await conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # Re-read under the write lock: another process may have migrated meanwhile
+                    current = (await (await conn.execute("PRAGMA user_version")).fetchone())[0]
+                    for version, name, step in migrations:
+                        if version > current:
+                            await step(conn)
+                            applied.append(name)
+                    await conn.execute(f"PRAGMA user_version = {max(current, latest)}")
+                    await conn.commit()
+                except BaseException:
+                    await conn.rollback()
+                    raise
+        return {
+            "from_version": current,
+            "to_version": max(current, latest),
+            "latest_version": latest,
+            "applied": applied,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+    
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Run several statements atomically in one BEGIN IMMEDIATE transaction.
+        
+        Queued group-commit writes are committed first, and no other write
+        through this manager starts until the block ends. The block commits on
+        success and rolls back on any exception.
+        
+        Yields:
+            The connection to execute the statements on
+        """
+        await self._drain()
+        async with self._write_lock:
+            conn = await self.connect()
+            if conn.in_transaction:
+                await conn.commit()
+            await conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+    
     async def close(self):
-        """Close database connection."""
+        """Flush pending group-commit writes and close the connection."""
+        await self._drain()
         if self._connection:
             await self._connection.close()
             self._connection = None
@@ -43,10 +242,129 @@ class DatabaseManager:
         Returns:
             Cursor after execution
         """
-        conn = await self.connect()
-        cursor = await conn.execute(query, params)
-        await conn.commit()
-        return cursor
+        if self.group_commit_ms > 0:
+            return await self._enqueue(query, params, False)
+        async with self._write_lock:
+            conn = await self.connect()
+            cursor = await conn.execute(query, params)
+            await conn.commit()
+            return cursor
+    
+    async def executemany(self, query: str, params_seq):
+        """Execute a query for each parameter tuple in one transaction.
+        
+        Args:
+            query: SQL query
+            params_seq: Iterable of parameter tuples
+        """
+        if self.group_commit_ms > 0:
+            await self._enqueue(query, list(params_seq), True)
+            return
+        async with self._write_lock:
+            conn = await self.connect()
+            await conn.executemany(query, params_seq)
+            await conn.commit()
+    
+    async def _drain(self):
+        """Wait until every queued group-commit write is committed."""
+        while self._pending or self._flush_task is not None:
+            if self._flush_task is None:
+                self._start_flush()
+            await self._flush_task
+    
+    def write_stats(self) -> Dict[str, Any]:
+        """Return group-commit batch size and commit latency statistics."""
+        batches = self._stats["batches"]
+        return {
+            "group_commit_ms": self.group_commit_ms,
+            "group_commit_max": self.group_commit_max,
+            "batches": batches,
+            "statements": self._stats["statements"],
+            "failed_statements": self._stats["failed_statements"],
+            "pending": len(self._pending),
+            "avg_batch_size": round(self._stats["statements"] / batches, 2) if batches else 0.0,
+            "max_batch_size": self._stats["max_batch_size"],
+            "avg_commit_ms": round(self._stats["commit_ms_total"] / batches, 3) if batches else 0.0,
+            "last_commit_ms": round(self._stats["last_commit_ms"], 3),
+        }
+    
+    async def _enqueue(self, query: str, params: Any, is_many: bool):
+        """Queue a write for the next group commit and wait until it is committed."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((query, params, is_many, future))
+        if len(self._pending) >= self.group_commit_max:
+            self._start_flush()
+        elif self._flush_handle is None and self._flush_task is None:
+            self._flush_handle = loop.call_later(self.group_commit_ms / 1000, self._start_flush)
+        return await future
+    
+    def _start_flush(self):
+        """Start a flush task unless one is already running."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+    
+    async def _flush(self):
+        """Commit queued writes in batches until the queue is empty."""
+        try:
+            while self._pending:
+                batch = self._pending[:self.group_commit_max]
+                del self._pending[:self.group_commit_max]
+                async with self._write_lock:
+                    await self._commit_batch(batch)
+        finally:
+            self._flush_task = None
+    
+    async def _commit_batch(self, batch: List[Tuple[str, Any, bool, asyncio.Future]]):
+        """Run a batch in one transaction, isolating each statement in a savepoint."""
+        results: List[Tuple[asyncio.Future, Any, Optional[BaseException]]] = []
+        started = time.perf_counter()
+        try:
+            conn = await self.connect()
+            if not conn.in_transaction:
+                await conn.execute("BEGIN")
+            for query, params, is_many, future in batch:
+                await conn.execute("SAVEPOINT group_write")
+                try:
+                    if is_many:
+                        cursor = await conn.executemany(query, params)
+                    else:
+                        cursor = await conn.execute(query, params)
+                except Exception as e:
+                    await conn.execute("ROLLBACK TO group_write")
+                    results.append((future, None, e))
+                    self._stats["failed_statements"] += 1
+                else:
+                    results.append((future, cursor, None))
+                await conn.execute("RELEASE group_write")
+            await conn.commit()
+        except Exception as e:
+            if self._connection is not None:
+                try:
+                    await self._connection.rollback()
+                except Exception:
+                    pass
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._stats["batches"] += 1
+        self._stats["statements"] += len(batch)
+        self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(batch))
+        self._stats["commit_ms_total"] += elapsed_ms
+        self._stats["last_commit_ms"] = elapsed_ms
+        for future, cursor, error in results:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(cursor)
     
     async def fetchone(self, query: str, params: tuple = ()):
         """Execute query and fetch one result.
@@ -77,6 +395,106 @@ class DatabaseManager:
         return await cursor.fetchall()
 
 
+class ReadConnectionPool:
+    """Fixed-size pool of read-only connections to one SQLite file.
+    
+    Every aiosqlite connection runs on its own worker thread, so queries on
+    different pool connections execute in parallel instead of queueing behind
+    each other. Cancelling a query (e.g. when asyncio.wait_for times out)
+    interrupts the running statement, and the cancellation only completes once
+    the connection has stopped and is back in the pool.
+    """
+    
+    def __init__(self, db_path: str, size: int, pragmas: Optional[Dict[str, Any]] = None):
+        """Initialize pool; connections are opened on first use.
+        
+        Args:
+            db_path: Path to SQLite database file
+            size: Maximum number of concurrent queries / open connections
+            pragmas: PRAGMAs applied on connect (journal_mode is left to the writer)
+        """
+        self.db_path = db_path
+        self.size = max(1, size)
+        self.pragmas = {name: value for name, value in (pragmas or {}).items() if name != "journal_mode"}
+        self._idle: List[aiosqlite.Connection] = []
+        self._available = asyncio.Semaphore(self.size)
+    
+    async def fetchall(self, query: str, params: tuple = ()):
+        """Execute query on an idle pool connection and fetch all results.
+        
+        Args:
+            query: SQL query
+            params: Query parameters
+            
+        Returns:
+            List of rows
+        """
+        async with self._acquire() as conn:
+            task = asyncio.ensure_future(self._fetchall(conn, query, params))
+            try:
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                await conn.interrupt()
+                try:
+                    await task
+                except Exception:
+                    pass
+                raise
+    
+    async def close(self):
+        """Close idle connections."""
+        while self._idle:
+            await self._idle.pop().close()
+    
+    @asynccontextmanager
+    async def _acquire(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Check out a connection, opening one if none is idle."""
+        async with self._available:
+            conn = self._idle.pop() if self._idle else await self._connect()
+            try:
+                yield conn
+            finally:
+                self._idle.append(conn)
+    
+    async def _connect(self) -> aiosqlite.Connection:
+        """Open a pool connection that refuses writes."""
+        conn = await aiosqlite.connect(self.db_path)
+        conn.row_factory = aiosqlite.Row
+        for name, value in self.pragmas.items():
+            await conn.execute(f"PRAGMA {name} = {value}")
+        await conn.execute("PRAGMA query_only = 1")
+        return conn
+    
+    @staticmethod
+    async def _fetchall(conn: aiosqlite.Connection, query: str, params: tuple):
+        """Run a query on a checked-out connection."""
+        cursor = await conn.execute(query, params)
+        return await cursor.fetchall()
+
+
 # Global database managers
-history_db = DatabaseManager(settings.history_db_path)
-target_db = DatabaseManager(settings.target_db_path)
+history_db = DatabaseManager(
+    settings.history_db_path,
+    resolve_pragmas(settings.history_db_profile, settings.history_db_pragmas),
+    group_commit_ms=settings.history_db_group_commit_ms,
+    group_commit_max=settings.history_db_group_commit_max,
+)
+target_db = DatabaseManager(
+    settings.target_db_path,
+    resolve_pragmas(settings.target_db_profile, settings.target_db_pragmas),
+)
+# Light queries (and their plan classification) never share a connection with heavy scans
+target_light_pool = ReadConnectionPool(
+    settings.target_db_path,
+    settings.target_db_light_connections,
+    resolve_pragmas(settings.target_db_profile, settings.target_db_pragmas),
+)
+target_heavy_pool = ReadConnectionPool(
+    settings.target_db_path,
+    settings.admission_max_heavy_queries,
+    resolve_pragmas(settings.target_db_profile, settings.target_db_pragmas),
+)
+results_db = DatabaseManager(
+    settings.result_store_path,
+    resolve_pragmas(settings.result_store_profile),
+)
@@ -0,0 +1,121 @@
+"""In-memory LRU of recent conversation turns used as LLM context."""
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+from ..config import settings
+
+
+class ConversationContextCache:
+    """Bounded per-conversation cache of recent (role, content) messages.
+
+    Each entry holds the newest `max_messages` messages of one conversation
+    with their ids; HistoryManager.save_message appends to entries
+    write-through. Other workers (and retention) write history.db without
+    touching this process's cache, so get() only serves an entry whose ids
+    match the conversation's newest message ids read from the database (an
+    index-only query); the message contents are never re-read on a hit.
+    """
+
+    def __init__(self, max_conversations: int = 1024, max_messages: int = 50):
+        """Initialize the cache.
+
+        Args:
+            max_conversations: Conversations kept before evicting the least recently used
+            max_messages: Most recent messages kept per conversation
+        """
+        self.max_conversations = max_conversations
+        self.max_messages = max_messages
+        self._entries: "OrderedDict[str, Deque[Dict[str, Any]]]" = OrderedDict()
+        # Bumped on every write so a concurrent cache fill cannot install stale history
+        self._write_seq = 0
+        self.hits = 0
+        self.misses = 0
+
+    def window(self, limit: int) -> int:
+        """Number of newest message ids get() needs to validate a `limit` request."""
+        return limit or self.max_messages
+
+    def get(
+        self, conversation_id: str, limit: int, newest_ids: List[int]
+    ) -> Optional[List[Dict[str, str]]]:
+        """Return the newest `limit` messages (oldest first), or None on a miss.
+
+        Args:
+            conversation_id: Conversation UUID
+            limit: Only the most recent N messages (0 for every cached one)
+            newest_ids: The conversation's newest window(limit) message ids in
+                the database, oldest first; a cached entry that differs is stale
+        """
+        entry = self._entries.get(conversation_id)
+        if entry is None or limit > self.max_messages:
+            self.misses += 1
+            return None
+        messages = list(entry)[-self.window(limit):]
+        if [m["id"] for m in messages] != newest_ids:
+            # Written by another worker (or pruned) since it was cached
+            del self._entries[conversation_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(conversation_id)
+        self.hits += 1
+        return [{"role": m["role"], "content": m["content"]} for m in messages]
+
+    def write_seq(self) -> int:
+        """Return the write counter to pass to fill() after a database read."""
+        return self._write_seq
+
+    def fill(self, conversation_id: str, messages: List[Dict[str, Any]], seen_write_seq: int):
+        """Install {id, role, content} messages loaded from the database (oldest first).
+
+        Skipped if any write happened since seen_write_seq, since the read may
+        predate it.
+        """
+        if seen_write_seq != self._write_seq:
+            return
+        self._install(conversation_id, messages)
+
+    def start(self, conversation_id: str):
+        """Cache a newly created (empty) conversation."""
+        self._write_seq += 1
+        self._install(conversation_id, [])
+
+    def append(self, conversation_id: str, message_id: int, role: str, content: str):
+        """Write-through for a saved message (no-op if the conversation is not cached)."""
+        self._write_seq += 1
+        entry = self._entries.get(conversation_id)
+        if entry is not None:
+            entry.append({"id": message_id, "role": role, "content": content})
+
+    def invalidate(self, conversation_id: Optional[str] = None):
+        """Drop one conversation, or everything when conversation_id is None."""
+        self._write_seq += 1
+        if conversation_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(conversation_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters."""
+        total = self.hits + self.misses
+        return {
+            "conversations": len(self._entries),
+            "max_conversations": self.max_conversations,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def _install(self, conversation_id: str, messages: List[Dict[str, Any]]):
+        self._entries[conversation_id] = deque(
+            ({"id": m["id"], "role": m["role"], "content": m["content"]} for m in messages),
+            maxlen=self.max_messages,
+        )
+        self._entries.move_to_end(conversation_id)
+        while len(self._entries) > self.max_conversations:
+            self._entries.popitem(last=False)
+
+
+# Global conversation context cache instance
+context_cache = ConversationContextCache(
+    max_conversations=settings.context_cache_conversations,
+    max_messages=max(settings.context_cache_messages, settings.max_conversation_messages),
+)
@@ -0,0 +1,49 @@
+"""Base execution engine interface."""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Hashable, List, Tuple
+
+
+class BaseExecutionEngine(ABC):
+    """Abstract base class for SQL execution engines.
+
+    All engines (SQLite, DuckDB, etc.) must implement this interface so the
+    executor, prompts and caches can switch between them per query.
+    """
+
+    # Engine identifier used in settings (e.g. 'sqlite')
+    name: str = ""
+
+    # SQL dialect name shown to the LLM in generation/correction prompts
+    dialect: str = ""
+
+    # Dialect-specific hints appended to the prompt rules
+    dialect_notes: str = ""
+
+    @abstractmethod
+    async def fetch(self, sql: str, cost_class: str = "light") -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Execute a read-only query.
+
+        Cancelling the call must stop the query before the cancellation
+        completes, so the caller's admission slot is not freed early.
+
+        Args:
+            sql: SELECT statement in this engine's dialect
+            cost_class: Admission cost class, 'light' or 'heavy'
+
+        Returns:
+            Tuple of (column names, rows as dicts)
+        """
+        pass
+
+    @abstractmethod
+    async def data_version(self) -> Hashable:
+        """Return a token that changes whenever the underlying data changes.
+
+        Returns:
+            Hashable version token (used as part of result cache keys)
+        """
+        pass
+
+    async def close(self):
+        """Release engine resources."""
+        pass
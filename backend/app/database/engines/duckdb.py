@@ -0,0 +1,143 @@
+"""DuckDB execution engine for analytic (scan/aggregate-heavy) queries."""
+import asyncio
+import datetime
+import decimal
+import glob
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from .base import BaseExecutionEngine
+from .sqlite import _mtime_ns
+
+
+class DuckDBEngine(BaseExecutionEngine):
+    """In-process vectorized engine over target.db or its Parquet exports.
+
+    In SQLite mode the target database is attached read-only through DuckDB's
+    sqlite extension. In Parquet mode every ``<table>.parquet`` file in the
+    export directory is exposed as a view named after the file.
+    """
+
+    name = "duckdb"
+    dialect = "DuckDB"
+    dialect_notes = (
+        "Date functions follow DuckDB: strftime(value, format), date_diff('day', start, end), "
+        "CAST(text AS DATE) for TEXT date columns."
+    )
+
+    def __init__(
+        self,
+        sqlite_path: str,
+        parquet_dir: Optional[str] = None,
+        threads: Optional[int] = None,
+    ):
+        """Initialize DuckDB engine.
+
+        Args:
+            sqlite_path: Path to target SQLite database (attached when parquet_dir is None)
+            parquet_dir: Directory with one Parquet file per table
+            threads: DuckDB worker threads (default: DuckDB decides)
+
+        Raises:
+            ImportError: If the duckdb package is not installed
+        """
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError(
+                "DuckDB engine requires the 'duckdb' package (pip install duckdb)"
+            ) from e
+
+        self.sqlite_path = sqlite_path
+        self.parquet_dir = parquet_dir
+        self._lock = threading.Lock()
+        self._conn = duckdb.connect(":memory:")
+        if threads:
+            self._conn.execute(f"SET threads = {int(threads)}")
+
+        if parquet_dir:
+            self._register_parquet_views()
+        else:
+            self._conn.execute("INSTALL sqlite")
+            self._conn.execute("LOAD sqlite")
+            self._conn.execute(
+                f"ATTACH '{_quote_literal(sqlite_path)}' AS target (TYPE SQLITE, READ_ONLY)"
+            )
+            self._conn.execute("USE target")
+
+    def _register_parquet_views(self):
+        """Create (or refresh) one view per Parquet export."""
+        for path in sorted(glob.glob(os.path.join(self.parquet_dir, "*.parquet"))):
+            table = os.path.splitext(os.path.basename(path))[0]
+            self._conn.execute(
+                f"CREATE OR REPLACE VIEW \"{table}\" AS "
+                f"SELECT * FROM read_parquet('{_quote_literal(path)}')"
+            )
+
+    async def fetch(self, sql: str, cost_class: str = "light") -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Execute query in a worker thread and return column names and rows.
+
+        Args:
+            sql: SELECT statement in DuckDB dialect
+            cost_class: Admission cost class (DuckDB queries share one database instance)
+
+        Returns:
+            Tuple of (column names, rows as dicts)
+        """
+        cursor = self._conn.cursor()
+        if not self.parquet_dir:
+            cursor.execute("USE target")
+        task = asyncio.ensure_future(asyncio.to_thread(self._fetch_sync, cursor, sql))
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Timeouts cancel the await; stop the query in the worker thread and wait for it
+            cursor.interrupt()
+            try:
+                await task
+            except Exception:
+                pass
+            raise
+        finally:
+            cursor.close()
+
+    def _fetch_sync(self, cursor, sql: str) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Blocking query execution (runs in a worker thread)."""
+        cursor.execute(sql)
+        columns = [d[0] for d in cursor.description or []]
+        rows = [
+            {col: _to_json_value(value) for col, value in zip(columns, row)}
+            for row in cursor.fetchall()
+        ]
+        return columns, rows
+
+    async def data_version(self) -> Tuple[Any, ...]:
+        """Return file mtimes of the data this engine reads."""
+        if self.parquet_dir:
+            with self._lock:
+                self._register_parquet_views()
+            return tuple(
+                (path, _mtime_ns(path))
+                for path in sorted(glob.glob(os.path.join(self.parquet_dir, "*.parquet")))
+            )
+        return (_mtime_ns(self.sqlite_path), _mtime_ns(f"{self.sqlite_path}-wal"))
+
+    async def close(self):
+        """Close the DuckDB connection."""
+        self._conn.close()
+
+
+def _quote_literal(value: str) -> str:
+    """Escape a value for use inside a single-quoted SQL literal."""
+    return value.replace("'", "''")
+
+
+def _to_json_value(value: Any) -> Any:
+    """Convert DuckDB result values to JSON-serializable Python values."""
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, datetime.timedelta):
+        return str(value)
+    return value
@@ -0,0 +1,96 @@
+"""Execution engine factory and per-intent routing."""
+from typing import Dict, Optional, Type
+from .base import BaseExecutionEngine
+from .duckdb import DuckDBEngine
+from .sqlite import SQLiteEngine
+from ...config import settings
+from ...constants import ANALYTIC_INTENTS
+
+
+class ExecutionEngineFactory:
+    """Factory for creating execution engine instances."""
+
+    _engine_classes: Dict[str, Type[BaseExecutionEngine]] = {
+        "sqlite": SQLiteEngine,
+        "duckdb": DuckDBEngine,
+    }
+    _instances: Dict[str, BaseExecutionEngine] = {}  # Singleton cache
+
+    @classmethod
+    def engine_name_for_intent(cls, intent: Optional[str] = None) -> str:
+        """Pick the engine for a query intent.
+
+        Aggregation/joining intents go to the analytic engine; everything else
+        (point lookups, filtering) stays on the default engine.
+
+        Args:
+            intent: Detected intent
+
+        Returns:
+            Engine name ('sqlite' or 'duckdb')
+        """
+        if intent in ANALYTIC_INTENTS:
+            return settings.analytic_execution_engine.lower()
+        return settings.execution_engine.lower()
+
+    @classmethod
+    def engine_class_for_intent(cls, intent: Optional[str] = None) -> Type[BaseExecutionEngine]:
+        """Return the engine class for an intent without instantiating it.
+
+        Prompt builders use this to read the target dialect.
+
+        Raises:
+            ValueError: If the configured engine is unsupported
+        """
+        return cls._engine_class(cls.engine_name_for_intent(intent))
+
+    @classmethod
+    def get_engine(cls, engine_type: Optional[str] = None) -> BaseExecutionEngine:
+        """Get or create an execution engine instance.
+
+        Args:
+            engine_type: Engine type ('sqlite', 'duckdb'). Defaults to config.
+
+        Returns:
+            Execution engine instance
+
+        Raises:
+            ValueError: If engine type is unsupported
+            ImportError: If the engine's optional dependency is missing
+        """
+        engine_type = (engine_type or settings.execution_engine).lower()
+        if engine_type in cls._instances:
+            return cls._instances[engine_type]
+
+        engine_class = cls._engine_class(engine_type)
+        if engine_class is DuckDBEngine:
+            instance = DuckDBEngine(
+                sqlite_path=settings.target_db_path,
+                parquet_dir=settings.duckdb_parquet_dir,
+                threads=settings.duckdb_threads,
+            )
+        else:
+            instance = engine_class()
+
+        cls._instances[engine_type] = instance
+        return instance
+
+    @classmethod
+    def get_engine_for_intent(cls, intent: Optional[str] = None) -> BaseExecutionEngine:
+        """Get the engine that should execute a query with this intent."""
+        return cls.get_engine(cls.engine_name_for_intent(intent))
+
+    @classmethod
+    def _engine_class(cls, engine_type: str) -> Type[BaseExecutionEngine]:
+        """Look up an engine class by name."""
+        engine_class = cls._engine_classes.get(engine_type)
+        if engine_class is None:
+            raise ValueError(f"Unsupported execution engine: {engine_type}")
+        return engine_class
+
+    @classmethod
+    async def close_all(cls):
+        """Close and forget all engine instances."""
+        for engine in cls._instances.values():
+            await engine.close()
+        cls._instances.clear()
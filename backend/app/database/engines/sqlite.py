@@ -0,0 +1,53 @@
+"""SQLite execution engine over the target database read pools."""
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from .base import BaseExecutionEngine
+from ..connection import target_db, target_heavy_pool, target_light_pool
+
+
+class SQLiteEngine(BaseExecutionEngine):
+    """Runs queries on target.db, heavy ones on their own connection pool."""
+
+    name = "sqlite"
+    dialect = "SQLite"
+    dialect_notes = "Date functions follow SQLite: date(), strftime(format, value), julianday()."
+
+    async def fetch(self, sql: str, cost_class: str = "light") -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Execute query and return column names and rows.
+
+        Args:
+            sql: SELECT statement
+            cost_class: 'heavy' runs on the heavy pool, anything else on the light pool
+
+        Returns:
+            Tuple of (column names, rows as dicts)
+        """
+        pool = target_heavy_pool if cost_class == "heavy" else target_light_pool
+        rows = await pool.fetchall(sql)
+        columns = list(rows[0].keys()) if rows else []
+        return columns, [dict(row) for row in rows]
+
+    async def data_version(self) -> Tuple[int, Optional[int], Optional[int]]:
+        """Build a token that changes whenever target.db content changes.
+
+        PRAGMA data_version catches commits from other connections (e.g. ingestion
+        scripts); file mtimes catch writes made through our own connection.
+
+        Returns:
+            Tuple of (data_version, db mtime_ns, wal mtime_ns)
+        """
+        row = await target_db.fetchone("PRAGMA data_version")
+        data_version = row[0] if row else 0
+        return (
+            data_version,
+            _mtime_ns(target_db.db_path),
+            _mtime_ns(f"{target_db.db_path}-wal"),
+        )
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    """Return file mtime in nanoseconds, or None if the file is missing."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
@@ -1,133 +1,604 @@
 """Chat history and conversation memory database operations."""
-from typing import List, Dict, Any, Optional, Tuple
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+import base64
 import json
-from .connection import history_db
-
-
-class HistoryManager:
-    """Manages conversation history and query history in SQLite."""
+import re
+import aiosqlite
+from .connection import Migration, history_db
+from .context_cache import context_cache
+from .result_blobs import encode_result, decode_result
+from ..tools.sql_normalizer import extract_table_names
+
+
+# Full-text search: case/diacritic-insensitive (Vietnamese questions match without accents)
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+# Conversation titles are the first user message, truncated
+TITLE_MAX_CHARS = 50
+DEFAULT_CONVERSATION_TITLE = "New Conversation"
+
+
+def make_conversation_title(content: str) -> str:
+    """Build a list title from the first user message."""
+    return content[:TITLE_MAX_CHARS] + ("..." if len(content) > TITLE_MAX_CHARS else "")
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase and collapse whitespace for question matching."""
+    return " ".join(question.lower().split())
+
+
+def build_fts_query(text: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 MATCH expression.
+
+    Every word is quoted, so FTS5 operators and punctuation in the input are
+    matched literally. The last word also matches as a prefix (search-as-you-type).
+
+    Args:
+        text: User input
+
+    Returns:
+        MATCH expression, or None if the text has no searchable words
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+UPSERT_TABLE_DEFINITION_SQL = """
+    INSERT INTO schema_table_definitions
+        (table_name, columns_json, relationships_json, description, tags_json, is_active)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(table_name) DO UPDATE SET
+        columns_json = excluded.columns_json,
+        relationships_json = excluded.relationships_json,
+        description = excluded.description,
+        tags_json = excluded.tags_json,
+        is_active = excluded.is_active,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def table_definition_params(
+    table_name: str,
+    columns: List[Dict[str, Any]],
+    relationships: Optional[List[Dict[str, Any]]] = None,
+    description: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    is_active: bool = True,
+) -> tuple:
+    """Build UPSERT_TABLE_DEFINITION_SQL parameters."""
+    return (
+        table_name,
+        json.dumps(columns),
+        json.dumps(relationships or []),
+        description,
+        json.dumps(tags or []),
+        int(is_active),
+    )
+
+
+UPSERT_FEW_SHOT_EXAMPLE_SQL = """
+    INSERT INTO few_shot_examples
+        (message_id, conversation_id, question, normalized_question, sql, intent, tables_json)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(message_id) DO UPDATE SET
+        question = excluded.question,
+        normalized_question = excluded.normalized_question,
+        sql = excluded.sql,
+        intent = excluded.intent,
+        tables_json = excluded.tables_json
+"""
+
+
+def few_shot_example_params(
+    message_id: int,
+    conversation_id: str,
+    question: str,
+    sql: str,
+    intent: Optional[str] = None,
+) -> tuple:
+    """Build UPSERT_FEW_SHOT_EXAMPLE_SQL parameters for a liked answer."""
+    return (
+        message_id,
+        conversation_id,
+        question,
+        normalize_question(question),
+        sql,
+        intent,
+        json.dumps(extract_table_names(sql)),
+    )
+
+
+def encode_conversation_cursor(updated_at: str, conversation_id: str) -> str:
+    """Encode a keyset position (updated_at, id) as an opaque cursor."""
+    return base64.urlsafe_b64encode(f"{updated_at}|{conversation_id}".encode()).decode()
+
+
+def decode_conversation_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor from encode_conversation_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        updated_at, conversation_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+    except Exception as e:
+        raise ValueError("Invalid conversation cursor") from e
+    return updated_at, conversation_id
+
+
+# ---------------------------------------------------------------------------
+# Schema migrations (applied by HistoryManager.init_database)
+#
+# Versions are tracked in PRAGMA user_version. Every step is idempotent
+# (IF NOT EXISTS, missing-column checks) so databases created before
+# versioning (user_version 0) are adopted without losing data. Append new
+# steps; never edit a released one.
+# ---------------------------------------------------------------------------
+
+
+async def _table_columns(conn: aiosqlite.Connection, table_name: str) -> set[str]:
+    """Get current column names for a table (empty if it does not exist)."""
+    cursor = await conn.execute(f"PRAGMA table_info({table_name})")
+    return {row["name"] for row in await cursor.fetchall()}
+
+
+async def _add_missing_columns(conn: aiosqlite.Connection, table_name: str, columns: Dict[str, str]) -> set[str]:
+    """ALTER TABLE ADD COLUMN for each column not present yet; returns the added names."""
+    existing = await _table_columns(conn, table_name)
+    added = set()
+    for name, ddl in columns.items():
+        if name not in existing:
+            await conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {name} {ddl}")
+            added.add(name)
+    return added
+
+
+async def _migrate_core_tables(conn: aiosqlite.Connection):
+    """v1: conversations, messages, query history and result blobs."""
+    message_columns = await _table_columns(conn, "conversation_messages")
+    missing = {"id", "conversation_id", "role", "content"} - message_columns
+    if message_columns and missing:
+        raise RuntimeError(
+            f"conversation_messages is missing {sorted(missing)}; "
+            "rebuild history.db with `python -m app.database.init_db`"
+        )
 
-    async def _get_table_columns(self, table_name: str) -> set[str]:
-        """Get current column names for a table."""
-        rows = await history_db.fetchall(f"PRAGMA table_info({table_name})")
-        return {row["name"] for row in rows}
-
-    async def init_database(self):
-        """Initialize database schema."""
-        # Rebuild incompatible legacy schemas (destructive)
-        existing_message_columns = await self._get_table_columns("conversation_messages")
-        required_message_columns = {
-            "id",
-            "conversation_id",
-            "role",
-            "content",
-            "sql",
-            "result_json",
-            "error",
-            "metadata_json",
-            "timestamp",
-        }
-        if existing_message_columns and not required_message_columns.issubset(existing_message_columns):
-            await self.reset_database()
-            return
-
-        # Create conversations table
-        await history_db.execute("""
-            CREATE TABLE IF NOT EXISTS conversations (
-                id TEXT PRIMARY KEY,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                user_id TEXT,
-                schema_json TEXT
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS conversations (
+            id TEXT PRIMARY KEY,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            user_id TEXT,
+            schema_json TEXT,
+            title TEXT,
+            -- Bumped by changes that keep updated_at (e.g. feedback); part of the ETag
+            revision INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+    # Conversation memory
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS conversation_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            sql TEXT,
+            result_json TEXT,
+            error TEXT,
+            metadata_json TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            feedback TEXT,
+            result_hash TEXT,
+            FOREIGN KEY (conversation_id) REFERENCES conversations(id)
+        )
+    """)
+
+    # Few-shot learning fallback
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS query_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_id TEXT,
+            question TEXT NOT NULL,
+            intent TEXT,
+            generated_sql TEXT NOT NULL,
+            execution_result TEXT,
+            success BOOLEAN NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            result_hash TEXT,
+            FOREIGN KEY (conversation_id) REFERENCES conversations(id)
+        )
+    """)
+
+    # Compressed execution results, keyed by content hash
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS result_blobs (
+            hash TEXT PRIMARY KEY,
+            codec TEXT NOT NULL,
+            raw_size INTEGER NOT NULL,
+            data BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Columns added to pre-versioning databases over time
+    await _add_missing_columns(conn, "conversation_messages", {
+        "sql": "TEXT",
+        "result_json": "TEXT",
+        "error": "TEXT",
+        "metadata_json": "TEXT",
+        "timestamp": "TIMESTAMP",
+        "feedback": "TEXT",
+        "result_hash": "TEXT",
+    })
+    await _add_missing_columns(conn, "query_history", {"result_hash": "TEXT"})
+    added = await _add_missing_columns(conn, "conversations", {
+        "schema_json": "TEXT",
+        "revision": "INTEGER NOT NULL DEFAULT 0",
+        "title": "TEXT",
+    })
+    if "title" in added:
+        # Backfill titles from the first user message of existing conversations
+        await conn.execute(
+            """
+            UPDATE conversations SET title = (
+                SELECT CASE WHEN length(m.content) > ? THEN substr(m.content, 1, ?) || '...'
+                            ELSE m.content END
+                FROM conversation_messages m
+                WHERE m.conversation_id = conversations.id AND m.role = 'user'
+                ORDER BY m.id ASC
+                LIMIT 1
             )
-        """)
+            """,
+            (TITLE_MAX_CHARS, TITLE_MAX_CHARS),
+        )
 
-        # Create conversation_messages table (for conversation memory)
-        await history_db.execute("""
-            CREATE TABLE IF NOT EXISTS conversation_messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                conversation_id TEXT NOT NULL,
-                role TEXT NOT NULL,
-                content TEXT NOT NULL,
-                sql TEXT,
-                result_json TEXT,
-                error TEXT,
-                metadata_json TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (conversation_id) REFERENCES conversations(id)
+    for statement in (
+        "CREATE INDEX IF NOT EXISTS idx_conv_messages ON conversation_messages(conversation_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_conv_messages_recent ON conversation_messages(conversation_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_query_question ON query_history(question)",
+        "CREATE INDEX IF NOT EXISTS idx_query_success ON query_history(success)",
+        # Keyset pagination of the conversation list
+        "CREATE INDEX IF NOT EXISTS idx_conversations_updated ON conversations(updated_at, id)",
+        # Reference lookups for result blob garbage collection
+        "CREATE INDEX IF NOT EXISTS idx_conv_messages_result_hash "
+        "ON conversation_messages(result_hash) WHERE result_hash IS NOT NULL",
+        "CREATE INDEX IF NOT EXISTS idx_query_history_result_hash "
+        "ON query_history(result_hash) WHERE result_hash IS NOT NULL",
+    ):
+        await conn.execute(statement)
+
+
+async def _migrate_few_shot_examples(conn: aiosqlite.Connection):
+    """v2: few_shot_examples (liked answers), backfilled from existing feedback."""
+    existed = bool(await _table_columns(conn, "few_shot_examples"))
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS few_shot_examples (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            message_id INTEGER NOT NULL UNIQUE,
+            conversation_id TEXT NOT NULL,
+            question TEXT NOT NULL,
+            normalized_question TEXT NOT NULL,
+            sql TEXT NOT NULL,
+            intent TEXT,
+            tables_json TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (message_id) REFERENCES conversation_messages(id)
+        )
+    """)
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_few_shot_normalized ON few_shot_examples(normalized_question)"
+    )
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_few_shot_conversation ON few_shot_examples(conversation_id)"
+    )
+    if existed:
+        return
+
+    # Messages liked before the table existed
+    cursor = await conn.execute(
+        """
+        SELECT a.id, a.conversation_id, a.sql, a.metadata_json, u.content AS question
+        FROM conversation_messages a
+        JOIN conversation_messages u ON (
+            u.id = (
+                SELECT MAX(id) FROM conversation_messages
+                WHERE conversation_id = a.conversation_id
+                  AND role = 'user'
+                  AND id < a.id
             )
-        """)
+        )
+        WHERE a.feedback = 'like'
+          AND a.sql IS NOT NULL
+          AND a.role = 'assistant'
+        """
+    )
+    params = []
+    for row in await cursor.fetchall():
+        metadata = json.loads(row["metadata_json"]) if row["metadata_json"] else {}
+        params.append(few_shot_example_params(
+            row["id"], row["conversation_id"], row["question"], row["sql"], metadata.get("intent")
+        ))
+    await conn.executemany(UPSERT_FEW_SHOT_EXAMPLE_SQL, params)
+
+
+async def _migrate_schema_registry(conn: aiosqlite.Connection):
+    """v3: table definitions, business context and the trigger-maintained registry version."""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_table_definitions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL UNIQUE,
+            columns_json TEXT NOT NULL,
+            relationships_json TEXT,
+            description TEXT,
+            tags_json TEXT,
+            is_active BOOLEAN NOT NULL DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_schema_table_active ON schema_table_definitions(is_active)"
+    )
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_registry_business_context (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            body TEXT NOT NULL
+        )
+    """)
+
+    # epoch is random per database so a reset never reuses an old (epoch, version)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_registry_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            epoch TEXT NOT NULL,
+            version INTEGER NOT NULL
+        )
+    """)
+    await conn.execute(
+        "INSERT OR IGNORE INTO schema_registry_version (id, epoch, version) "
+        "VALUES (1, lower(hex(randomblob(8))), 0)"
+    )
+    for table in ("schema_table_definitions", "schema_registry_business_context"):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            await conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()}
+                AFTER {event} ON {table} BEGIN
+                    UPDATE schema_registry_version SET version = version + 1 WHERE id = 1;
+                END
+            """)
+
+
+async def _migrate_archive_index(conn: aiosqlite.Connection):
+    """v4: index of conversations moved to monthly archive files (see retention.py)."""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS archived_conversations (
+            id TEXT PRIMARY KEY,
+            title TEXT,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            message_count INTEGER NOT NULL,
+            archive_file TEXT NOT NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
 
-        # Create query_history table (for few-shot learning fallback)
-        await history_db.execute("""
-            CREATE TABLE IF NOT EXISTS query_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                conversation_id TEXT,
-                question TEXT NOT NULL,
-                intent TEXT,
-                generated_sql TEXT NOT NULL,
-                execution_result TEXT,
-                success BOOLEAN NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (conversation_id) REFERENCES conversations(id)
-            )
-        """)
 
-        # Create schema_table_definitions table for flexible table-level schemas
-        await history_db.execute("""
-            CREATE TABLE IF NOT EXISTS schema_table_definitions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                table_name TEXT NOT NULL UNIQUE,
-                columns_json TEXT NOT NULL,
-                relationships_json TEXT,
-                description TEXT,
-                tags_json TEXT,
-                is_active BOOLEAN NOT NULL DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+async def _migrate_search_index(conn: aiosqlite.Connection):
+    """v5: FTS5 indexes over questions and SQL, kept in sync by triggers.
 
-        # Create indexes
-        await history_db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_conv_messages
-            ON conversation_messages(conversation_id, timestamp)
-        """)
+    messages_fts indexes user questions and assistant SQL of
+    conversation_messages; few_shot_fts indexes few-shot example questions
+    (dropped again in v9).
+    Both are external-content tables, so the text is not stored twice.
+    """
+    messages_fts_exists = bool(await _table_columns(conn, "messages_fts"))
+    few_shot_fts_exists = bool(await _table_columns(conn, "few_shot_fts"))
 
-        await history_db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_query_question
-            ON query_history(question)
+    await conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+            content, sql,
+            content='conversation_messages', content_rowid='id',
+            tokenize='{FTS_TOKENIZER}'
+        )
+    """)
+    # Only questions (user) and SQL (assistant) are indexed; delete must repeat the same values
+    indexed_values = (
+        "CASE WHEN {r}.role = 'user' THEN {r}.content ELSE '' END, COALESCE({r}.sql, '')"
+    )
+    await conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS conversation_messages_fts_ins
+        AFTER INSERT ON conversation_messages BEGIN
+            INSERT INTO messages_fts(rowid, content, sql)
+            VALUES (new.id, {indexed_values.format(r="new")});
+        END
+    """)
+    await conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS conversation_messages_fts_del
+        AFTER DELETE ON conversation_messages BEGIN
+            INSERT INTO messages_fts(messages_fts, rowid, content, sql)
+            VALUES ('delete', old.id, {indexed_values.format(r="old")});
+        END
+    """)
+    await conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS conversation_messages_fts_upd
+        AFTER UPDATE OF role, content, sql ON conversation_messages BEGIN
+            INSERT INTO messages_fts(messages_fts, rowid, content, sql)
+            VALUES ('delete', old.id, {indexed_values.format(r="old")});
+            INSERT INTO messages_fts(rowid, content, sql)
+            VALUES (new.id, {indexed_values.format(r="new")});
+        END
+    """)
+
+    await conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS few_shot_fts USING fts5(
+            question,
+            content='few_shot_examples', content_rowid='id',
+            tokenize='{FTS_TOKENIZER}'
+        )
+    """)
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS few_shot_examples_fts_ins
+        AFTER INSERT ON few_shot_examples BEGIN
+            INSERT INTO few_shot_fts(rowid, question) VALUES (new.id, new.question);
+        END
+    """)
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS few_shot_examples_fts_del
+        AFTER DELETE ON few_shot_examples BEGIN
+            INSERT INTO few_shot_fts(few_shot_fts, rowid, question) VALUES ('delete', old.id, old.question);
+        END
+    """)
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS few_shot_examples_fts_upd
+        AFTER UPDATE OF question ON few_shot_examples BEGIN
+            INSERT INTO few_shot_fts(few_shot_fts, rowid, question) VALUES ('delete', old.id, old.question);
+            INSERT INTO few_shot_fts(rowid, question) VALUES (new.id, new.question);
+        END
+    """)
+
+    # Index rows written before the FTS tables existed
+    if not messages_fts_exists:
+        await conn.execute(f"""
+            INSERT INTO messages_fts(rowid, content, sql)
+            SELECT m.id, {indexed_values.format(r="m")} FROM conversation_messages m
         """)
+    if not few_shot_fts_exists:
+        await conn.execute("INSERT INTO few_shot_fts(few_shot_fts) VALUES ('rebuild')")
 
-        await history_db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_query_success
-            ON query_history(success)
+
+async def _migrate_few_shot_change_log(conn: aiosqlite.Connection):
+    """v6: trigger-maintained log of few_shot_examples changes for in-memory indexes.
+
+    Readers remember the last seq they applied and fetch only newer changes;
+    epoch is random per database so a reset forces a full reload.
+    """
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS few_shot_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            example_id INTEGER NOT NULL
+        )
+    """)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS few_shot_sync_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            epoch TEXT NOT NULL
+        )
+    """)
+    await conn.execute(
+        "INSERT OR IGNORE INTO few_shot_sync_state (id, epoch) VALUES (1, lower(hex(randomblob(8))))"
+    )
+    for event, ref in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")):
+        await conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS few_shot_examples_log_{event.lower()}
+            AFTER {event} ON few_shot_examples BEGIN
+                INSERT INTO few_shot_changes (example_id) VALUES ({ref}.id);
+            END
         """)
 
-        await history_db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_schema_table_active
-            ON schema_table_definitions(is_active)
+
+async def _migrate_conversation_list_version(conn: aiosqlite.Connection):
+    """v7: trigger-maintained revision of the conversation list (sidebar ETag).
+
+    Bumped on every insert, update or delete of a conversation, so two changes
+    within the same second of updated_at still produce different versions.
+    """
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS conversation_list_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            epoch TEXT NOT NULL,
+            version INTEGER NOT NULL
+        )
+    """)
+    await conn.execute(
+        "INSERT OR IGNORE INTO conversation_list_version (id, epoch, version) "
+        "VALUES (1, lower(hex(randomblob(8))), 0)"
+    )
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        await conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS conversations_list_version_{event.lower()}
+            AFTER {event} ON conversations BEGIN
+                UPDATE conversation_list_version SET version = version + 1 WHERE id = 1;
+            END
         """)
 
-        await history_db.execute("""
-            CREATE TABLE IF NOT EXISTS schema_registry_business_context (
-                id INTEGER PRIMARY KEY CHECK (id = 1),
-                body TEXT NOT NULL
-            )
+
+async def _migrate_few_shot_change_pruning(conn: aiosqlite.Connection):
+    """v8: timestamp few_shot_changes entries so old ones can be pruned.
+
+    pruned_seq records the newest seq deleted; readers that applied less than
+    that have missed changes and reload everything, as after an epoch change.
+    Entries logged before this migration have no changed_at and are pruned first.
+    """
+    await _add_missing_columns(conn, "few_shot_changes", {"changed_at": "TIMESTAMP"})
+    await _add_missing_columns(conn, "few_shot_sync_state", {"pruned_seq": "INTEGER NOT NULL DEFAULT 0"})
+    for event, ref in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")):
+        await conn.execute(f"DROP TRIGGER IF EXISTS few_shot_examples_log_{event.lower()}")
+        await conn.execute(f"""
+            CREATE TRIGGER few_shot_examples_log_{event.lower()}
+            AFTER {event} ON few_shot_examples BEGIN
+                INSERT INTO few_shot_changes (example_id, changed_at) VALUES ({ref}.id, CURRENT_TIMESTAMP);
+            END
         """)
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_few_shot_changes_changed_at ON few_shot_changes(changed_at)"
+    )
+
+
+async def _drop_few_shot_search_index(conn: aiosqlite.Connection):
+    """v9: drop few_shot_fts; few-shot retrieval uses the in-memory FewShotIndex."""
+    for event in ("ins", "del", "upd"):
+        await conn.execute(f"DROP TRIGGER IF EXISTS few_shot_examples_fts_{event}")
+    await conn.execute("DROP TABLE IF EXISTS few_shot_fts")
+
+
+async def _migrate_message_result_id(conn: aiosqlite.Connection):
+    """v10: result_id of the results.db set an assistant message's result came from.
+
+    History keeps the full result; once results.db has expired the set, pages
+    are served from the message's blob found through this column.
+    """
+    await _add_missing_columns(conn, "conversation_messages", {"result_id": "TEXT"})
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_conv_messages_result_id "
+        "ON conversation_messages(result_id) WHERE result_id IS NOT NULL"
+    )
+
+
+HISTORY_MIGRATIONS: List[Migration] = [
+    (1, "core_tables", _migrate_core_tables),
+    (2, "few_shot_examples", _migrate_few_shot_examples),
+    (3, "schema_registry", _migrate_schema_registry),
+    (4, "archive_index", _migrate_archive_index),
+    (5, "search_index", _migrate_search_index),
+    (6, "few_shot_change_log", _migrate_few_shot_change_log),
+    (7, "conversation_list_version", _migrate_conversation_list_version),
+    (8, "few_shot_change_pruning", _migrate_few_shot_change_pruning),
+    (9, "drop_few_shot_search_index", _drop_few_shot_search_index),
+    (10, "message_result_id", _migrate_message_result_id),
+]
 
-        # Add feedback column to conversation_messages if missing (non-destructive migration)
-        existing_msg_cols = await self._get_table_columns("conversation_messages")
-        if "feedback" not in existing_msg_cols:
-            await history_db.execute(
-                "ALTER TABLE conversation_messages ADD COLUMN feedback TEXT"
-            )
+class HistoryManager:
+    """Manages conversation history and query history in SQLite."""
 
-        existing_conv_cols = await self._get_table_columns("conversations")
-        if "schema_json" not in existing_conv_cols:
-            await history_db.execute(
-                "ALTER TABLE conversations ADD COLUMN schema_json TEXT"
-            )
+    def __init__(self):
+        """Initialize history manager."""
+        # Result of the last init_database (see DatabaseManager.migrate)
+        self.migration_status: Optional[Dict[str, Any]] = None
+
+    async def init_database(self) -> Dict[str, Any]:
+        """Apply pending schema migrations.
+
+        Returns:
+            Migration status from DatabaseManager.migrate
+        """
+        self.migration_status = await history_db.migrate(HISTORY_MIGRATIONS)
+        return self.migration_status
 
     async def reset_database(self):
         """Drop and recreate all history tables (destructive)."""
@@ -136,6 +607,17 @@ class HistoryManager:
         await history_db.execute("DROP TABLE IF EXISTS conversations")
         await history_db.execute("DROP TABLE IF EXISTS schema_registry_business_context")
         await history_db.execute("DROP TABLE IF EXISTS schema_table_definitions")
+        await history_db.execute("DROP TABLE IF EXISTS schema_registry_version")
+        await history_db.execute("DROP TABLE IF EXISTS result_blobs")
+        await history_db.execute("DROP TABLE IF EXISTS few_shot_examples")
+        await history_db.execute("DROP TABLE IF EXISTS archived_conversations")
+        await history_db.execute("DROP TABLE IF EXISTS messages_fts")
+        await history_db.execute("DROP TABLE IF EXISTS few_shot_fts")
+        await history_db.execute("DROP TABLE IF EXISTS few_shot_changes")
+        await history_db.execute("DROP TABLE IF EXISTS few_shot_sync_state")
+        await history_db.execute("DROP TABLE IF EXISTS conversation_list_version")
+        await history_db.execute("PRAGMA user_version = 0")
+        context_cache.invalidate()
 
         await self.init_database()
 
@@ -145,6 +627,7 @@ class HistoryManager:
             "INSERT INTO conversations (id, user_id) VALUES (?, ?)",
             (conversation_id, user_id)
         )
+        context_cache.start(conversation_id)
 
     async def conversation_exists(self, conversation_id: str) -> bool:
         """Check if conversation exists."""
@@ -154,6 +637,39 @@ class HistoryManager:
         )
         return row is not None
 
+    async def put_result_blob(self, result: Any) -> str:
+        """Store an execution result once, compressed, and return its content hash.
+
+        Re-storing an existing result refreshes its created_at, which retention
+        uses as the blob's last-referenced time when collecting garbage.
+
+        Args:
+            result: Result dict or JSON string
+
+        Returns:
+            SHA-256 hash referencing the result_blobs row
+        """
+        digest, codec, raw_size, data = encode_result(result)
+        await history_db.execute(
+            """
+            INSERT INTO result_blobs (hash, codec, raw_size, data)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(hash) DO UPDATE SET created_at = CURRENT_TIMESTAMP
+            """,
+            (digest, codec, raw_size, data),
+        )
+        return digest
+
+    async def get_result_blob(self, result_hash: str) -> Optional[Any]:
+        """Load and decompress a stored result by hash."""
+        row = await history_db.fetchone(
+            "SELECT codec, data FROM result_blobs WHERE hash = ?",
+            (result_hash,),
+        )
+        if not row:
+            return None
+        return decode_result(row["codec"], row["data"])
+
     async def save_message(
         self,
         conversation_id: str,
@@ -164,36 +680,119 @@ class HistoryManager:
         error: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
     ):
-        """Save a message to conversation history."""
-        result_json = json.dumps(result) if result is not None else None
+        """Save a message to conversation history and return its ID.
+
+        The result is stored in result_blobs and referenced by hash; result_json
+        is only populated by rows written before blob storage existed. Its
+        result_id (results.db set) is kept so pages outlive the result store.
+        """
+        result_hash = await self.put_result_blob(result) if result is not None else None
+        result_id = result.get("result_id") if isinstance(result, dict) else None
         metadata_json = json.dumps(metadata) if metadata is not None else None
 
-        await history_db.execute(
+        cursor = await history_db.execute(
             """
             INSERT INTO conversation_messages
-            (conversation_id, role, content, sql, result_json, error, metadata_json)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            (conversation_id, role, content, sql, result_hash, result_id, error, metadata_json)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (conversation_id, role, content, sql, result_json, error, metadata_json)
+            (conversation_id, role, content, sql, result_hash, result_id, error, metadata_json)
         )
 
-        await history_db.execute(
-            "UPDATE conversations SET updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-            (conversation_id,)
+        if role == "user":
+            # The first user message becomes the (denormalized) list title
+            await history_db.execute(
+                """
+                UPDATE conversations
+                SET updated_at = CURRENT_TIMESTAMP, title = COALESCE(title, ?)
+                WHERE id = ?
+                """,
+                (make_conversation_title(content), conversation_id)
+            )
+        else:
+            await history_db.execute(
+                "UPDATE conversations SET updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (conversation_id,)
+            )
+
+        context_cache.append(conversation_id, cursor.lastrowid, role, content)
+        return cursor.lastrowid
+
+    async def get_context_messages(self, conversation_id: str, limit: int) -> List[Dict[str, str]]:
+        """Get the most recent messages as {role, content} for LLM context.
+
+        Served from the in-memory context cache once the newest message ids
+        (read from idx_conv_messages_recent alone) confirm it is current; on a
+        miss, a projection query that never touches results or metadata fills it.
+
+        Args:
+            conversation_id: Conversation UUID
+            limit: Only the most recent N messages
+        """
+        seen_write_seq = context_cache.write_seq()
+        id_rows = await history_db.fetchall(
+            """
+            SELECT id FROM conversation_messages
+            WHERE conversation_id = ?
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (conversation_id, context_cache.window(limit)),
         )
+        cached = context_cache.get(conversation_id, limit, [row["id"] for row in reversed(id_rows)])
+        if cached is not None:
+            return cached
+
+        rows = await history_db.fetchall(
+            """
+            SELECT id, role, content FROM conversation_messages
+            WHERE conversation_id = ?
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (conversation_id, max(limit, context_cache.max_messages)),
+        )
+        messages = [
+            {"id": row["id"], "role": row["role"], "content": row["content"]} for row in reversed(rows)
+        ]
+        context_cache.fill(conversation_id, messages, seen_write_seq)
+        messages = [{"role": m["role"], "content": m["content"]} for m in messages]
+        return messages[-limit:] if limit else messages
 
     async def get_conversation_messages(
         self,
         conversation_id: str,
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        include_results: bool = True,
     ) -> List[Dict[str, Any]]:
-        """Get conversation message history."""
-        query = """
-            SELECT id, role, content, sql, result_json, error, metadata_json, feedback, timestamp
-            FROM conversation_messages
-            WHERE conversation_id = ?
-            ORDER BY id DESC
+        """Get conversation message history.
+
+        Args:
+            conversation_id: Conversation UUID
+            limit: Only the most recent N messages
+            include_results: Load and decompress result blobs (e.g. for archival);
+                pass False to return only result_hash and let clients fetch each
+                result with get_message_result when it is shown
         """
+        if include_results:
+            query = """
+                SELECT m.id, m.role, m.content, m.sql, m.result_hash, m.result_json, m.error,
+                       m.metadata_json, m.feedback, m.timestamp,
+                       b.codec AS result_codec, b.data AS result_data
+                FROM conversation_messages m
+                LEFT JOIN result_blobs b ON b.hash = m.result_hash
+                WHERE m.conversation_id = ?
+                ORDER BY m.id DESC
+            """
+        else:
+            # Legacy inline result_json rows have no blob to fetch later, so they stay inline
+            query = """
+                SELECT id, role, content, sql, result_hash, result_json, error, metadata_json,
+                       feedback, timestamp, NULL AS result_codec, NULL AS result_data
+                FROM conversation_messages
+                WHERE conversation_id = ?
+                ORDER BY id DESC
+            """
 
         if limit:
             query += f" LIMIT {limit}"
@@ -202,7 +801,12 @@ class HistoryManager:
 
         messages = []
         for row in reversed(rows):
-            result = json.loads(row["result_json"]) if row["result_json"] else None
+            if row["result_data"] is not None:
+                result = decode_result(row["result_codec"], row["result_data"])
+            elif row["result_json"]:
+                result = json.loads(row["result_json"])
+            else:
+                result = None
             metadata = json.loads(row["metadata_json"]) if row["metadata_json"] else None
 
             messages.append({
@@ -211,6 +815,7 @@ class HistoryManager:
                 "content": row["content"],
                 "sql": row["sql"],
                 "results": result,
+                "result_hash": row["result_hash"],
                 "error": row["error"],
                 "metadata": metadata,
                 "feedback": row["feedback"],
@@ -219,6 +824,49 @@ class HistoryManager:
 
         return messages
 
+    async def get_result_by_id(self, result_id: str) -> Optional[Any]:
+        """Load the full stored result of the message a results.db set came from.
+
+        Returns:
+            The result, or None if no message in history.db references result_id
+        """
+        row = await history_db.fetchone(
+            """
+            SELECT b.codec, b.data
+            FROM conversation_messages m
+            JOIN result_blobs b ON b.hash = m.result_hash
+            WHERE m.result_id = ?
+            LIMIT 1
+            """,
+            (result_id,),
+        )
+        if not row:
+            return None
+        return decode_result(row["codec"], row["data"])
+
+    async def get_message_result(self, conversation_id: str, message_id: int) -> Optional[Any]:
+        """Load and decompress the stored result of one message.
+
+        Returns:
+            The result, or None if the message does not exist or has no result
+        """
+        row = await history_db.fetchone(
+            """
+            SELECT m.result_json, b.codec, b.data
+            FROM conversation_messages m
+            LEFT JOIN result_blobs b ON b.hash = m.result_hash
+            WHERE m.id = ? AND m.conversation_id = ?
+            """,
+            (message_id, conversation_id),
+        )
+        if not row:
+            return None
+        if row["data"] is not None:
+            return decode_result(row["codec"], row["data"])
+        if row["result_json"]:
+            return json.loads(row["result_json"])
+        return None
+
     async def upsert_table_definition(
         self,
         table_name: str,
@@ -229,25 +877,74 @@ class HistoryManager:
         is_active: bool = True,
     ):
         """Create or update a table-level schema definition in history DB."""
-        columns_json = json.dumps(columns)
-        relationships_json = json.dumps(relationships or [])
-        tags_json = json.dumps(tags or [])
-
         await history_db.execute(
-            """
-            INSERT INTO schema_table_definitions
-                (table_name, columns_json, relationships_json, description, tags_json, is_active)
-            VALUES (?, ?, ?, ?, ?, ?)
-            ON CONFLICT(table_name) DO UPDATE SET
-                columns_json = excluded.columns_json,
-                relationships_json = excluded.relationships_json,
-                description = excluded.description,
-                tags_json = excluded.tags_json,
-                is_active = excluded.is_active,
-                updated_at = CURRENT_TIMESTAMP
-            """,
-            (table_name, columns_json, relationships_json, description, tags_json, int(is_active)),
+            UPSERT_TABLE_DEFINITION_SQL,
+            table_definition_params(table_name, columns, relationships, description, tags, is_active),
+        )
+
+    async def bulk_upsert_table_definitions(self, definitions: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Create or update many table definitions in one executemany transaction.
+
+        Args:
+            definitions: Dicts with the upsert_table_definition keyword arguments
+
+        Returns:
+            Dictionary with created/updated counts
+        """
+        existing = {
+            row["table_name"]
+            for row in await history_db.fetchall("SELECT table_name FROM schema_table_definitions")
+        }
+        await history_db.executemany(
+            UPSERT_TABLE_DEFINITION_SQL,
+            [
+                table_definition_params(
+                    d["table_name"],
+                    d["columns"],
+                    d.get("relationships"),
+                    d.get("description"),
+                    d.get("tags"),
+                    d.get("is_active", True),
+                )
+                for d in definitions
+            ],
         )
+        names = {d["table_name"] for d in definitions}
+        return {"created": len(names - existing), "updated": len(names & existing)}
+
+    async def iter_table_definitions(
+        self,
+        active_only: bool = False,
+        batch_size: int = 500,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield table definitions by name, reading one keyset page at a time."""
+        after = ""
+        while True:
+            query = """
+                SELECT table_name, columns_json, relationships_json, description, tags_json, is_active
+                FROM schema_table_definitions
+                WHERE table_name > ?
+            """
+            if active_only:
+                query += " AND is_active = 1"
+            query += " ORDER BY table_name ASC LIMIT ?"
+            rows = await history_db.fetchall(query, (after, batch_size))
+            for row in rows:
+                yield self._table_definition(row)
+            if len(rows) < batch_size:
+                return
+            after = rows[-1]["table_name"]
+
+    def _table_definition(self, row) -> Dict[str, Any]:
+        """Convert a schema_table_definitions row to its API dict."""
+        return {
+            "table_name": row["table_name"],
+            "columns": json.loads(row["columns_json"]) if row["columns_json"] else [],
+            "relationships": json.loads(row["relationships_json"]) if row["relationships_json"] else [],
+            "description": row["description"],
+            "tags": json.loads(row["tags_json"]) if row["tags_json"] else [],
+            "is_active": bool(row["is_active"]),
+        }
 
     async def get_table_definition(
         self,
@@ -265,14 +962,7 @@ class HistoryManager:
         if not row:
             return None
 
-        return {
-            "table_name": row["table_name"],
-            "columns": json.loads(row["columns_json"]) if row["columns_json"] else [],
-            "relationships": json.loads(row["relationships_json"]) if row["relationships_json"] else [],
-            "description": row["description"],
-            "tags": json.loads(row["tags_json"]) if row["tags_json"] else [],
-            "is_active": bool(row["is_active"]),
-        }
+        return self._table_definition(row)
 
     async def list_table_definitions(
         self,
@@ -290,17 +980,14 @@ class HistoryManager:
         query += " ORDER BY table_name ASC"
 
         rows = await history_db.fetchall(query, tuple(params))
-        return [
-            {
-                "table_name": r["table_name"],
-                "columns": json.loads(r["columns_json"]) if r["columns_json"] else [],
-                "relationships": json.loads(r["relationships_json"]) if r["relationships_json"] else [],
-                "description": r["description"],
-                "tags": json.loads(r["tags_json"]) if r["tags_json"] else [],
-                "is_active": bool(r["is_active"]),
-            }
-            for r in rows
-        ]
+        return [self._table_definition(r) for r in rows]
+
+    async def get_registry_version(self) -> Tuple[str, int]:
+        """Return the registry's (epoch, version); changes whenever the registry does."""
+        row = await history_db.fetchone(
+            "SELECT epoch, version FROM schema_registry_version WHERE id = 1"
+        )
+        return row["epoch"], row["version"]
 
     async def get_registry_business_context(self) -> Tuple[Dict[str, Any], bool]:
         """Load registry-level business_context JSON.
@@ -366,102 +1053,293 @@ class HistoryManager:
         conversation_id: str,
         sql: str,
         status: Optional[str],
-    ):
-        """Set like/dislike feedback on an assistant message.
+    ) -> Optional[int]:
+        """Set feedback on the most recent assistant message with this SQL.
 
-        Identifies the message by conversation_id + sql (most recent match).
+        Kept for clients that do not send message IDs; prefer set_feedback_by_message_id.
 
         Args:
             conversation_id: Conversation UUID
             sql: SQL query of the message to update
             status: 'like', 'dislike', or None to clear
+
+        Returns:
+            Message ID that was updated, or None if no message matched
         """
-        await history_db.execute(
+        row = await history_db.fetchone(
             """
-            UPDATE conversation_messages SET feedback = ?
-            WHERE id = (
-                SELECT id FROM conversation_messages
-                WHERE conversation_id = ? AND sql = ? AND role = 'assistant'
-                ORDER BY id DESC LIMIT 1
-            )
+            SELECT id FROM conversation_messages
+            WHERE conversation_id = ? AND sql = ? AND role = 'assistant'
+            ORDER BY id DESC LIMIT 1
             """,
-            (status, conversation_id, sql)
+            (conversation_id, sql)
         )
+        if not row:
+            return None
+        await self.set_feedback_by_message_id(row["id"], status, conversation_id=conversation_id)
+        return row["id"]
 
-    async def get_liked_messages(
+    async def set_feedback_by_message_id(
         self,
-        limit: int = 100,
-        exclude_conversation_id: Optional[str] = None,
-    ) -> List[Dict[str, Any]]:
-        """Get liked assistant messages for few-shot similarity search.
+        message_id: int,
+        status: Optional[str],
+        conversation_id: Optional[str] = None,
+    ) -> bool:
+        """Set like/dislike feedback on an assistant message and sync few_shot_examples.
 
-        JOINs with the preceding user message to get the original question.
+        A like stores the (question, SQL) pair as a few-shot example; any other
+        status removes it.
 
         Args:
-            limit: Maximum number of records to return
-            exclude_conversation_id: Exclude messages from this conversation
+            message_id: Assistant message ID
+            status: 'like', 'dislike', or None to clear
+            conversation_id: If given, the message must belong to this conversation
 
         Returns:
-            List of {question, sql, intent, timestamp}
+            False if no such assistant message exists
         """
-        base_query = """
-            SELECT a.sql, a.timestamp, u.content AS question
-            FROM conversation_messages a
-            JOIN conversation_messages u ON (
-                u.id = (
-                    SELECT MAX(id) FROM conversation_messages
-                    WHERE conversation_id = a.conversation_id
-                      AND role = 'user'
-                      AND id < a.id
-                )
+        query = """
+            SELECT id, conversation_id, sql, metadata_json FROM conversation_messages
+            WHERE id = ? AND role = 'assistant'
+        """
+        params: list[Any] = [message_id]
+        if conversation_id:
+            query += " AND conversation_id = ?"
+            params.append(conversation_id)
+
+        # Feedback, revision bump and few-shot example change commit together
+        async with history_db.transaction() as conn:
+            message = await (await conn.execute(query, tuple(params))).fetchone()
+            if not message:
+                return False
+
+            await conn.execute(
+                "UPDATE conversation_messages SET feedback = ? WHERE id = ?",
+                (status, message_id),
+            )
+            await conn.execute(
+                "UPDATE conversations SET revision = revision + 1 WHERE id = ?",
+                (message["conversation_id"],),
             )
-            WHERE a.feedback = 'like'
-              AND a.sql IS NOT NULL
-              AND a.role = 'assistant'
+
+            question_row = None
+            if status == "like" and message["sql"]:
+                question_row = await (await conn.execute(
+                    """
+                    SELECT content FROM conversation_messages
+                    WHERE conversation_id = ? AND role = 'user' AND id < ?
+                    ORDER BY id DESC LIMIT 1
+                    """,
+                    (message["conversation_id"], message_id),
+                )).fetchone()
+            if question_row:
+                metadata = json.loads(message["metadata_json"]) if message["metadata_json"] else {}
+                await conn.execute(
+                    UPSERT_FEW_SHOT_EXAMPLE_SQL,
+                    few_shot_example_params(
+                        message_id,
+                        message["conversation_id"],
+                        question_row["content"],
+                        message["sql"],
+                        metadata.get("intent"),
+                    ),
+                )
+            elif status != "like":
+                await conn.execute(
+                    "DELETE FROM few_shot_examples WHERE message_id = ?",
+                    (message_id,),
+                )
+        return True
+
+    async def get_few_shot_sync_state(self) -> Tuple[str, int, int]:
+        """Return (epoch, last change seq, newest pruned seq) of few_shot_examples.
+
+        A changed epoch means the table was rebuilt and indexes must reload, as
+        must readers whose last applied seq is older than the pruned seq;
+        otherwise changes after a previously seen seq can be applied incrementally.
+        """
+        row = await history_db.fetchone(
+            """
+            SELECT s.epoch, s.pruned_seq,
+                   COALESCE((SELECT MAX(seq) FROM few_shot_changes), s.pruned_seq) AS seq
+            FROM few_shot_sync_state s WHERE s.id = 1
+            """
+        )
+        return row["epoch"], row["seq"], row["pruned_seq"]
+
+    async def get_few_shot_changes(
+        self, after_seq: int
+    ) -> Optional[Tuple[List[Dict[str, Any]], List[int], int]]:
+        """Get few-shot examples changed since a change seq.
+
+        Args:
+            after_seq: Last seq already applied by the caller
+
+        Returns:
+            (upserted examples, deleted example ids, newest seq), or None if
+            changes after after_seq have been pruned (the caller must reload)
+        """
+        rows = await history_db.fetchall(
+            """
+            SELECT c.example_id, MAX(c.seq) AS seq,
+                   e.id, e.conversation_id, e.question, e.sql, e.intent, e.tables_json, e.created_at
+            FROM few_shot_changes c
+            LEFT JOIN few_shot_examples e ON e.id = c.example_id
+            WHERE c.seq > ?
+            GROUP BY c.example_id
+            """,
+            (after_seq,),
+        )
+        # Read after the changes: pruned_seq only grows, so this covers the rows above
+        state = await history_db.fetchone("SELECT pruned_seq FROM few_shot_sync_state WHERE id = 1")
+        if state["pruned_seq"] > after_seq:
+            return None
+        upserted = [self._few_shot_example(row) for row in rows if row["id"] is not None]
+        deleted = [row["example_id"] for row in rows if row["id"] is None]
+        last_seq = max((row["seq"] for row in rows), default=after_seq)
+        return upserted, deleted, last_seq
+
+    async def prune_few_shot_changes(self, retention_hours: float) -> int:
+        """Delete few_shot_changes entries older than the retention window.
+
+        Args:
+            retention_hours: Age after which entries are deleted
+
+        Returns:
+            Number of entries deleted
         """
+        async with history_db.transaction() as conn:
+            cursor = await conn.execute(
+                "SELECT MAX(seq) FROM few_shot_changes WHERE changed_at IS NULL OR changed_at < datetime('now', ?)",
+                (f"-{retention_hours} hours",),
+            )
+            (pruned_seq,) = await cursor.fetchone()
+            if pruned_seq is None:
+                return 0
+            cursor = await conn.execute("DELETE FROM few_shot_changes WHERE seq <= ?", (pruned_seq,))
+            await conn.execute(
+                "UPDATE few_shot_sync_state SET pruned_seq = MAX(pruned_seq, ?) WHERE id = 1", (pruned_seq,)
+            )
+            return cursor.rowcount
+
+    async def list_few_shot_examples(self) -> List[Dict[str, Any]]:
+        """Get every few-shot example, oldest first (for building in-memory indexes)."""
+        rows = await history_db.fetchall(
+            """
+            SELECT id, conversation_id, question, sql, intent, tables_json, created_at
+            FROM few_shot_examples ORDER BY id
+            """
+        )
+        return [self._few_shot_example(row) for row in rows]
+
+    def _few_shot_example(self, row) -> Dict[str, Any]:
+        """Convert a few_shot_examples row to the example dict used for prompting."""
+        return {
+            "id": row["id"],
+            "conversation_id": row["conversation_id"],
+            "question": row["question"],
+            "sql": row["sql"],
+            "intent": row["intent"],
+            "tables": json.loads(row["tables_json"]) if row["tables_json"] else [],
+            "timestamp": row["created_at"],
+        }
 
-        params = []
-        if exclude_conversation_id:
-            base_query += " AND a.conversation_id != ?"
-            params.append(exclude_conversation_id)
+    async def search_messages(self, text: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Full-text search over user questions and assistant SQL.
 
-        base_query += " ORDER BY a.id DESC LIMIT ?"
-        params.append(limit)
+        Args:
+            text: Search words (all must match; the last one as a prefix)
+            limit: Maximum number of hits
 
-        rows = await history_db.fetchall(base_query, tuple(params))
+        Returns:
+            Hits ranked by BM25 with {message_id, conversation_id, conversation_title,
+            role, snippet, score, timestamp}
+        """
+        match = build_fts_query(text)
+        if match is None:
+            return []
 
+        rows = await history_db.fetchall(
+            """
+            SELECT m.id, m.conversation_id, m.role, m.timestamp, c.title,
+                   snippet(messages_fts, -1, '<mark>', '</mark>', '…', 12) AS snippet,
+                   messages_fts.rank AS rank
+            FROM messages_fts
+            JOIN conversation_messages m ON m.id = messages_fts.rowid
+            JOIN conversations c ON c.id = m.conversation_id
+            WHERE messages_fts MATCH ?
+            ORDER BY messages_fts.rank
+            LIMIT ?
+            """,
+            (match, limit),
+        )
         return [
             {
-                "question": row["question"],
-                "sql": row["sql"],
-                "intent": None,
+                "message_id": row["id"],
+                "conversation_id": row["conversation_id"],
+                "conversation_title": row["title"] or DEFAULT_CONVERSATION_TITLE,
+                "role": row["role"],
+                "snippet": row["snippet"],
+                # bm25() is lower-is-better; expose higher-is-better
+                "score": round(-row["rank"], 6),
                 "timestamp": row["timestamp"],
             }
             for row in rows
         ]
 
-    async def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
-        """Get full conversation details."""
+    async def get_conversation_version(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Get what identifies a conversation's current content, without reading messages.
+
+        Returns:
+            {updated_at, last_message_id, revision}, or None if not in history.db
+        """
+        row = await history_db.fetchone(
+            """
+            SELECT c.updated_at, c.revision,
+                   (SELECT MAX(id) FROM conversation_messages WHERE conversation_id = c.id) AS last_message_id
+            FROM conversations c
+            WHERE c.id = ?
+            """,
+            (conversation_id,),
+        )
+        if not row:
+            return None
+        return {
+            "updated_at": row["updated_at"],
+            "last_message_id": row["last_message_id"] or 0,
+            "revision": row["revision"],
+        }
+
+    async def get_conversation_list_version(self) -> Dict[str, Any]:
+        """Get what identifies the conversation list's current content.
+
+        Reads the trigger-maintained counter row instead of scanning conversations.
+
+        Returns:
+            {epoch, version}
+        """
+        row = await history_db.fetchone(
+            "SELECT epoch, version FROM conversation_list_version WHERE id = 1"
+        )
+        return {"epoch": row["epoch"], "version": row["version"]}
+
+    async def get_conversation(
+        self, conversation_id: str, include_results: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """Get full conversation details (see get_conversation_messages for include_results)."""
         conv_row = await history_db.fetchone(
-            "SELECT id, created_at, updated_at, user_id FROM conversations WHERE id = ?",
+            "SELECT id, title, created_at, updated_at, user_id FROM conversations WHERE id = ?",
             (conversation_id,)
         )
 
         if not conv_row:
             return None
 
-        messages = await self.get_conversation_messages(conversation_id)
-
-        title = "New Conversation"
-        for message in messages:
-            if message["role"] == "user":
-                content = message["content"]
-                title = content[:50] + ("..." if len(content) > 50 else "")
-                break
+        messages = await self.get_conversation_messages(conversation_id, include_results=include_results)
 
         return {
             "id": conv_row["id"],
-            "title": title,
+            "title": conv_row["title"] or DEFAULT_CONVERSATION_TITLE,
             "created_at": conv_row["created_at"],
             "updated_at": conv_row["updated_at"],
             "user_id": conv_row["user_id"],
@@ -470,42 +1348,54 @@ class HistoryManager:
         }
 
     async def get_all_conversations(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get all conversations with summary info."""
-        rows = await history_db.fetchall(
-            """
-            SELECT id, created_at, updated_at, user_id
-            FROM conversations
-            ORDER BY updated_at DESC
-            LIMIT ?
-            """,
-            (limit,)
-        )
+        """Get the most recently updated conversations with summary info."""
+        conversations, _ = await self.get_conversations_page(limit=limit)
+        return conversations
 
-        conversations = []
-        for row in rows:
-            first_message = await history_db.fetchone(
-                """
-                SELECT content FROM conversation_messages
-                WHERE conversation_id = ? AND role = 'user'
-                ORDER BY timestamp ASC
-                LIMIT 1
-                """,
-                (row["id"],)
-            )
+    async def get_conversations_page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of conversations, most recently updated first.
 
-            title = "New Conversation"
-            if first_message:
-                content = first_message["content"]
-                title = content[:50] + ("..." if len(content) > 50 else "")
+        Uses keyset pagination on (updated_at, id), served by
+        idx_conversations_updated, so deep pages cost the same as the first.
 
-            conversations.append({
+        Args:
+            limit: Page size
+            cursor: next_cursor returned by the previous page
+
+        Returns:
+            (conversations, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query = "SELECT id, title, created_at, updated_at FROM conversations"
+        params: list[Any] = []
+        if cursor:
+            query += " WHERE (updated_at, id) < (?, ?)"
+            params.extend(decode_conversation_cursor(cursor))
+        query += " ORDER BY updated_at DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        rows = await history_db.fetchall(query, tuple(params))
+        page = rows[:limit]
+        conversations = [
+            {
                 "id": row["id"],
                 "created_at": row["created_at"],
                 "updated_at": row["updated_at"],
-                "title": title
-            })
+                "title": row["title"] or DEFAULT_CONVERSATION_TITLE,
+            }
+            for row in page
+        ]
 
-        return conversations
+        next_cursor = None
+        if len(rows) > limit and page:
+            next_cursor = encode_conversation_cursor(page[-1]["updated_at"], page[-1]["id"])
+        return conversations, next_cursor
 
     async def save_query(
         self,
@@ -513,18 +1403,49 @@ class HistoryManager:
         question: str,
         generated_sql: str,
         intent: Optional[str] = None,
-        execution_result: Optional[str] = None,
+        execution_result: Optional[Any] = None,
         success: bool = True
     ):
-        """Save a query to query history."""
+        """Save a query to query history.
+
+        The execution result (dict or JSON string) is stored in result_blobs, so a
+        result shared with the assistant message is only written once.
+        """
+        result_hash = (
+            await self.put_result_blob(execution_result)
+            if execution_result is not None
+            else None
+        )
         await history_db.execute(
             """
             INSERT INTO query_history
-            (conversation_id, question, intent, generated_sql, execution_result, success)
+            (conversation_id, question, intent, generated_sql, result_hash, success)
             VALUES (?, ?, ?, ?, ?, ?)
             """,
-            (conversation_id, question, intent, generated_sql, execution_result, success)
+            (conversation_id, question, intent, generated_sql, result_hash, success)
+        )
+
+    async def get_executed_sql_counts(self, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Get distinct successfully executed SQL with execution counts.
+
+        Args:
+            limit: Maximum number of distinct statements (most frequent first)
+
+        Returns:
+            List of {sql, count}
+        """
+        rows = await history_db.fetchall(
+            """
+            SELECT generated_sql, COUNT(*) AS n
+            FROM query_history
+            WHERE success = 1
+            GROUP BY generated_sql
+            ORDER BY n DESC, MAX(id) DESC
+            LIMIT ?
+            """,
+            (limit,),
         )
+        return [{"sql": row["generated_sql"], "count": row["n"]} for row in rows]
 
     async def set_conversation_schema(self, conversation_id: str, schema: Dict[str, Any]):
         """Persist custom schema JSON for a conversation."""
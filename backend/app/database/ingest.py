@@ -0,0 +1,370 @@
+"""Bulk ingestion of CSV / JSONL / Parquet extracts into the target database.
+
+Usage:
+    python -m app.database.ingest data/hr_extract.csv
+    python -m app.database.ingest extract.jsonl --mode upsert --key emp_no
+    python -m app.database.ingest extract.parquet --table v_staff_hr_format --truncate
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional
+from ..config import settings
+from .summaries import SUMMARY_COUNT_COLUMN, populate_sql
+
+DEFAULT_TABLE = "v_staff_hr_format"
+DEFAULT_KEY = "emp_no"
+
+# PRAGMAs applied to the ingestion connection only
+INGEST_PRAGMAS = {
+    "synchronous": "OFF",
+    "cache_size": "-262144",  # 256 MB
+    "temp_store": "MEMORY",
+}
+
+SUPPORTED_FORMATS = ("csv", "jsonl", "parquet")
+
+
+def detect_format(path: str) -> str:
+    """Infer input format from the file extension.
+
+    Raises:
+        ValueError: If the extension is not supported
+    """
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext == "ndjson":
+        ext = "jsonl"
+    if ext not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported input format '{ext}', expected one of {SUPPORTED_FORMATS}")
+    return ext
+
+
+def read_records(path: str, fmt: str) -> Iterator[Dict[str, Any]]:
+    """Stream records from an input file without loading it into memory.
+
+    Args:
+        path: Input file path
+        fmt: 'csv', 'jsonl' or 'parquet'
+
+    Yields:
+        One dict per source row
+    """
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                # Empty CSV cells mean NULL (matches the HR extract convention)
+                yield {k: (v if v != "" else None) for k, v in row.items()}
+    elif fmt == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif fmt == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet ingestion requires the 'pyarrow' package (pip install pyarrow)") from e
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=65536):
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Unsupported input format '{fmt}'")
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    """Return column names of a target table.
+
+    Raises:
+        ValueError: If the table does not exist
+    """
+    columns = [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+    if not columns:
+        raise ValueError(f"Table '{table}' does not exist in {settings.target_db_path}")
+    return columns
+
+
+def _secondary_indexes(conn: sqlite3.Connection, table: str, keep: Optional[str]) -> List[tuple]:
+    """Return (name, sql) of droppable indexes on a table, except the upsert key index."""
+    rows = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,),
+    ).fetchall()
+    return [(name, sql) for name, sql in rows if name != keep]
+
+
+def _restore_indexes(conn: sqlite3.Connection, indexes: List[tuple]):
+    """Recreate dropped indexes that do not exist (anymore)."""
+    for name, sql in indexes:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?",
+            (name,),
+        ).fetchone()
+        if not exists:
+            conn.execute(sql)
+
+
+def _summary_triggers(conn: sqlite3.Connection, table: str) -> List[tuple]:
+    """Return (name, sql) of the summary-table triggers on a table (see summaries.py)."""
+    return conn.execute(
+        "SELECT name, sql FROM sqlite_master "
+        "WHERE type = 'trigger' AND tbl_name = ? AND name LIKE 'trg\\_agg\\_%' ESCAPE '\\'",
+        (table,),
+    ).fetchall()
+
+
+def _restore_summaries(conn: sqlite3.Connection, triggers: List[tuple]) -> List[str]:
+    """Recompute summaries whose triggers were dropped and recreate the missing triggers.
+
+    One GROUP BY per summary replaces the per-row trigger work of the load.
+
+    Returns:
+        Names of the recomputed summary tables
+    """
+    tables = sorted({name[len("trg_"):].rsplit("_", 1)[0] for name, _ in triggers})
+    for table in tables:
+        columns = [
+            row[1] for row in conn.execute(f'PRAGMA table_info("{table}")') if row[1] != SUMMARY_COUNT_COLUMN
+        ]
+        for sql in populate_sql(table, columns):
+            conn.execute(sql)
+    for name, sql in triggers:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+            (name,),
+        ).fetchone()
+        if not exists:
+            conn.execute(sql)
+    return tables
+
+
+def _key_mismatch(number: int, expected, found) -> str:
+    """Error message for a record whose keys differ from the first record's."""
+    details = []
+    extra = sorted(set(found) - set(expected), key=str)
+    missing = sorted(set(expected) - set(found), key=str)
+    if extra:
+        details.append(f"unexpected {', '.join(map(str, extra))}")
+    if missing:
+        details.append(f"missing {', '.join(map(str, missing))}")
+    return (
+        f"Record {number} has different keys than the first record ({'; '.join(details)}); "
+        "every record must have the same keys"
+    )
+
+
+def _build_insert_sql(table: str, columns: List[str], mode: str, key: str, table_columns: List[str]) -> str:
+    """Build the INSERT statement for the chosen load mode."""
+    cols = ", ".join(f'"{c}"' for c in columns)
+    placeholders = ", ".join("?" for _ in columns)
+    verb = "INSERT OR REPLACE" if mode == "replace" else "INSERT"
+    sql = f'{verb} INTO "{table}" ({cols}) VALUES ({placeholders})'
+
+    if mode == "upsert":
+        updates = [f'"{c}" = excluded."{c}"' for c in columns if c != key]
+        if "updated_at" in table_columns and "updated_at" not in columns:
+            updates.append('"updated_at" = CURRENT_TIMESTAMP')
+        if updates:
+            sql += f' ON CONFLICT("{key}") DO UPDATE SET {", ".join(updates)}'
+        else:
+            sql += f' ON CONFLICT("{key}") DO NOTHING'
+    return sql
+
+
+def ingest_file(
+    path: str,
+    table: str = DEFAULT_TABLE,
+    fmt: Optional[str] = None,
+    mode: str = "insert",
+    key: str = DEFAULT_KEY,
+    truncate: bool = False,
+    chunk_size: int = 10000,
+    commit_rows: int = 500000,
+    db_path: Optional[str] = None,
+    journal_mode: str = "WAL",
+    rebuild_indexes: bool = True,
+) -> Dict[str, Any]:
+    """Load a file into a target table using chunked executemany.
+
+    Args:
+        path: Input file (CSV, JSONL or Parquet)
+        table: Target table name
+        fmt: Input format (default: inferred from extension)
+        mode: 'insert', 'replace' (INSERT OR REPLACE) or 'upsert' (ON CONFLICT(key) DO UPDATE)
+        key: Upsert key column (a unique index is created if missing)
+        truncate: Delete existing rows before loading
+        chunk_size: Rows per executemany call
+        commit_rows: Rows per transaction
+        db_path: Target database path (default from config)
+        journal_mode: journal_mode to set before loading
+        rebuild_indexes: Drop secondary indexes before loading and recreate them after
+
+    Summary-table triggers on the table are always dropped for the load; the
+    summaries are recomputed and the triggers restored in the last transaction.
+    Until then, summaries reflect the table as it was before the load.
+
+    Columns are taken from the first record, and every record must have the
+    same keys: a key first seen later would otherwise be dropped silently, and
+    a missing one would load as NULL (or overwrite the stored value on upsert).
+
+    Returns:
+        Stats dictionary with rows, skipped columns, refreshed summaries, elapsed seconds and rows_per_sec
+
+    Raises:
+        ValueError: On unknown table/mode/format, when no input column matches the table,
+            or on a record whose keys differ from the first record's (batches
+            committed before it are kept)
+    """
+    if mode not in ("insert", "replace", "upsert"):
+        raise ValueError(f"Unsupported mode '{mode}'")
+    fmt = fmt or detect_format(path)
+    db_path = db_path or settings.target_db_path
+
+    started = time.perf_counter()
+    dropped: List[tuple] = []
+    triggers: List[tuple] = []
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+        for pragma, value in INGEST_PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+
+        table_columns = _table_columns(conn, table)
+        key_index = None
+        if mode == "upsert":
+            if key not in table_columns:
+                raise ValueError(f"Upsert key '{key}' is not a column of '{table}'")
+            key_index = f"ux_{table}_{key}"
+            conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "{key_index}" ON "{table}" ("{key}")')
+
+        records = read_records(path, fmt)
+        first = next(records, None)
+        if first is None:
+            return {
+                "table": table,
+                "rows": 0,
+                "skipped_columns": [],
+                "rebuilt_indexes": [],
+                "refreshed_summaries": [],
+                "elapsed_seconds": 0.0,
+                "rows_per_sec": 0.0,
+            }
+
+        columns = [c for c in first.keys() if c in table_columns]
+        skipped = [c for c in first.keys() if c not in table_columns]
+        if not columns:
+            raise ValueError(f"No input columns match table '{table}'")
+        if mode == "upsert" and key not in columns:
+            raise ValueError(f"Upsert key '{key}' is missing from the input")
+
+        insert_sql = _build_insert_sql(table, columns, mode, key, table_columns)
+
+        if rebuild_indexes:
+            dropped = _secondary_indexes(conn, table, keep=key_index)
+        triggers = _summary_triggers(conn, table)
+        conn.execute("BEGIN")
+        for name, _ in dropped:
+            conn.execute(f'DROP INDEX "{name}"')
+        for name, _ in triggers:
+            conn.execute(f'DROP TRIGGER "{name}"')
+        if truncate:
+            conn.execute(f'DELETE FROM "{table}"')
+
+        keys = first.keys()
+
+        def rows_iter():
+            yield tuple(first[c] for c in columns)
+            for number, record in enumerate(records, start=2):
+                if record.keys() != keys:
+                    raise ValueError(_key_mismatch(number, keys, record.keys()))
+                yield tuple(record[c] for c in columns)
+
+        total = 0
+        in_txn = 0
+        rows = rows_iter()
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            conn.executemany(insert_sql, chunk)
+            total += len(chunk)
+            in_txn += len(chunk)
+            if in_txn >= commit_rows:
+                conn.execute("COMMIT")
+                conn.execute("BEGIN")
+                in_txn = 0
+
+        _restore_indexes(conn, dropped)
+        refreshed = _restore_summaries(conn, triggers)
+        conn.execute("COMMIT")
+        conn.execute(f'ANALYZE "{table}"')
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        # Earlier batches may already be committed; never leave the table without its indexes
+        # or the summaries without their triggers
+        _restore_indexes(conn, dropped)
+        if triggers:
+            conn.execute("BEGIN")
+            _restore_summaries(conn, triggers)
+            conn.execute("COMMIT")
+        raise
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "table": table,
+        "rows": total,
+        "skipped_columns": skipped,
+        "rebuilt_indexes": [name for name, _ in dropped],
+        "refreshed_summaries": refreshed,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_sec": round(total / elapsed, 1) if elapsed > 0 else float(total),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Bulk load CSV/JSONL/Parquet into target.db")
+    parser.add_argument("path", help="Input file")
+    parser.add_argument("--table", default=DEFAULT_TABLE, help=f"Target table (default: {DEFAULT_TABLE})")
+    parser.add_argument("--format", dest="fmt", choices=SUPPORTED_FORMATS, help="Input format (default: by extension)")
+    parser.add_argument("--mode", choices=("insert", "replace", "upsert"), default="insert")
+    parser.add_argument("--key", default=DEFAULT_KEY, help=f"Upsert key column (default: {DEFAULT_KEY})")
+    parser.add_argument("--truncate", action="store_true", help="Delete existing rows first")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Rows per executemany")
+    parser.add_argument("--commit-rows", type=int, default=500000, help="Rows per transaction")
+    parser.add_argument("--db", dest="db_path", help="Target database (default from config)")
+    parser.add_argument("--journal-mode", default="WAL", help="journal_mode during load")
+    parser.add_argument("--keep-indexes", action="store_true", help="Do not drop/rebuild secondary indexes")
+    args = parser.parse_args(argv)
+
+    print(f"Ingesting {args.path} into {args.table}...")
+    stats = ingest_file(
+        path=args.path,
+        table=args.table,
+        fmt=args.fmt,
+        mode=args.mode,
+        key=args.key,
+        truncate=args.truncate,
+        chunk_size=args.chunk_size,
+        commit_rows=args.commit_rows,
+        db_path=args.db_path,
+        journal_mode=args.journal_mode,
+        rebuild_indexes=not args.keep_indexes,
+    )
+    if stats["skipped_columns"]:
+        print(f"  Skipped unknown columns: {', '.join(stats['skipped_columns'])}")
+    if stats["refreshed_summaries"]:
+        print(f"  Recomputed summaries: {', '.join(stats['refreshed_summaries'])}")
+    print(
+        f"✓ Loaded {stats['rows']} rows into {stats['table']} in {stats['elapsed_seconds']}s "
+        f"({stats['rows_per_sec']:,.0f} rows/sec)"
+    )
+
+
+if __name__ == "__main__":
+    main()
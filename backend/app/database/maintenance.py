@@ -0,0 +1,58 @@
+"""Background SQLite maintenance (PRAGMA optimize)."""
+import asyncio
+from typing import List, Optional
+from .connection import DatabaseManager, history_db, target_db, results_db
+from ..config import settings
+
+
+class DatabaseMaintenance:
+    """Periodically runs PRAGMA optimize on the application databases.
+
+    PRAGMA optimize only re-ANALYZEs tables whose statistics look stale, so it
+    is cheap enough to run on a timer while the API is serving requests.
+    """
+
+    def __init__(self, databases: List[DatabaseManager]):
+        """Initialize maintenance runner.
+
+        Args:
+            databases: Database managers to optimize
+        """
+        self.databases = databases
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self):
+        """Optimize every database once; failures are logged, not raised."""
+        for db in self.databases:
+            try:
+                await db.optimize()
+            except Exception as e:
+                print(f"⚠ PRAGMA optimize failed for {db.db_path}: {e}")
+
+    def start(self):
+        """Start the background loop (no-op when the interval is 0)."""
+        if settings.db_optimize_interval_minutes <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Cancel the background loop and run a final optimize before shutdown."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.run_once()
+
+    async def _loop(self):
+        """Sleep/optimize loop."""
+        interval = settings.db_optimize_interval_minutes * 60
+        while True:
+            await asyncio.sleep(interval)
+            await self.run_once()
+
+
+# Global maintenance instance
+db_maintenance = DatabaseMaintenance([history_db, target_db, results_db])
@@ -0,0 +1,81 @@
+"""Encoding of execution results into compressed, content-addressed blobs."""
+import hashlib
+import json
+import zlib
+from typing import Any, Optional, Tuple
+from ..config import settings
+
+SUPPORTED_CODECS = ("zlib", "zstd")
+
+
+def canonical_result_json(result: Any) -> str:
+    """Serialize a result compactly so equal results hash equally.
+
+    Key order is preserved (row dicts carry column order for the UI).
+
+    Args:
+        result: Result dict, or an already serialized JSON string
+
+    Returns:
+        Compact JSON
+    """
+    if isinstance(result, str):
+        result = json.loads(result)
+    return json.dumps(result, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def encode_result(result: Any, codec: Optional[str] = None) -> Tuple[str, str, int, bytes]:
+    """Compress a result for storage in result_blobs.
+
+    Args:
+        result: Result dict or JSON string
+        codec: 'zlib' or 'zstd' (default from config)
+
+    Returns:
+        Tuple of (sha256 hex of the canonical JSON, codec, raw size, compressed bytes)
+
+    Raises:
+        ValueError: If the codec is unsupported
+        ImportError: If 'zstd' is requested without the zstandard package
+    """
+    codec = (codec or settings.result_blob_codec).lower()
+    raw = canonical_result_json(result).encode("utf-8")
+    digest = hashlib.sha256(raw).hexdigest()
+
+    if codec == "zlib":
+        data = zlib.compress(raw, settings.result_blob_level)
+    elif codec == "zstd":
+        data = _zstd().ZstdCompressor(level=settings.result_blob_level).compress(raw)
+    else:
+        raise ValueError(f"Unsupported result blob codec: {codec}")
+    return digest, codec, len(raw), data
+
+
+def decode_result(codec: str, data: bytes) -> Any:
+    """Decompress and parse a stored result blob.
+
+    Args:
+        codec: Codec recorded with the blob
+        data: Compressed bytes
+
+    Returns:
+        Parsed result
+    """
+    if codec == "zlib":
+        raw = zlib.decompress(data)
+    elif codec == "zstd":
+        raw = _zstd().ZstdDecompressor().decompress(data)
+    else:
+        raise ValueError(f"Unsupported result blob codec: {codec}")
+    return json.loads(raw)
+
+
+def _zstd():
+    """Import zstandard lazily (optional dependency)."""
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "RESULT_BLOB_CODEC=zstd requires the 'zstandard' package (pip install zstandard)"
+        ) from e
+    return zstandard
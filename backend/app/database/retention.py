@@ -0,0 +1,326 @@
+"""History retention: archival of old conversations and incremental vacuum.
+
+Conversations idle for longer than the retention period (or the oldest ones,
+while history.db exceeds its size budget) are moved into compressed monthly
+SQLite archives under the archive directory. history.db keeps a small
+archived_conversations index row per conversation so the full transcript can
+still be fetched on demand. Freed pages are returned to the filesystem with
+PRAGMA incremental_vacuum, so the hot file stays small enough to stay cached.
+The same pass prunes the few_shot_changes log (see FewShotIndex.sync).
+"""
+import asyncio
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from .connection import DatabaseManager, history_db
+from .context_cache import context_cache
+from .history import history_manager
+from .result_blobs import decode_result, encode_result
+from ..config import settings
+
+# Conversations archived per size-policy round before re-measuring the file
+SIZE_POLICY_BATCH = 50
+# Conversations loaded and archived per age-policy round (bounds memory on a large backlog)
+AGE_POLICY_BATCH = 200
+
+
+class RetentionManager:
+    """Applies age/size retention policies to history.db."""
+
+    def __init__(self, archive_dir: str):
+        """Initialize retention manager.
+
+        Args:
+            archive_dir: Directory holding history-YYYY-MM.db archives
+        """
+        self.archive_dir = Path(archive_dir)
+        self._task: Optional[asyncio.Task] = None
+
+    async def init(self):
+        """Switch history.db to incremental auto-vacuum (one-time VACUUM if needed)."""
+        if await history_db.enable_incremental_vacuum():
+            print("✓ history.db switched to auto_vacuum=INCREMENTAL")
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Apply retention policies, collect unreferenced blobs, prune the few-shot change log and vacuum.
+
+        Returns:
+            Dictionary with archived/deleted/pruned/vacuumed counts and the file size
+        """
+        archived = 0
+        if settings.history_retention_days > 0:
+            while True:
+                rows = await history_db.fetchall(
+                    """
+                    SELECT id FROM conversations WHERE updated_at < datetime('now', ?)
+                    ORDER BY updated_at, id LIMIT ?
+                    """,
+                    (f"-{settings.history_retention_days} days", AGE_POLICY_BATCH),
+                )
+                batch_archived = await self.archive_conversations([row["id"] for row in rows])
+                archived += batch_archived
+                # Stop on the last batch, or if nothing could be archived (would repeat forever)
+                if len(rows) < AGE_POLICY_BATCH or batch_archived == 0:
+                    break
+
+        deleted_blobs = await self.collect_garbage()
+        pruned_changes = await history_manager.prune_few_shot_changes(settings.few_shot_change_retention_hours)
+
+        if settings.history_max_size_mb > 0:
+            budget = settings.history_max_size_mb * 1024 * 1024
+            while (await self.size_stats())["used_bytes"] > budget:
+                rows = await history_db.fetchall(
+                    "SELECT id FROM conversations ORDER BY updated_at, id LIMIT ?",
+                    (SIZE_POLICY_BATCH,),
+                )
+                if not rows:
+                    break
+                archived += await self.archive_conversations([row["id"] for row in rows])
+                deleted_blobs += await self.collect_garbage()
+
+        vacuumed_pages = await history_db.incremental_vacuum(settings.history_vacuum_pages)
+        stats = await self.size_stats()
+        return {
+            "archived_conversations": archived,
+            "deleted_blobs": deleted_blobs,
+            "pruned_few_shot_changes": pruned_changes,
+            "vacuumed_pages": vacuumed_pages,
+            "size_bytes": stats["size_bytes"],
+            "freelist_pages": stats["freelist_pages"],
+        }
+
+    async def archive_conversations(self, conversation_ids: List[str]) -> int:
+        """Move conversations into their monthly archive and drop them from history.db.
+
+        Liked few-shot examples are self-contained and stay in history.db.
+
+        Args:
+            conversation_ids: Conversations to archive
+
+        Returns:
+            Number of conversations archived
+        """
+        by_month: Dict[str, List[Dict[str, Any]]] = {}
+        for conversation_id in conversation_ids:
+            conversation = await history_manager.get_conversation(conversation_id)
+            if conversation is None:
+                continue
+            conversation["queries"] = [
+                dict(row)
+                for row in await history_db.fetchall(
+                    """
+                    SELECT id, question, intent, generated_sql, success, timestamp
+                    FROM query_history WHERE conversation_id = ? ORDER BY id
+                    """,
+                    (conversation_id,),
+                )
+            ]
+            by_month.setdefault(str(conversation["updated_at"])[:7], []).append(conversation)
+
+        archived = 0
+        for month, conversations in by_month.items():
+            archive_file = f"history-{month}.db"
+            await self._write_archive(archive_file, conversations)
+            for conversation in conversations:
+                if await self._drop_from_history(conversation, archive_file):
+                    archived += 1
+        return archived
+
+    async def get_archived_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Load an archived conversation in the same shape as get_conversation.
+
+        Args:
+            conversation_id: Conversation UUID
+
+        Returns:
+            Conversation dict with archived=True, or None if it was never archived
+        """
+        entry = await history_db.fetchone(
+            "SELECT archive_file FROM archived_conversations WHERE id = ?",
+            (conversation_id,),
+        )
+        if not entry:
+            return None
+        path = self.archive_dir / entry["archive_file"]
+        if not path.exists():
+            return None
+
+        archive = DatabaseManager(str(path))
+        try:
+            row = await archive.fetchone(
+                "SELECT codec, data FROM archived_conversations WHERE id = ?",
+                (conversation_id,),
+            )
+        finally:
+            await archive.close()
+        if not row:
+            return None
+
+        conversation = decode_result(row["codec"], row["data"])
+        conversation.pop("queries", None)
+        conversation["archived"] = True
+        for message in conversation.get("messages", []):
+            if isinstance(message.get("results"), dict):
+                # Archives hold every row inline; the results.db set may be gone
+                message["results"] = {**message["results"], "result_id": None, "has_more": False}
+        return conversation
+
+    async def collect_garbage(self) -> int:
+        """Delete result blobs no message or query references any more.
+
+        Blobs touched within the last hour are kept, since a message referencing
+        them may not be committed yet.
+
+        Returns:
+            Number of blobs deleted
+        """
+        cursor = await history_db.execute(
+            """
+            DELETE FROM result_blobs
+            WHERE created_at < datetime('now', '-1 hour')
+              AND NOT EXISTS (SELECT 1 FROM conversation_messages m WHERE m.result_hash = result_blobs.hash)
+              AND NOT EXISTS (SELECT 1 FROM query_history q WHERE q.result_hash = result_blobs.hash)
+            """
+        )
+        return cursor.rowcount
+
+    async def size_stats(self) -> Dict[str, int]:
+        """Return history.db size, live bytes and freelist pages."""
+        page_count = (await history_db.fetchone("PRAGMA page_count"))[0]
+        page_size = (await history_db.fetchone("PRAGMA page_size"))[0]
+        freelist = (await history_db.fetchone("PRAGMA freelist_count"))[0]
+        return {
+            "size_bytes": page_count * page_size,
+            "used_bytes": (page_count - freelist) * page_size,
+            "freelist_pages": freelist,
+        }
+
+    def start(self):
+        """Start the background loop (no-op when the interval is 0)."""
+        if settings.history_retention_interval_minutes <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Cancel the background loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        """Sleep/retain loop; failures are logged, not raised."""
+        interval = settings.history_retention_interval_minutes * 60
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                result = await self.run_once()
+                if result["archived_conversations"] or result["vacuumed_pages"]:
+                    print(f"✓ History retention: {result}")
+            except Exception as e:
+                print(f"⚠ History retention failed: {e}")
+
+    async def _write_archive(self, archive_file: str, conversations: List[Dict[str, Any]]):
+        """Insert (or replace) compressed conversations into a monthly archive."""
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        archive = DatabaseManager(str(self.archive_dir / archive_file))
+        try:
+            await archive.execute(
+                """
+                CREATE TABLE IF NOT EXISTS archived_conversations (
+                    id TEXT PRIMARY KEY,
+                    title TEXT,
+                    created_at TIMESTAMP,
+                    updated_at TIMESTAMP,
+                    codec TEXT NOT NULL,
+                    raw_size INTEGER NOT NULL,
+                    data BLOB NOT NULL
+                )
+                """
+            )
+            rows = []
+            for conversation in conversations:
+                _, codec, raw_size, data = encode_result(json.loads(json.dumps(conversation, default=str)))
+                rows.append((
+                    conversation["id"],
+                    conversation["title"],
+                    conversation["created_at"],
+                    conversation["updated_at"],
+                    codec,
+                    raw_size,
+                    data,
+                ))
+            await archive.executemany(
+                """
+                INSERT OR REPLACE INTO archived_conversations
+                    (id, title, created_at, updated_at, codec, raw_size, data)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+        finally:
+            await archive.close()
+
+    async def _drop_from_history(self, conversation: Dict[str, Any], archive_file: str) -> bool:
+        """Record the archive location and delete the conversation's hot rows atomically.
+
+        Only rows covered by the archived snapshot are deleted. A conversation
+        that changed since the snapshot is skipped (it is no longer idle, or
+        will be archived again on the next run).
+
+        Returns:
+            True if the conversation was dropped from history.db
+        """
+        conversation_id = conversation["id"]
+        last_message_id = max((m["id"] for m in conversation["messages"]), default=0)
+        last_query_id = max((q["id"] for q in conversation["queries"]), default=0)
+        async with history_db.transaction() as conn:
+            cursor = await conn.execute(
+                """
+                SELECT updated_at,
+                       EXISTS (SELECT 1 FROM conversation_messages
+                               WHERE conversation_id = ? AND id > ?) AS has_new_messages
+                FROM conversations WHERE id = ?
+                """,
+                (conversation_id, last_message_id, conversation_id),
+            )
+            current = await cursor.fetchone()
+            if (
+                current is None
+                or current["updated_at"] != conversation["updated_at"]
+                or current["has_new_messages"]
+            ):
+                return False
+            await conn.execute(
+                """
+                INSERT OR REPLACE INTO archived_conversations
+                    (id, title, created_at, updated_at, message_count, archive_file)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    conversation_id,
+                    conversation["title"],
+                    conversation["created_at"],
+                    conversation["updated_at"],
+                    len(conversation["messages"]),
+                    archive_file,
+                ),
+            )
+            await conn.execute(
+                "DELETE FROM conversation_messages WHERE conversation_id = ? AND id <= ?",
+                (conversation_id, last_message_id),
+            )
+            await conn.execute(
+                "DELETE FROM query_history WHERE conversation_id = ? AND id <= ?",
+                (conversation_id, last_query_id),
+            )
+            await conn.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+        context_cache.invalidate(conversation_id)
+        return True
+
+
+# Global retention manager instance
+retention_manager = RetentionManager(settings.history_archive_dir)
@@ -0,0 +1,183 @@
+"""Materialized aggregate (summary) tables in the target database.
+
+Each summary keeps one row per distinct (dimension, termination_date) pair of the
+staff table with the number of staff rows in it. Keeping termination_date in the
+key lets active/resigned predicates relative to the current date run unchanged
+against the summary. Triggers on the staff table maintain the counts on every
+INSERT / UPDATE / DELETE. Bulk ingestion (ingest.py) drops the triggers for the
+load and recomputes the summaries with one GROUP BY before restoring them.
+Summaries need a real table: if the staff "table" is a view they are skipped.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import aiosqlite
+from .connection import target_db
+
+SUMMARY_SOURCE_TABLE = "v_staff_hr_format"
+SUMMARY_STATUS_COLUMN = "termination_date"
+SUMMARY_DIMENSIONS = ["division", "cost_centre_short", "job_level"]
+
+# Row count column in every summary table
+SUMMARY_COUNT_COLUMN = "agg_rows"
+
+
+def populate_sql(table: str, columns: List[str]) -> List[str]:
+    """Statements replacing a summary's content with a fresh GROUP BY of the staff table."""
+    key = ", ".join(f'"{c}"' for c in columns)
+    return [
+        f'DELETE FROM "{table}"',
+        f'INSERT INTO "{table}" ({key}, "{SUMMARY_COUNT_COLUMN}") '
+        f'SELECT {key}, COUNT(*) FROM "{SUMMARY_SOURCE_TABLE}" GROUP BY {key}',
+    ]
+
+
+class SummaryManager:
+    """Creates, rebuilds and describes summary tables."""
+
+    def __init__(self):
+        self.summaries: List[Dict[str, Any]] = []  # Ready summaries: {table, columns}
+        self.source_columns: set[str] = set()
+
+    def definitions(self) -> List[Dict[str, Any]]:
+        """Return the configured summary tables (whether or not they exist yet)."""
+        return [
+            {
+                "table": f"agg_{SUMMARY_SOURCE_TABLE}_by_{dimension}",
+                "columns": [dimension, SUMMARY_STATUS_COLUMN],
+            }
+            for dimension in SUMMARY_DIMENSIONS
+        ]
+
+    async def ensure(self) -> List[str]:
+        """Create and populate missing summary tables and their triggers.
+
+        Each summary is created, populated and given its triggers in one
+        transaction, so a failure never leaves a half-built summary behind and
+        no staff row written meanwhile is missed. A summary whose triggers are
+        missing (e.g. an interrupted ingest) is recomputed.
+
+        Returns:
+            Names of summary tables created by this call
+        """
+        column_types = await self._source_column_types()
+        self.source_columns = set(column_types)
+        self.summaries = []
+        if not column_types:
+            return []
+        source_type = await self._object_type(SUMMARY_SOURCE_TABLE)
+        if source_type != "table":
+            print(f"⚠ Summary tables disabled: {SUMMARY_SOURCE_TABLE} is a {source_type}, not a table")
+            return []
+
+        created = []
+        ready = []
+        for summary in self.definitions():
+            if not all(c in column_types for c in summary["columns"]):
+                continue
+            async with target_db.transaction() as conn:
+                exists = await self._object_type(summary["table"], conn) == "table"
+                missing = [
+                    sql for name, sql in self._trigger_sql(summary)
+                    if await self._object_type(name, conn) is None
+                ]
+                if not exists:
+                    await self._create(conn, summary, column_types)
+                    created.append(summary["table"])
+                if missing:
+                    await self._populate(conn, summary)
+                for sql in missing:
+                    await conn.execute(sql)
+            ready.append(summary)
+
+        self.summaries = ready
+        return created
+
+    async def rebuild(self) -> Dict[str, Any]:
+        """Recompute every summary from the staff table (e.g. after editing triggers).
+
+        Returns:
+            Dictionary with per-table summary row counts
+        """
+        await self.ensure()
+        tables = {}
+        for summary in self.summaries:
+            async with target_db.transaction() as conn:
+                await self._populate(conn, summary)
+            row = await target_db.fetchone(f'SELECT COUNT(*) AS n FROM "{summary["table"]}"')
+            tables[summary["table"]] = row["n"]
+        return {"tables": tables}
+
+    def find_summary(self, columns: set[str]) -> Optional[Dict[str, Any]]:
+        """Return the first ready summary covering all referenced columns."""
+        for summary in self.summaries:
+            if columns.issubset(summary["columns"]):
+                return summary
+        return None
+
+    async def _source_column_types(self) -> Dict[str, str]:
+        """Return {column: declared type} of the staff table ({} if missing)."""
+        rows = await target_db.fetchall(f'PRAGMA table_info("{SUMMARY_SOURCE_TABLE}")')
+        return {row["name"]: row["type"] for row in rows}
+
+    async def _object_type(self, name: str, conn: Optional[aiosqlite.Connection] = None) -> Optional[str]:
+        """Return the sqlite_master type ('table', 'view', 'trigger', ...) of a name, or None."""
+        query = "SELECT type FROM sqlite_master WHERE name = ?"
+        if conn is None:
+            row = await target_db.fetchone(query, (name,))
+        else:
+            row = await (await conn.execute(query, (name,))).fetchone()
+        return row["type"] if row else None
+
+    async def _create(self, conn: aiosqlite.Connection, summary: Dict[str, Any], column_types: Dict[str, str]):
+        """Create a summary table with the source's declared column types."""
+        table = summary["table"]
+        column_defs = ", ".join(f'"{c}" {column_types[c]}' for c in summary["columns"])
+        key = ", ".join(f'"{c}"' for c in summary["columns"])
+        await conn.execute(
+            f'CREATE TABLE "{table}" ({column_defs}, "{SUMMARY_COUNT_COLUMN}" INTEGER NOT NULL)'
+        )
+        await conn.execute(f'CREATE INDEX "idx_{table}_key" ON "{table}" ({key})')
+
+    async def _populate(self, conn: aiosqlite.Connection, summary: Dict[str, Any]):
+        """Replace a summary's content with a fresh GROUP BY (inside the caller's transaction)."""
+        for sql in populate_sql(summary["table"], summary["columns"]):
+            await conn.execute(sql)
+
+    def _trigger_sql(self, summary: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """Build (name, CREATE TRIGGER) pairs that keep a summary in sync with the staff table.
+
+        Keys are matched with IS so NULL dimension/termination values count as
+        one group, like GROUP BY does.
+        """
+        table = summary["table"]
+        columns = summary["columns"]
+        count = SUMMARY_COUNT_COLUMN
+
+        def match(ref: str) -> str:
+            return " AND ".join(f'"{c}" IS {ref}."{c}"' for c in columns)
+
+        key = ", ".join(f'"{c}"' for c in columns)
+        new_values = ", ".join(f'NEW."{c}"' for c in columns)
+        add_new = f"""
+            INSERT INTO "{table}" ({key}, "{count}")
+            SELECT {new_values}, 0 WHERE NOT EXISTS (SELECT 1 FROM "{table}" WHERE {match("NEW")});
+            UPDATE "{table}" SET "{count}" = "{count}" + 1 WHERE {match("NEW")};
+        """
+        remove_old = f"""
+            UPDATE "{table}" SET "{count}" = "{count}" - 1 WHERE {match("OLD")};
+            DELETE FROM "{table}" WHERE {match("OLD")} AND "{count}" <= 0;
+        """
+        source = f'"{SUMMARY_SOURCE_TABLE}"'
+        watched = ", ".join(f'"{c}"' for c in columns)
+        return [
+            (f"trg_{table}_ins", f'CREATE TRIGGER "trg_{table}_ins" AFTER INSERT ON {source} BEGIN {add_new} END'),
+            (f"trg_{table}_del", f'CREATE TRIGGER "trg_{table}_del" AFTER DELETE ON {source} BEGIN {remove_old} END'),
+            (
+                f"trg_{table}_upd",
+                f'CREATE TRIGGER "trg_{table}_upd" AFTER UPDATE OF {watched} ON {source} '
+                f"BEGIN {remove_old} {add_new} END",
+            ),
+        ]
+
+
+# Global summary manager instance
+summary_manager = SummaryManager()
@@ -1,10 +1,18 @@
 """FastAPI application entry point."""
+import time
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from .api.routes import router
+from .config import settings
 from .database.history import history_manager
-from .database.connection import history_db, target_db
+from .database.connection import history_db, target_db, target_heavy_pool, target_light_pool, results_db
+from .database.engines.factory import ExecutionEngineFactory
+from .database.maintenance import db_maintenance
+from .database.retention import retention_manager
+from .database.summaries import summary_manager
+from .services.few_shot_index import few_shot_index
+from .services.result_store import result_store
 
 
 @asynccontextmanager
@@ -14,15 +22,37 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting Text-to-SQL Agent API...")
     
     # Initialize database
-    await history_manager.init_database()
-    print("✓ Database initialized")
+    started = time.perf_counter()
+    migration = await history_manager.init_database()
+    if migration["applied"]:
+        print(
+            f"✓ history.db migrated v{migration['from_version']} -> v{migration['to_version']} "
+            f"({', '.join(migration['applied'])}) in {migration['elapsed_ms']:.1f} ms"
+        )
+    await result_store.init()
+    await result_store.purge_expired()
+    if settings.enable_summary_tables:
+        await summary_manager.ensure()
+    await retention_manager.init()
+    await few_shot_index.sync()
+    print(f"✓ Database initialized in {(time.perf_counter() - started) * 1000:.1f} ms")
+    db_maintenance.start()
+    retention_manager.start()
+    few_shot_index.start()
     
     yield
     
     # Shutdown
     print("Shutting down...")
+    await few_shot_index.stop()
+    await retention_manager.stop()
+    await db_maintenance.stop()
+    await ExecutionEngineFactory.close_all()
     await history_db.close()
     await target_db.close()
+    await target_light_pool.close()
+    await target_heavy_pool.close()
+    await results_db.close()
 
 
 # Create FastAPI app
@@ -48,8 +48,10 @@ class ValidationEvent(BaseModel):
 class ResultEvent(BaseModel):
     """Query execution result event."""
     rows: List[Dict[str, Any]] = Field(..., description="Query result rows")
-    count: int = Field(..., description="Number of rows")
+    count: int = Field(..., description="Total number of rows")
     columns: Optional[List[str]] = Field(None, description="Column names")
+    result_id: Optional[str] = Field(None, description="Server-side result set ID for fetching more pages")
+    has_more: bool = Field(False, description="Whether rows beyond this first page exist")
 
 
 class ErrorEvent(BaseModel):
@@ -75,3 +77,4 @@ class CompleteEvent(BaseModel):
     """Workflow completion event."""
     success: bool = Field(..., description="Whether workflow completed successfully")
     message: Optional[str] = Field(None, description="Completion message")
+    message_id: Optional[int] = Field(None, description="Saved assistant message ID (for feedback)")
@@ -21,6 +21,8 @@ class QueryResult(BaseModel):
     count: int = Field(0, description="Number of rows returned")
     columns: Optional[List[str]] = Field(None, description="Column names")
     error: Optional[str] = Field(None, description="Execution error message")
+    result_id: Optional[str] = Field(None, description="Server-side result set ID for fetching more pages")
+    has_more: Optional[bool] = Field(None, description="Whether rows beyond the stored first page exist")
 
 
 class ConversationMessage(BaseModel):
@@ -29,7 +31,10 @@ class ConversationMessage(BaseModel):
     role: str = Field(..., description="Message role: 'user' or 'assistant'")
     content: str = Field(..., description="Message content")
     sql: Optional[str] = Field(None, description="Generated SQL query")
-    results: Optional[QueryResult] = Field(None, description="Structured query result")
+    results: Optional[QueryResult] = Field(None, description="Structured query result (archived or legacy messages)")
+    result_hash: Optional[str] = Field(
+        None, description="Stored result; fetch it from /api/conversations/{id}/messages/{message_id}/results"
+    )
     error: Optional[str] = Field(None, description="Message-level error")
     metadata: Optional[Dict[str, Any]] = Field(None, description="Additional message metadata")
     feedback: Optional[str] = Field(None, description="User feedback: 'like', 'dislike', or null")
@@ -44,6 +49,7 @@ class ConversationResponse(BaseModel):
     updated_at: datetime = Field(..., description="Last update time")
     schema: Optional[Dict[str, Any]] = Field(None, description="Conversation-level custom schema JSON")
     messages: List[ConversationMessage] = Field(..., description="List of messages in conversation")
+    archived: bool = Field(False, description="Loaded from a retention archive (read-only)")
 
 
 class ConversationListItem(BaseModel):
@@ -58,6 +64,25 @@ class ConversationsListResponse(BaseModel):
     """Response model for conversations list endpoint."""
     conversations: List[ConversationListItem] = Field(..., description="List of conversations")
     count: int = Field(..., description="Total number of conversations returned")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, null on the last page")
+
+
+class SearchHit(BaseModel):
+    """One full-text search hit."""
+    message_id: int = Field(..., description="Matching message ID")
+    conversation_id: str = Field(..., description="Conversation containing the message")
+    conversation_title: str = Field(..., description="Conversation title")
+    role: str = Field(..., description="'user' (question) or 'assistant' (SQL)")
+    snippet: str = Field(..., description="Matching text with <mark> highlights")
+    score: float = Field(..., description="BM25 relevance (higher is better)")
+    timestamp: datetime = Field(..., description="Message time")
+
+
+class SearchResponse(BaseModel):
+    """Response model for full-text search."""
+    query: str = Field(..., description="Search text")
+    results: List[SearchHit] = Field(..., description="Hits, most relevant first")
+    count: int = Field(..., description="Number of hits returned")
 
 
 class HealthResponse(BaseModel):
@@ -89,7 +114,8 @@ class SimilarExample(BaseModel):
 class FeedbackRequest(BaseModel):
     """Request model for submitting like/dislike feedback."""
     conversation_id: str = Field(..., description="Conversation ID")
-    sql: str = Field(..., description="Generated SQL query to identify the message")
+    message_id: Optional[int] = Field(None, description="Assistant message ID (preferred)")
+    sql: Optional[str] = Field(None, description="Generated SQL query to identify the message (legacy)")
     status: Literal["like", "dislike", "none"] = Field(..., description="Feedback status ('none' clears feedback)")
 
 
@@ -134,6 +160,14 @@ class SchemaTableDefinitionResponse(BaseModel):
     is_active: bool
 
 
+class SchemaBulkImportResponse(BaseModel):
+    """Result of a bulk NDJSON table definition import."""
+    imported: int = Field(..., description="Definitions upserted")
+    created: int = Field(..., description="Tables that were not registered before")
+    updated: int = Field(..., description="Existing tables that were replaced")
+    elapsed_ms: float = Field(..., description="Server-side import time")
+
+
 class SchemaBusinessContextRequest(BaseModel):
     """Update registry-level business_context (mirrors root `business_context` in schema.json)."""
     business_context: Dict[str, Any] = Field(
@@ -167,3 +201,119 @@ class SchemaDetectResponse(BaseModel):
     confidence: float
     strategy: Literal["heuristic", "llm_fallback"]
     matched_reasons: List[str]
+
+
+class ResultPageResponse(BaseModel):
+    """One page of a server-side result set."""
+    result_id: str = Field(..., description="Result set ID")
+    columns: List[str] = Field(default_factory=list, description="Column names")
+    rows: List[Dict[str, Any]] = Field(default_factory=list, description="Rows of this page")
+    offset: int = Field(..., description="Row number of the first row in this page")
+    limit: int = Field(..., description="Page size applied")
+    total: int = Field(..., description="Total rows in the result set")
+    next_offset: Optional[int] = Field(None, description="Offset of the next page, null on the last page")
+    has_more: bool = Field(..., description="Whether more rows follow this page")
+
+
+class ResultCacheStatsResponse(BaseModel):
+    """SQL result cache statistics."""
+    entries: int = Field(..., description="Number of cached results")
+    bytes: int = Field(..., description="Current cache size in bytes")
+    max_bytes: int = Field(..., description="Configured cache size limit in bytes")
+    hits: int = Field(..., description="Cache hits since startup")
+    misses: int = Field(..., description="Cache misses since startup")
+    hit_rate: float = Field(..., description="hits / (hits + misses)")
+    evictions: int = Field(..., description="Entries evicted by the LRU bound")
+    bytes_saved: int = Field(..., description="Result bytes served from memory instead of target.db")
+
+
+class AdmissionStatsResponse(BaseModel):
+    """Admission controller load and counters."""
+    max_heavy: int = Field(..., description="Concurrent heavy query slots")
+    running_heavy: int = Field(..., description="Heavy queries currently executing")
+    queued: Dict[str, int] = Field(..., description="Heavy queries waiting, per lane")
+    admitted_light: int = Field(..., description="Light queries admitted since startup")
+    admitted_heavy: int = Field(..., description="Heavy queries admitted since startup")
+    queued_total: int = Field(..., description="Heavy queries that had to wait since startup")
+    rejected: int = Field(..., description="Heavy queries rejected at the queue deadline")
+
+
+class WriteBatchStatsResponse(BaseModel):
+    """Group-commit statistics of the history database."""
+    group_commit_ms: float = Field(..., description="Batching window in milliseconds (0 = disabled)")
+    group_commit_max: int = Field(..., description="Statements that flush a batch early")
+    batches: int = Field(..., description="Commits issued since startup")
+    statements: int = Field(..., description="Write statements committed since startup")
+    failed_statements: int = Field(..., description="Statements rolled back to their savepoint")
+    pending: int = Field(..., description="Writes waiting for the next commit")
+    avg_batch_size: float = Field(..., description="Average statements per commit")
+    max_batch_size: int = Field(..., description="Largest batch committed")
+    avg_commit_ms: float = Field(..., description="Average batch execution + commit time")
+    last_commit_ms: float = Field(..., description="Latest batch execution + commit time")
+
+
+class FewShotIndexStatsResponse(BaseModel):
+    """State of the in-memory few-shot example index."""
+    examples: int = Field(..., description="Liked examples indexed")
+    capacity: int = Field(..., description="Rows allocated in the vector matrix")
+    dim: int = Field(..., description="Vector size (0 for fuzzy matching)")
+    backend: str = Field(..., description="FEW_SHOT_EMBEDDING_BACKEND in use")
+    epoch: Optional[str] = Field(None, description="Database epoch the index was loaded from")
+    seq: int = Field(..., description="Last few_shot_changes entry applied")
+    ann: Optional[Dict[str, Any]] = Field(None, description="IVF index state when approximate search is in use")
+
+
+class MigrationStatusResponse(BaseModel):
+    """Schema migration status of the history database (PRAGMA user_version)."""
+    from_version: int = Field(..., description="Schema version found at startup")
+    to_version: int = Field(..., description="Schema version after migrating")
+    latest_version: int = Field(..., description="Newest version known to this build")
+    applied: List[str] = Field(..., description="Migrations applied at startup, in order")
+    elapsed_ms: float = Field(..., description="Time spent checking and applying migrations")
+
+
+class RetentionRunResponse(BaseModel):
+    """Result of one history retention pass."""
+    archived_conversations: int = Field(..., description="Conversations moved to archives")
+    deleted_blobs: int = Field(..., description="Unreferenced result blobs deleted")
+    pruned_few_shot_changes: int = Field(..., description="few_shot_changes entries older than the retention window deleted")
+    vacuumed_pages: int = Field(..., description="Free pages returned to the filesystem")
+    size_bytes: int = Field(..., description="history.db size after the pass")
+    freelist_pages: int = Field(..., description="Free pages still inside history.db")
+
+
+class SummaryRebuildResponse(BaseModel):
+    """Result of recomputing summary tables."""
+    tables: Dict[str, int] = Field(..., description="Summary table name -> number of summary rows")
+
+
+class IndexRecommendation(BaseModel):
+    """A proposed index on the target database."""
+    name: str = Field(..., description="Index name")
+    table: str = Field(..., description="Indexed table")
+    columns: List[str] = Field(..., description="Index columns in key order")
+    create_sql: str = Field(..., description="CREATE INDEX statement")
+    occurrences: int = Field(..., description="Executed queries that would use this index")
+    full_scans: int = Field(..., description="Full table scans observed in their plans")
+    temp_btrees: int = Field(..., description="Temp B-tree sorts observed in their plans")
+    estimated_benefit: float = Field(..., description="Estimated rows avoided (ranking score)")
+    example_sql: str = Field(..., description="One query from history that triggered this proposal")
+
+
+class IndexAdvisorResponse(BaseModel):
+    """Index advisor report."""
+    analyzed_queries: int = Field(..., description="Distinct history queries analyzed")
+    recommendations: List[IndexRecommendation] = Field(..., description="Ranked index proposals")
+
+
+class IndexApplyRequest(BaseModel):
+    """Request to create recommended indexes in target.db."""
+    names: Optional[List[str]] = Field(
+        None,
+        description="Recommendation names to apply (omit to apply all current recommendations)",
+    )
+
+
+class IndexApplyResponse(BaseModel):
+    """Indexes created by the advisor."""
+    applied: List[str] = Field(..., description="Names of indexes created")
@@ -13,7 +13,8 @@ class AgentState(TypedDict, total=False):
         similar_examples: Few-shot examples from other conversations
         generated_sql: LLM-generated SQL query
         validation_result: SQL validation status and errors
-        execution_result: Query results or error details
+        execution_result: Query results or error details (successful results hold only the first page)
+        stored_result: Full successful result, persisted to history (execution_result's rows are page 1)
         retry_count: Number of error correction attempts
         error_message: Latest error message (if any)
         conversation_id: UUID for conversation tracking
@@ -22,6 +23,7 @@ class AgentState(TypedDict, total=False):
         formatted_response: Final markdown response (data or fast path)
         format_method: How response was formatted (python/hybrid/llm)
         has_llm_summary: Whether LLM insights were included
+        assistant_message_id: ID of the saved assistant message (for feedback)
     """
     question: str
     intent: str
@@ -38,11 +40,13 @@ class AgentState(TypedDict, total=False):
     generated_sql: str
     validation_result: Dict[str, Any]
     execution_result: Dict[str, Any]
+    stored_result: Dict[str, Any]
     retry_count: int
     error_message: str
     conversation_id: str
     current_stage: str
     is_complete: bool
+    assistant_message_id: int
     # Response formatting fields
     formatted_response: str
     format_method: str
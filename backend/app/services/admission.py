@@ -0,0 +1,232 @@
+"""Admission control for SQL execution: cost classes, priority lanes and fair queueing."""
+import asyncio
+import itertools
+import re
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+from ..database.connection import target_light_pool
+from ..config import settings
+
+COST_LIGHT = "light"
+COST_HEAVY = "heavy"
+
+# Lower rank is served first
+LANES = {"interactive": 0, "batch": 1}
+
+_SCAN_TABLE_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+
+
+class AdmissionRejected(Exception):
+    """Raised when a heavy query waits in the queue past its deadline."""
+
+
+@dataclass
+class _Waiter:
+    """A heavy query waiting for a slot."""
+    lane_rank: int
+    conversation_id: Optional[str]
+    seq: int
+    future: asyncio.Future = field(repr=False)
+
+
+class AdmissionController:
+    """Gates expensive queries so they cannot starve cheap lookups.
+
+    Light queries (index searches, scans of small tables) always run, on
+    target.db connections that heavy queries never use. Heavy
+    queries share max_heavy slots; waiters are served interactive lane first,
+    then by fewest heavy queries already running for their conversation, then
+    in arrival order. A conversation never holds more than max_per_conversation
+    slots at once.
+    """
+
+    def __init__(
+        self,
+        max_heavy: Optional[int] = None,
+        max_per_conversation: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+    ):
+        """Initialize controller.
+
+        Args:
+            max_heavy: Concurrent heavy queries (default from config)
+            max_per_conversation: Concurrent heavy queries per conversation (default from config)
+            queue_timeout: Seconds a heavy query may wait for a slot (default from config)
+        """
+        self.max_heavy = max_heavy or settings.admission_max_heavy_queries
+        self.max_per_conversation = max_per_conversation or settings.admission_max_heavy_per_conversation
+        self.queue_timeout = queue_timeout if queue_timeout is not None else settings.admission_queue_timeout_seconds
+
+        self._running = 0
+        self._running_by_conversation: Dict[Optional[str], int] = {}
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._counters = {"light": 0, "heavy": 0, "queued": 0, "rejected": 0}
+
+    async def classify(self, sql: str, engine_name: str = "sqlite") -> str:
+        """Derive a cost class from EXPLAIN QUERY PLAN.
+
+        A query is heavy if its plan full-scans a table with at least
+        admission_light_scan_rows rows (or of unknown size), builds an automatic
+        index, or sorts through a temp B-tree. Other engines are always heavy:
+        only analytic intents are routed to them.
+
+        Args:
+            sql: SELECT statement (with LIMIT applied)
+            engine_name: Engine that will execute the query
+
+        Returns:
+            'light' or 'heavy'
+        """
+        if engine_name != "sqlite":
+            return COST_HEAVY
+        try:
+            rows = await target_light_pool.fetchall(f"EXPLAIN QUERY PLAN {sql.strip().rstrip(';')}")
+        except Exception:
+            # Let the executor surface the real error; don't hold a slot for it
+            return COST_LIGHT
+
+        for row in rows:
+            detail = row["detail"]
+            if "AUTOMATIC" in detail or detail.startswith("USE TEMP B-TREE"):
+                return COST_HEAVY
+            scan = _SCAN_TABLE_RE.match(detail)
+            if scan and scan.group(1) != "CONSTANT":
+                table_rows = await self._table_rows(scan.group(1))
+                if table_rows is None or table_rows >= settings.admission_light_scan_rows:
+                    return COST_HEAVY
+        return COST_LIGHT
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        cost_class: str,
+        conversation_id: Optional[str] = None,
+        lane: str = "interactive",
+    ) -> AsyncIterator[None]:
+        """Hold an execution slot for the duration of the block.
+
+        Args:
+            cost_class: 'light' or 'heavy'
+            conversation_id: Conversation issuing the query (fairness key)
+            lane: 'interactive' or 'batch'
+
+        Raises:
+            AdmissionRejected: If a heavy query is not admitted before the deadline
+            ValueError: On an unknown lane
+        """
+        if cost_class != COST_HEAVY:
+            self._counters["light"] += 1
+            yield
+            return
+
+        if lane not in LANES:
+            raise ValueError(f"Unknown admission lane: {lane}")
+        await self._acquire(conversation_id, LANES[lane])
+        self._counters["heavy"] += 1
+        try:
+            yield
+        finally:
+            self._release(conversation_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current load and lifetime counters."""
+        queued_by_lane = {name: 0 for name in LANES}
+        rank_to_lane = {rank: name for name, rank in LANES.items()}
+        for waiter in self._waiters:
+            queued_by_lane[rank_to_lane[waiter.lane_rank]] += 1
+        return {
+            "max_heavy": self.max_heavy,
+            "running_heavy": self._running,
+            "queued": queued_by_lane,
+            "admitted_light": self._counters["light"],
+            "admitted_heavy": self._counters["heavy"],
+            "queued_total": self._counters["queued"],
+            "rejected": self._counters["rejected"],
+        }
+
+    async def _acquire(self, conversation_id: Optional[str], lane_rank: int):
+        """Wait for a heavy slot or raise AdmissionRejected at the deadline."""
+        future = asyncio.get_running_loop().create_future()
+        waiter = _Waiter(lane_rank, conversation_id, next(self._seq), future)
+        self._waiters.append(waiter)
+        self._dispatch()
+        if future.done():
+            return
+
+        self._counters["queued"] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done():
+                # Granted while timing out: keep the slot on timeout, give it back on cancel
+                if isinstance(e, asyncio.TimeoutError):
+                    return
+                self._release(conversation_id)
+                raise
+            self._waiters.remove(waiter)
+            future.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._counters["rejected"] += 1
+            raise AdmissionRejected(
+                f"Server is busy with other heavy queries (waited >{self.queue_timeout}s)"
+            ) from None
+
+    def _release(self, conversation_id: Optional[str]):
+        """Free a heavy slot and admit the next eligible waiter(s)."""
+        self._running -= 1
+        remaining = self._running_by_conversation.get(conversation_id, 1) - 1
+        if remaining > 0:
+            self._running_by_conversation[conversation_id] = remaining
+        else:
+            self._running_by_conversation.pop(conversation_id, None)
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant free slots to waiters in lane / fairness / arrival order."""
+        while self._running < self.max_heavy:
+            eligible = [w for w in self._waiters if self._has_conversation_slot(w.conversation_id)]
+            if not eligible:
+                return
+            waiter = min(
+                eligible,
+                key=lambda w: (
+                    w.lane_rank,
+                    self._running_by_conversation.get(w.conversation_id, 0),
+                    w.seq,
+                ),
+            )
+            self._waiters.remove(waiter)
+            self._running += 1
+            self._running_by_conversation[waiter.conversation_id] = (
+                self._running_by_conversation.get(waiter.conversation_id, 0) + 1
+            )
+            waiter.future.set_result(None)
+
+    def _has_conversation_slot(self, conversation_id: Optional[str]) -> bool:
+        """Whether a conversation may start another heavy query.
+
+        Anonymous callers (no conversation ID) are only bounded by the global limit.
+        """
+        if conversation_id is None:
+            return True
+        return self._running_by_conversation.get(conversation_id, 0) < self.max_per_conversation
+
+    async def _table_rows(self, table: str) -> Optional[int]:
+        """Row count estimate from sqlite_stat1 (None if never analyzed)."""
+        try:
+            rows = await target_light_pool.fetchall(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = ? ORDER BY idx IS NOT NULL LIMIT 1",
+                (table,),
+            )
+        except Exception:
+            return None
+        if not rows or not rows[0]["stat"]:
+            return None
+        return int(rows[0]["stat"].split()[0])
+
+
+# Global admission controller instance
+admission_controller = AdmissionController()
@@ -0,0 +1,482 @@
+"""IVF approximate nearest-neighbor index persisted as memory-mapped files.
+
+Vectors are L2-normalized, so similarity is a dot product. A build clusters
+them with spherical k-means and stores them grouped by cluster (inverted
+lists); a search scores the query against the centroids and scans only the
+`nprobe` closest lists. Builds are written to their own directory and
+published by atomically replacing a CURRENT pointer file, so a reader never
+sees a partial build and the vectors can be opened with mmap without loading
+them into RAM. Builds stream vectors through memory-mapped files chunk by
+chunk, so neither building nor rebuilding holds the corpus in RAM.
+
+Several processes may share a directory: a LOCK file is held shared while a
+build is opened or started and exclusively while one is published; every
+process reading or writing a build holds a shared lock on its IN_USE file,
+and only builds nobody holds are deleted. BUILD_LOCK serializes builds so
+concurrent workers reuse each other's work instead of duplicating it.
+
+Inserts and deletes after a build go to a small in-memory delta (searched
+exhaustively) and a tombstone set until the next rebuild merges them.
+"""
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no interprocess locking, run a single worker
+    fcntl = None
+
+# Vectors scored per matrix product while training / assigning (bounds temporary memory)
+ASSIGN_CHUNK = 65536
+
+# Lock files: LOCK guards CURRENT and cleanup, BUILD_LOCK serializes builds,
+# IN_USE (per build) is held by every process reading or writing that build
+LOCK_FILE = "LOCK"
+BUILD_LOCK_FILE = "BUILD_LOCK"
+IN_USE_FILE = "IN_USE"
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows (zero rows stay zero)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+def default_nlist(count: int) -> int:
+    """Number of inverted lists for a corpus size (about sqrt(n))."""
+    return max(1, min(count, int(np.sqrt(count))))
+
+
+def train_centroids(
+    vectors: np.ndarray,
+    nlist: int,
+    iterations: int = 8,
+    sample_size: Optional[int] = None,
+    seed: int = 0,
+) -> np.ndarray:
+    """Spherical k-means on a sample of normalized vectors.
+
+    Args:
+        vectors: (n, dim) normalized vectors (may be a memmap)
+        nlist: Number of centroids
+        iterations: Lloyd iterations
+        sample_size: Vectors used for training (default 40 per centroid)
+        seed: Random seed
+
+    Returns:
+        (nlist, dim) normalized centroids
+    """
+    rng = np.random.default_rng(seed)
+    count = len(vectors)
+    sample_size = sample_size or 40 * nlist
+    sample = np.asarray(vectors[np.sort(rng.choice(count, min(count, sample_size), replace=False))])
+    nlist = min(nlist, len(sample))
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = assign(sample, centroids)
+        order = np.argsort(assignment, kind="stable")
+        sizes = np.bincount(assignment, minlength=nlist)
+        sums = np.zeros_like(centroids)
+        filled = sizes > 0
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])[filled]
+        sums[filled] = np.add.reduceat(sample[order], starts, axis=0)
+        # Re-seed empty clusters from random sample vectors
+        sums[~filled] = sample[rng.choice(len(sample), int((~filled).sum()))]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+def assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for each vector."""
+    result = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), ASSIGN_CHUNK):
+        chunk = np.asarray(vectors[start:start + ASSIGN_CHUNK])
+        result[start:start + ASSIGN_CHUNK] = np.argmax(chunk @ centroids.T, axis=1)
+    return result
+
+
+def _flock(handle: IO, exclusive: bool, blocking: bool = True) -> bool:
+    """Lock an open file; returns False if a non-blocking lock is unavailable."""
+    if fcntl is None:
+        return True
+    operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+    try:
+        fcntl.flock(handle.fileno(), operation if blocking else operation | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+@contextmanager
+def _locked(path: Path, exclusive: bool) -> Iterator[None]:
+    """Hold a lock on `path` (created if missing) for the duration of the block."""
+    with open(path, "a+b") as handle:
+        _flock(handle, exclusive)
+        yield
+
+
+def _claim(build: Path) -> IO:
+    """Take this process's shared IN_USE lock on a build; close the handle to release it."""
+    handle = open(build / IN_USE_FILE, "a+b")
+    _flock(handle, exclusive=False)
+    return handle
+
+
+@contextmanager
+def build_lock(directory: str) -> Iterator[None]:
+    """Serialize IVF builds across processes sharing `directory`."""
+    root = Path(directory)
+    root.mkdir(parents=True, exist_ok=True)
+    with _locked(root / BUILD_LOCK_FILE, exclusive=True):
+        yield
+
+
+class IVFBuild:
+    """A new build directory owned by this process until it is published.
+
+    Use as a context manager: the directory is removed if the block raises
+    or returns without publish().
+    """
+
+    def __init__(self, directory: str):
+        """Create a private build directory under `directory`."""
+        self.root = Path(directory)
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Created and claimed under LOCK so a concurrent cleanup cannot see it unclaimed
+        with _locked(self.root / LOCK_FILE, exclusive=False):
+            self.path = self.root / f"tmp-{time.time_ns()}-{os.getpid()}"
+            self.path.mkdir()
+            self._claim: Optional[IO] = _claim(self.path)
+        self._published = False
+
+    def __enter__(self) -> "IVFBuild":
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self._published:
+            shutil.rmtree(self.path, ignore_errors=True)
+        if self._claim is not None:
+            self._claim.close()
+            self._claim = None
+
+    def staging(self, count: int, dim: int) -> np.memmap:
+        """Allocate a (count, dim) float32 scratch matrix on disk to fill before write()."""
+        return np.lib.format.open_memmap(
+            self.path / "staging.npy", mode="w+", dtype=np.float32, shape=(count, dim)
+        )
+
+    def write(
+        self,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        nlist: Optional[int] = None,
+        meta: Optional[Dict[str, Any]] = None,
+        seed: int = 0,
+    ):
+        """Cluster normalized vectors and write them grouped into inverted lists.
+
+        Args:
+            ids: (n,) example ids
+            vectors: (n, dim) normalized vectors (a memmap is read chunk by chunk)
+            nlist: Number of lists (default_nlist(n) when None)
+            meta: Caller metadata persisted with the build
+            seed: Random seed for training
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) == 0:
+            raise ValueError("Cannot build an IVF index without vectors")
+        centroids = train_centroids(vectors, nlist or default_nlist(len(ids)), seed=seed)
+        assignment = assign(vectors, centroids)
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(assignment, minlength=len(centroids)))
+        del assignment
+        position = np.empty_like(order)
+        position[order] = np.arange(len(order))
+        grouped = np.lib.format.open_memmap(
+            self.path / "vectors.npy", mode="w+", dtype=np.float32, shape=(len(ids), centroids.shape[1])
+        )
+        for start in range(0, len(ids), ASSIGN_CHUNK):
+            grouped[position[start:start + ASSIGN_CHUNK]] = vectors[start:start + ASSIGN_CHUNK]
+        grouped.flush()
+        del grouped
+        np.save(self.path / "centroids.npy", centroids)
+        np.save(self.path / "offsets.npy", offsets)
+        np.save(self.path / "ids.npy", ids[order])
+        (self.path / "meta.json").write_text(json.dumps(meta or {}))
+        (self.path / "staging.npy").unlink(missing_ok=True)
+
+    def publish(self) -> "IVFIndex":
+        """Make this build CURRENT, delete builds nobody uses, and open it.
+
+        Returns:
+            The published index, memory-mapped
+        """
+        with _locked(self.root / LOCK_FILE, exclusive=True):
+            name = f"build-{time.time_ns()}"
+            path = self.path.rename(self.root / name)
+            tmp_pointer = self.root / f"CURRENT.{os.getpid()}.tmp"
+            tmp_pointer.write_text(name)
+            os.replace(tmp_pointer, self.root / "CURRENT")
+            self._published = True
+            self.path = path
+            _remove_unused(self.root, name)
+            return IVFIndex._open_build(path)
+
+
+def _remove_unused(root: Path, current: str):
+    """Delete builds older than `current` and unfinished builds that no process holds.
+
+    Caller holds LOCK exclusively.
+    """
+    current_stamp = int(current.split("-")[1])
+    for path in root.iterdir():
+        if not path.is_dir() or path.name == current:
+            continue
+        if path.name.startswith("build-"):
+            if int(path.name.split("-")[1]) >= current_stamp:
+                continue
+        elif not path.name.startswith("tmp-"):
+            continue
+        try:
+            handle = open(path / IN_USE_FILE, "a+b")
+        except FileNotFoundError:
+            continue  # An unfinished build removed by its owner meanwhile
+        with handle:
+            if _flock(handle, exclusive=True, blocking=False):
+                shutil.rmtree(path, ignore_errors=True)
+
+
+class IVFIndex:
+    """Inverted-file index over normalized vectors keyed by int64 ids."""
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        meta: Optional[Dict[str, Any]] = None,
+        path: Optional[Path] = None,
+        claim: Optional[IO] = None,
+    ):
+        """Wrap memory-mapped arrays; use open() or IVFBuild.publish() instead.
+
+        Args:
+            centroids: (nlist, dim) normalized centroids
+            offsets: (nlist + 1,) start of each inverted list in ids/vectors
+            ids: (n,) example ids grouped by list
+            vectors: (n, dim) vectors grouped by list
+            meta: Caller metadata persisted with the build
+            path: Build directory when opened from disk
+            claim: IN_USE lock handle keeping the build directory from being deleted
+        """
+        self.centroids = centroids
+        self.offsets = offsets
+        self.ids = ids
+        self.vectors = vectors
+        self.meta = meta or {}
+        self.path = path
+        self._claim = claim
+        self.dim = centroids.shape[1]
+        self._sorted_ids = np.sort(np.asarray(ids))
+        self._delta: Dict[int, np.ndarray] = {}
+        self._deleted: set[int] = set()
+        self._deleted_array: Optional[np.ndarray] = None
+        self._delta_matrix: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @classmethod
+    def open(cls, directory: str) -> Optional["IVFIndex"]:
+        """Open the current build under a directory with memory-mapped vectors.
+
+        The build stays on disk until close() (or garbage collection).
+
+        Returns:
+            The index, or None when nothing has been saved there
+        """
+        root = Path(directory)
+        if not (root / "CURRENT").exists():
+            return None
+        with _locked(root / LOCK_FILE, exclusive=False):
+            return cls._open_build(root / (root / "CURRENT").read_text().strip())
+
+    @classmethod
+    def _open_build(cls, path: Path) -> "IVFIndex":
+        """Claim and memory-map a build (caller holds LOCK)."""
+        claim = _claim(path)
+        try:
+            meta = json.loads((path / "meta.json").read_text())
+            return cls(
+                np.load(path / "centroids.npy"),
+                np.load(path / "offsets.npy"),
+                np.load(path / "ids.npy", mmap_mode="r"),
+                np.load(path / "vectors.npy", mmap_mode="r"),
+                meta,
+                path,
+                claim,
+            )
+        except BaseException:
+            claim.close()
+            raise
+
+    def close(self):
+        """Release this process's hold on the build directory."""
+        if self._claim is not None:
+            self._claim.close()
+            self._claim = None
+
+    def __len__(self) -> int:
+        return len(self.ids) - len(self._deleted) + len(self._delta)
+
+    def add(self, example_id: int, vector: np.ndarray):
+        """Insert or replace a normalized vector (kept in the delta until rebuild)."""
+        if self._in_base(example_id):
+            self._deleted.add(example_id)
+            self._deleted_array = None
+        self._delta[example_id] = np.asarray(vector, dtype=np.float32)
+        self._delta_matrix = None
+
+    def remove(self, example_id: int):
+        """Delete an id (no-op if it is not indexed)."""
+        if self._delta.pop(example_id, None) is not None:
+            self._delta_matrix = None
+        if self._in_base(example_id):
+            self._deleted.add(example_id)
+            self._deleted_array = None
+
+    def pending_changes(self) -> int:
+        """Delta inserts plus tombstones not merged into the base lists yet."""
+        return len(self._delta) + len(self._deleted)
+
+    def search(self, query: np.ndarray, k: int, nprobe: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top-k by dot product.
+
+        Args:
+            query: (dim,) normalized query vector
+            k: Number of results
+            nprobe: Inverted lists scanned
+
+        Returns:
+            (ids, scores), best first
+        """
+        probes = np.argsort(-(self.centroids @ query))[:nprobe]
+        id_parts: List[np.ndarray] = []
+        score_parts: List[np.ndarray] = []
+        for probe in probes:
+            start, end = self.offsets[probe], self.offsets[probe + 1]
+            if start == end:
+                continue
+            id_parts.append(np.asarray(self.ids[start:end]))
+            score_parts.append(np.asarray(self.vectors[start:end]) @ query)
+        if self._deleted and id_parts:
+            if self._deleted_array is None:
+                self._deleted_array = np.fromiter(self._deleted, dtype=np.int64)
+            for i, part in enumerate(id_parts):
+                live = ~np.isin(part, self._deleted_array)
+                id_parts[i], score_parts[i] = part[live], score_parts[i][live]
+        if self._delta:
+            delta_ids, delta_vectors = self._delta_arrays()
+            id_parts.append(delta_ids)
+            score_parts.append(delta_vectors @ query)
+        if not id_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        ids = np.concatenate(id_parts)
+        scores = np.concatenate(score_parts)
+        k = min(k, len(ids))
+        if k == 0:
+            return ids[:0], scores[:0]
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return ids[top], scores[top]
+
+    def snapshot(self) -> Tuple[Dict[int, np.ndarray], set[int]]:
+        """Capture pending changes before a background rebuild (see rebuilt())."""
+        return dict(self._delta), set(self._deleted)
+
+    def rebuilt(
+        self,
+        snapshot: Tuple[Dict[int, np.ndarray], set[int]],
+        directory: str,
+        nlist: Optional[int] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> "IVFIndex":
+        """Build and publish a new index merging the base lists with a snapshot of pending changes.
+
+        Safe to run in a worker thread: it only reads the snapshot and the base
+        arrays, copying surviving vectors chunk by chunk into an on-disk staging
+        matrix. Apply changes made since the snapshot with carry_over().
+
+        Returns:
+            The published index, memory-mapped
+        """
+        delta, deleted = snapshot
+        keep = ~np.isin(np.asarray(self.ids), np.fromiter(deleted, dtype=np.int64, count=len(deleted)))
+        count = int(keep.sum()) + len(delta)
+        with IVFBuild(directory) as build:
+            ids = np.empty(count, dtype=np.int64)
+            vectors = build.staging(count, self.dim)
+            filled = 0
+            for start in range(0, len(self.ids), ASSIGN_CHUNK):
+                live = keep[start:start + ASSIGN_CHUNK]
+                chunk = np.asarray(self.vectors[start:start + ASSIGN_CHUNK])[live]
+                ids[filled:filled + len(chunk)] = np.asarray(self.ids[start:start + ASSIGN_CHUNK])[live]
+                vectors[filled:filled + len(chunk)] = chunk
+                filled += len(chunk)
+            if delta:
+                ids[filled:] = np.fromiter(delta.keys(), dtype=np.int64, count=len(delta))
+                vectors[filled:] = np.stack(list(delta.values()))
+            build.write(ids, vectors, nlist or default_nlist(count), meta)
+            del vectors
+            return build.publish()
+
+    def carry_over(self, new_index: "IVFIndex", snapshot: Tuple[Dict[int, np.ndarray], set[int]]):
+        """Re-apply to new_index the changes made to this index after snapshot()."""
+        delta, deleted = snapshot
+        for example_id, vector in self._delta.items():
+            if delta.get(example_id) is not vector:
+                new_index.add(example_id, vector)
+        for example_id in self._deleted - deleted:
+            new_index.remove(example_id)
+        for example_id in delta:
+            if example_id not in self._delta:
+                new_index.remove(example_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return list count, sizes and pending changes."""
+        return {
+            "vectors": len(self.ids),
+            "lists": len(self.centroids),
+            "delta": len(self._delta),
+            "deleted": len(self._deleted),
+            "path": str(self.path) if self.path else None,
+        }
+
+    def _in_base(self, example_id: int) -> bool:
+        position = np.searchsorted(self._sorted_ids, example_id)
+        return position < len(self._sorted_ids) and self._sorted_ids[position] == example_id
+
+    def _delta_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._delta_matrix is None:
+            self._delta_matrix = (
+                np.fromiter(self._delta.keys(), dtype=np.int64, count=len(self._delta)),
+                np.stack(list(self._delta.values())),
+            )
+        return self._delta_matrix
+
+
+def recall_at_k(approximate: Iterable[np.ndarray], exact: Iterable[np.ndarray]) -> float:
+    """Mean fraction of the exact top-k ids found by the approximate search."""
+    ratios = [
+        len(set(a.tolist()) & set(e.tolist())) / len(e)
+        for a, e in zip(approximate, exact)
+        if len(e)
+    ]
+    return float(np.mean(ratios)) if ratios else 1.0
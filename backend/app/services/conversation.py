@@ -1,7 +1,9 @@
 """Conversation memory management service."""
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import uuid
 from ..database.history import history_manager
+from ..database.retention import retention_manager
+from .result_store import result_store
 from ..config import settings
 
 
@@ -47,16 +49,7 @@ class ConversationService:
         if max_messages is None:
             max_messages = settings.max_conversation_messages
         
-        messages = await history_manager.get_conversation_messages(
-            conversation_id,
-            limit=max_messages
-        )
-        
-        # Return only role and content (remove timestamp)
-        return [
-            {"role": msg["role"], "content": msg["content"]}
-            for msg in messages
-        ]
+        return await history_manager.get_context_messages(conversation_id, max_messages)
     
     async def save_user_message(
         self,
@@ -83,7 +76,7 @@ class ConversationService:
         result: Optional[Dict[str, Any]] = None,
         error: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
-    ):
+    ) -> int:
         """Save assistant response to conversation.
         
         Args:
@@ -93,8 +86,11 @@ class ConversationService:
             result: Structured query result
             error: Error message
             metadata: Additional structured metadata
+
+        Returns:
+            Saved message ID
         """
-        await history_manager.save_message(
+        return await history_manager.save_message(
             conversation_id=conversation_id,
             role="assistant",
             content=content,
@@ -113,10 +109,31 @@ class ConversationService:
         Args:
             conversation_id: Conversation ID
             
+        Stored results are not decompressed here; messages carry result_hash
+        and clients fetch a result when it is shown (get_message_result).
+
+        Returns:
+            Full conversation details (from the archive if it was archived) or None if not found
+        """
+        conversation = await history_manager.get_conversation(conversation_id, include_results=False)
+        if conversation is None:
+            conversation = await retention_manager.get_archived_conversation(conversation_id)
+        return conversation
+    
+    async def get_message_result(self, conversation_id: str, message_id: int) -> Optional[Any]:
+        """Get the stored result of one message.
+
+        Args:
+            conversation_id: Conversation ID
+            message_id: Message ID
+
         Returns:
-            Full conversation details or None if not found
+            The result's first page (with result_id/has_more), or None if the message has none
         """
-        return await history_manager.get_conversation(conversation_id)
+        result = await history_manager.get_message_result(conversation_id, message_id)
+        if isinstance(result, dict):
+            result = result_store.first_page(result)
+        return result
     
     async def get_all_conversations(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get all conversations with summary info.
@@ -128,6 +145,22 @@ class ConversationService:
             List of conversations
         """
         return await history_manager.get_all_conversations(limit)
+    
+    async def get_conversations_page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one keyset-paginated page of conversations.
+        
+        Args:
+            limit: Maximum number of conversations to return
+            cursor: Cursor from the previous page (None for the first page)
+            
+        Returns:
+            (conversations, next_cursor)
+        """
+        return await history_manager.get_conversations_page(limit=limit, cursor=cursor)
 
     async def get_conversation_schema(self, conversation_id: str) -> Optional[Dict[str, Any]]:
         """Get custom schema JSON for a conversation."""
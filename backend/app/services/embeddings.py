@@ -0,0 +1,116 @@
+"""Question encoders for few-shot example retrieval."""
+import unicodedata
+import zlib
+from typing import List
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip diacritics and collapse whitespace.
+
+    Vietnamese questions typed without accents encode like the accented ones.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.lower().replace("đ", "d"))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.split())
+
+
+class HashedNgramEncoder:
+    """Character n-gram counts hashed into a fixed-size vector.
+
+    Needs no model or network access. Term frequencies are sublinear
+    (1 + log count); the index applies IDF weights at query time, so vectors
+    are returned unnormalized.
+    """
+
+    # The index weights dimensions by IDF and normalizes scores itself
+    weighted = True
+
+    def __init__(self, dim: int = 1024, min_n: int = 2, max_n: int = 4):
+        """Initialize encoder.
+
+        Args:
+            dim: Vector size (n-grams are hashed into this many buckets)
+            min_n: Shortest character n-gram
+            max_n: Longest character n-gram
+        """
+        self.dim = dim
+        self.min_n = min_n
+        self.max_n = max_n
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into a (len(texts), dim) float32 matrix."""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            padded = f" {normalize_text(text)} "
+            buckets = [
+                zlib.crc32(padded[i:i + n].encode()) % self.dim
+                for n in range(self.min_n, self.max_n + 1)
+                for i in range(len(padded) - n + 1)
+            ]
+            if not buckets:
+                continue
+            counts = np.bincount(buckets, minlength=self.dim).astype(np.float32)
+            nonzero = counts > 0
+            counts[nonzero] = 1.0 + np.log(counts[nonzero])
+            matrix[row] = counts
+        return matrix
+
+
+class SentenceTransformerEncoder:
+    """Dense embeddings from a local sentence-transformers model.
+
+    Vectors are L2-normalized, so cosine similarity is a plain dot product.
+    """
+
+    weighted = False
+
+    def __init__(self, model_name: str):
+        """Initialize encoder.
+
+        Args:
+            model_name: Model name or local path passed to SentenceTransformer
+        """
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "FEW_SHOT_EMBEDDING_BACKEND=sentence-transformers requires the "
+                "'sentence-transformers' package (pip install sentence-transformers)"
+            ) from e
+        self._model = SentenceTransformer(model_name)
+        self.dim = self._model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into a (len(texts), dim) float32 matrix."""
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        vectors = self._model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+        return vectors.astype(np.float32, copy=False)
+
+
+def create_encoder(backend: str, dim: int = 1024, model_name: str = ""):
+    """Create the encoder for a FEW_SHOT_EMBEDDING_BACKEND value.
+
+    Args:
+        backend: "hashed", "sentence-transformers" or "fuzzy"
+        dim: Vector size of the hashed encoder
+        model_name: Model of the sentence-transformers encoder
+
+    Returns:
+        Encoder with encode(texts), dim and weighted attributes, or None for
+        fuzzy string matching
+
+    Raises:
+        ValueError: On an unknown backend
+    """
+    if backend == "fuzzy":
+        return None
+    if backend == "hashed":
+        return HashedNgramEncoder(dim)
+    if backend == "sentence-transformers":
+        return SentenceTransformerEncoder(model_name)
+    raise ValueError(
+        f"Unknown few-shot embedding backend '{backend}', "
+        "expected hashed, sentence-transformers or fuzzy"
+    )
@@ -0,0 +1,138 @@
+"""Benchmark few-shot example scoring on a synthetic liked-example history.
+
+Compares the former per-pair edit-distance loop with batched fuzzy matching,
+the dense embedding index and the IVF approximate index (whose recall@k is
+measured against exact search over the same hashed vectors).
+
+Usage:
+    python -m app.services.few_shot_benchmark
+    python -m app.services.few_shot_benchmark --examples 100000 --queries 20 --methods loop fuzzy
+    python -m app.services.few_shot_benchmark --examples 500000 --methods ivf --nprobe 4 8 16
+"""
+import argparse
+import random
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+import numpy as np
+from rapidfuzz.distance import Levenshtein
+from .ann_index import IVFBuild, normalize_rows, recall_at_k
+from .embeddings import HashedNgramEncoder
+from .few_shot_index import FewShotIndex
+
+METHODS = ("loop", "fuzzy", "hashed", "ivf")
+
+_METRICS = ["number of employees", "average salary", "total headcount", "count of resignations",
+            "median tenure", "số nhân viên", "tổng lương", "average age"]
+_DIMENSIONS = ["per department", "by division", "by job level", "theo phòng ban", "by gender",
+               "per location", "by contract type", "per manager"]
+_FILTERS = ["in 2021", "in 2022", "in 2023", "this quarter", "last month", "for engineering",
+            "for sales", "hired after 2020", "năm 2024", ""]
+
+
+def make_questions(count: int, seed: int = 7) -> List[str]:
+    """Generate template questions (metric, dimension, filter) plus a random id word."""
+    rng = random.Random(seed)
+    return [
+        " ".join(filter(None, [
+            rng.choice(_METRICS),
+            rng.choice(_DIMENSIONS),
+            rng.choice(_FILTERS),
+            f"q{rng.randrange(count)}",
+        ]))
+        for _ in range(count)
+    ]
+
+
+def _loop_scores(question: str, questions: List[str]) -> List[float]:
+    """Former scoring: one normalized edit distance per example in Python."""
+    q = question.lower().strip()
+    scores = []
+    for other in questions:
+        o = other.lower().strip()
+        max_len = max(len(q), len(o))
+        scores.append(1.0 - Levenshtein.distance(q, o) / max_len if max_len else 1.0)
+    return scores
+
+
+def benchmark_method(method: str, questions: List[str], queries: List[str], top_k: int = 5) -> Dict[str, Any]:
+    """Time index build and per-query scoring of one method."""
+    started = time.perf_counter()
+    index = None
+    if method != "loop":
+        index = FewShotIndex(backend=method)
+        index.load([
+            {"id": i, "conversation_id": None, "question": q, "sql": "", "intent": None}
+            for i, q in enumerate(questions)
+        ])
+    build_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for query in queries:
+        if index is None:
+            scores = _loop_scores(query, questions)
+            sorted(range(len(scores)), key=scores.__getitem__, reverse=True)[:top_k]
+        else:
+            index.search(query, top_k=top_k)
+    query_ms = (time.perf_counter() - started) * 1000 / max(len(queries), 1)
+    return {"method": method, "build_s": build_s, "query_ms": query_ms}
+
+
+def benchmark_ivf(
+    questions: List[str], queries: List[str], nprobes: List[int], top_k: int = 5
+) -> List[Dict[str, Any]]:
+    """Time the IVF index at several nprobe values and measure its recall@k.
+
+    The index is built and published to a temporary directory the way the
+    few-shot index does it, so build_s includes writing the memory-mapped lists.
+    """
+    encoder = HashedNgramEncoder()
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        vectors = normalize_rows(encoder.encode(questions))
+        with IVFBuild(directory) as build:
+            build.write(np.arange(len(questions)), vectors)
+            index = build.publish()
+        build_s = time.perf_counter() - started
+
+        query_vectors = normalize_rows(encoder.encode(queries))
+        exact = [np.argsort(-(vectors @ q))[:top_k] for q in query_vectors]
+        results = []
+        for nprobe in nprobes:
+            started = time.perf_counter()
+            found = [index.search(q, top_k, nprobe)[0] for q in query_vectors]
+            query_ms = (time.perf_counter() - started) * 1000 / max(len(queries), 1)
+            results.append({
+                "method": f"ivf/{nprobe}",
+                "build_s": build_s,
+                "query_ms": query_ms,
+                "recall": recall_at_k(found, exact),
+            })
+        index.close()
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark few-shot example scoring")
+    parser.add_argument("--examples", type=int, default=100000, help="Liked examples in the history")
+    parser.add_argument("--queries", type=int, default=20, help="Questions scored per method")
+    parser.add_argument("--methods", nargs="+", default=list(METHODS), choices=list(METHODS))
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8], help="IVF lists scanned per query")
+    args = parser.parse_args(argv)
+
+    questions = make_questions(args.examples)
+    queries = make_questions(args.queries, seed=11)
+    print(f"{'method':<8} {'build s':>10} {'ms/query':>10} {'recall':>8}   ({args.examples:,} examples)")
+    for method in args.methods:
+        if method == "ivf":
+            results = benchmark_ivf(questions, queries, args.nprobe)
+        else:
+            results = [benchmark_method(method, questions, queries)]
+        for r in results:
+            recall = f"{r['recall']:.3f}" if "recall" in r else "-"
+            print(f"{r['method']:<8} {r['build_s']:>10.2f} {r['query_ms']:>10.2f} {recall:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,517 @@
+"""In-memory vector index over few-shot examples."""
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from rapidfuzz import fuzz, process
+from ..config import settings
+from ..database.history import history_manager
+from .ann_index import IVFBuild, IVFIndex, build_lock, normalize_rows
+from .embeddings import create_encoder, normalize_text
+
+# Pending ANN inserts/deletes always tolerated before a background rebuild
+ANN_MIN_PENDING = 1000
+# Examples encoded per batch while building the ANN index
+ANN_ENCODE_BATCH = 10000
+# Examples sampled to estimate IDF weights for the ANN index
+ANN_IDF_SAMPLE = 100000
+
+
+def _fuzzy_key(question: str) -> str:
+    """Normalized question with its words sorted (word order does not matter)."""
+    return " ".join(sorted(normalize_text(question).split()))
+
+
+def _unit_vectors(vectors: np.ndarray, weights: Optional[np.ndarray]) -> np.ndarray:
+    """Apply frozen IDF weights (if any) and L2-normalize, as stored in the IVF index."""
+    return normalize_rows(vectors * weights if weights is not None else vectors)
+
+
+class FewShotIndex:
+    """NumPy matrix of example vectors; top-k is one matrix-vector product.
+
+    Without an encoder (FEW_SHOT_EMBEDDING_BACKEND=fuzzy) examples are scored
+    instead by one batched rapidfuzz call over precomputed keys (normalized,
+    token-sorted questions), i.e. a token-sort ratio without per-query sorting.
+
+    Rows are kept dense (a removed row is replaced by the last one) and the
+    matrix grows by doubling. sync() follows the few_shot_changes log, so
+    feedback from any process is applied incrementally, and a database reset
+    (new epoch) or log entries pruned before they were applied trigger a full
+    reload. The index is loaded at startup, synced right after feedback in
+    this process and every FEW_SHOT_SYNC_INTERVAL_SECONDS for other workers;
+    search itself does no I/O.
+    For IDF-weighted encoders, document frequencies are maintained per
+    dimension and row norms are recomputed lazily after changes.
+
+    From FEW_SHOT_ANN_MIN_EXAMPLES examples on (decided when the index is
+    loaded), vectors live instead in an IVF index memory-mapped from
+    FEW_SHOT_ANN_DIR; only example metadata stays in RAM. A saved build is
+    reused on restart and brought up to date from the change log; inserts and
+    deletes go to the IVF delta and are merged by a background rebuild.
+    IDF weights are frozen when the IVF index is first built.
+    """
+
+    def __init__(self, encoder=None, backend: Optional[str] = None):
+        """Initialize index.
+
+        Args:
+            encoder: Question encoder (created on first use when None)
+            backend: Backend to create the encoder for (default FEW_SHOT_EMBEDDING_BACKEND)
+        """
+        self._encoder = encoder
+        self._encoder_ready = encoder is not None
+        self._backend = backend
+        self._fuzzy_keys: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._conversation_codes = np.zeros(0, dtype=np.int64)
+        self._examples: List[Dict[str, Any]] = []
+        self._rows: Dict[int, int] = {}
+        self._conversations: Dict[str, int] = {}
+        self._df: Optional[np.ndarray] = None
+        self._idf: Optional[np.ndarray] = None
+        self._norms: Optional[np.ndarray] = None
+        self._epoch: Optional[str] = None
+        self._seq = 0
+        self._sync_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._ann: Optional[IVFIndex] = None
+        self._ann_weights: Optional[np.ndarray] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
+
+    @property
+    def encoder(self):
+        """Question encoder, or None for fuzzy matching."""
+        if not self._encoder_ready:
+            self._encoder = create_encoder(
+                self._backend or settings.few_shot_embedding_backend,
+                settings.few_shot_embedding_dim,
+                settings.few_shot_embedding_model,
+            )
+            self._encoder_ready = True
+        return self._encoder
+
+    def __len__(self) -> int:
+        return len(self._examples)
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the index has been loaded from the database."""
+        return self._epoch is not None
+
+    async def sync(self):
+        """Apply few_shot_examples changes made since the last sync."""
+        async with self._sync_lock:
+            while True:
+                epoch, seq, pruned_seq = await history_manager.get_few_shot_sync_state()
+                if epoch != self._epoch or self._seq < pruned_seq:
+                    # State is read before the rows, so changes racing the load are re-applied next time
+                    examples = await history_manager.list_few_shot_examples()
+                    if self._ann_enabled(len(examples)):
+                        self._seq = await self._load_ann(examples, epoch, seq, pruned_seq)
+                    else:
+                        self.load(examples)
+                        self._seq = seq
+                    self._epoch = epoch
+                if seq <= self._seq:
+                    break
+                changes = await history_manager.get_few_shot_changes(self._seq)
+                if changes is None:
+                    # Pruned past our seq since the state was read: reload
+                    continue
+                upserted, deleted, self._seq = changes
+                for example_id in deleted:
+                    self.remove(example_id)
+                for example in upserted:
+                    self.upsert(example)
+                break
+            if self._ann is not None:
+                self._schedule_rebuild()
+
+    def load(self, examples: List[Dict[str, Any]]):
+        """Replace the index contents with an exact (dense) index of the examples."""
+        vectors = self._encode([example["question"] for example in examples])
+        self._load_metadata(examples)
+        self._replace_ann(None)
+        self._matrix = np.zeros((max(len(examples) * 2, 1024), vectors.shape[1]), dtype=np.float32)
+        self._matrix[:len(examples)] = vectors
+        self._df = (vectors > 0).sum(axis=0).astype(np.float32)
+        self._idf = None
+        self._norms = None
+
+    def upsert(self, example: Dict[str, Any]):
+        """Add an example, or re-encode it if its id is already indexed."""
+        if self._ann is not None:
+            self._put_example(example)
+            self._ann.add(example["id"], self._ann_vectors([example["question"]])[0])
+            return
+        if self._matrix is None:
+            self.load([])
+        vector = self._encode([example["question"]])[0]
+        row = self._rows.get(example["id"])
+        if row is None:
+            row = len(self._examples)
+            if row == len(self._matrix):
+                grown = np.zeros((len(self._matrix) * 2, self._matrix.shape[1]), dtype=np.float32)
+                grown[:row] = self._matrix[:row]
+                self._matrix = grown
+        else:
+            self._df -= self._matrix[row] > 0
+        self._put_example(example)
+        self._matrix[row] = vector
+        self._df += vector > 0
+        self._idf = None
+        self._norms = None
+
+    def remove(self, example_id: int):
+        """Drop an example (no-op if it is not indexed)."""
+        row = self._rows.get(example_id)
+        if row is None:
+            return
+        if self._ann is not None:
+            self._ann.remove(example_id)
+        else:
+            self._df -= self._matrix[row] > 0
+            last = len(self._examples) - 1
+            self._matrix[row] = self._matrix[last]
+            self._matrix[last] = 0
+            self._idf = None
+            self._norms = None
+        self._drop_example(row)
+
+    def search(
+        self,
+        question: str,
+        top_k: int = 5,
+        min_similarity: float = 0.0,
+        exclude_conversation_id: Optional[str] = None,
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """Return the top_k most similar examples with their similarity, best first.
+
+        Similarity is the cosine of the question vectors, or the token-sort
+        ratio (0-1) when fuzzy matching.
+
+        Args:
+            question: Current user question
+            top_k: Number of examples to return
+            min_similarity: Minimum similarity
+            exclude_conversation_id: Skip examples from this conversation
+
+        Returns:
+            List of (example, similarity)
+        """
+        count = len(self._examples)
+        if count == 0 or top_k <= 0:
+            return []
+        if self._ann is not None:
+            return self._search_ann(question, top_k, min_similarity, exclude_conversation_id)
+        if self.encoder is None:
+            scores = process.cdist(
+                [_fuzzy_key(question)],
+                self._fuzzy_keys,
+                scorer=fuzz.ratio,
+                dtype=np.float32,
+                workers=-1,
+            )[0] / 100.0
+            return self._top_k(scores, top_k, min_similarity, exclude_conversation_id)
+
+        query = self.encoder.encode([question])[0]
+        matrix = self._matrix[:count]
+        if self.encoder.weighted:
+            weights = self._weights()
+            query = query * weights
+            query_norm = float(np.linalg.norm(query))
+            if query_norm == 0.0:
+                return []
+            scores = matrix @ (query * weights) / (self._row_norms(weights) * query_norm)
+        else:
+            scores = matrix @ query
+        return self._top_k(scores, top_k, min_similarity, exclude_conversation_id)
+
+    def _top_k(
+        self,
+        scores: np.ndarray,
+        top_k: int,
+        min_similarity: float,
+        exclude_conversation_id: Optional[str],
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """Select the best rows by score, skipping an excluded conversation."""
+        if exclude_conversation_id is not None and exclude_conversation_id in self._conversations:
+            scores[self._conversation_codes == self._conversations[exclude_conversation_id]] = -1.0
+
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (self._examples[row], float(scores[row]))
+            for row in top
+            if scores[row] >= min_similarity and scores[row] > -1.0
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return index size and sync position."""
+        return {
+            "examples": len(self._examples),
+            "capacity": 0 if self._matrix is None else len(self._matrix),
+            "dim": self.encoder.dim if self.encoder else 0,
+            "backend": self._backend or settings.few_shot_embedding_backend,
+            "epoch": self._epoch,
+            "seq": self._seq,
+            "ann": self._ann.stats() if self._ann is not None else None,
+        }
+
+    def start(self):
+        """Start the periodic re-sync loop (no-op when the interval is 0)."""
+        if settings.few_shot_sync_interval_seconds <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Cancel the re-sync loop and any running ANN rebuild."""
+        for task in (self._task, self._rebuild_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._rebuild_task = None
+
+    async def rebuild_ann(self):
+        """Merge pending IVF inserts/deletes into new inverted lists and persist them.
+
+        The build runs in a worker thread; changes applied meanwhile are
+        carried over to the new index before it replaces the current one.
+        """
+        ann = self._ann
+        if ann is None:
+            return
+        snapshot = ann.snapshot()
+        meta = {**ann.meta, "seq": self._seq}
+        new_ann = await asyncio.to_thread(self._rebuild_and_save, ann, snapshot, meta)
+        if self._ann is ann:
+            ann.carry_over(new_ann, snapshot)
+            self._replace_ann(new_ann)
+        else:
+            new_ann.close()
+
+    async def _loop(self):
+        """Sleep/sync loop; failures are logged, not raised."""
+        while True:
+            await asyncio.sleep(settings.few_shot_sync_interval_seconds)
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"⚠ Few-shot index sync failed: {e}")
+
+    def _load_metadata(self, examples: List[Dict[str, Any]]):
+        """Replace the example rows (questions, fuzzy keys, conversation codes)."""
+        self._examples = list(examples)
+        self._fuzzy_keys = [_fuzzy_key(example["question"]) for example in examples]
+        self._rows = {example["id"]: row for row, example in enumerate(examples)}
+        self._conversations = {}
+        self._conversation_codes = np.array(
+            [self._conversation_code(example.get("conversation_id")) for example in examples],
+            dtype=np.int64,
+        )
+
+    def _put_example(self, example: Dict[str, Any]) -> int:
+        """Append or replace an example's metadata row; returns the row."""
+        code = self._conversation_code(example.get("conversation_id"))
+        row = self._rows.get(example["id"])
+        if row is None:
+            row = len(self._examples)
+            self._examples.append(example)
+            self._fuzzy_keys.append(_fuzzy_key(example["question"]))
+            self._conversation_codes = np.append(self._conversation_codes, code)
+            self._rows[example["id"]] = row
+        else:
+            self._examples[row] = example
+            self._fuzzy_keys[row] = _fuzzy_key(example["question"])
+            self._conversation_codes[row] = code
+        return row
+
+    def _drop_example(self, row: int):
+        """Remove a metadata row, moving the last row into its place."""
+        del self._rows[self._examples[row]["id"]]
+        last = len(self._examples) - 1
+        if row != last:
+            self._examples[row] = self._examples[last]
+            self._fuzzy_keys[row] = self._fuzzy_keys[last]
+            self._conversation_codes[row] = self._conversation_codes[last]
+            self._rows[self._examples[row]["id"]] = row
+        self._examples.pop()
+        self._fuzzy_keys.pop()
+        self._conversation_codes = self._conversation_codes[:last]
+
+    def _ann_enabled(self, count: int) -> bool:
+        """Whether a load of `count` examples should use the IVF index."""
+        threshold = settings.few_shot_ann_min_examples
+        return threshold > 0 and count >= threshold and self.encoder is not None
+
+    def _encoder_signature(self) -> str:
+        """Identifies the vector space; a saved IVF build is only reused if it matches."""
+        backend = self._backend or settings.few_shot_embedding_backend
+        return f"{backend}:{self.encoder.dim}:{settings.few_shot_embedding_model}"
+
+    async def _load_ann(
+        self, examples: List[Dict[str, Any]], epoch: str, seq: int, pruned_seq: int
+    ) -> int:
+        """Open the saved IVF build for this epoch, or build one from all examples.
+
+        A saved build older than pruned_seq cannot be caught up from the change
+        log and is rebuilt. Searches keep using the current index while the
+        build runs; metadata, vectors and weights are swapped together after it.
+
+        Returns:
+            Change seq the vectors reflect (newer changes must be applied)
+        """
+        weights, ann, ann_seq = await asyncio.to_thread(
+            self._open_or_build_ann, examples, epoch, seq, pruned_seq
+        )
+        self._load_metadata(examples)
+        self._matrix = None
+        self._ann_weights = weights
+        self._replace_ann(ann)
+        return ann_seq
+
+    def _open_or_build_ann(
+        self, examples: List[Dict[str, Any]], epoch: str, seq: int, pruned_seq: int
+    ) -> Tuple[Optional[np.ndarray], IVFIndex, int]:
+        """Reuse a matching saved build or build one (runs in a worker thread).
+
+        Holding the build lock means workers starting together build once and
+        the others open that build.
+        """
+        signature = self._encoder_signature()
+        with build_lock(settings.few_shot_ann_dir):
+            ann = IVFIndex.open(settings.few_shot_ann_dir)
+            if (
+                ann is not None
+                and ann.meta.get("epoch") == epoch
+                and ann.meta.get("encoder") == signature
+                and ann.meta.get("seq", 0) >= pruned_seq
+            ):
+                weights = ann.meta.get("weights")
+                weights = np.array(weights, dtype=np.float32) if weights is not None else None
+                return weights, ann, ann.meta["seq"]
+            if ann is not None:
+                ann.close()
+            meta = {"epoch": epoch, "seq": seq, "encoder": signature}
+            weights, ann = self._build_ann(examples, meta)
+            return weights, ann, seq
+
+    def _build_ann(
+        self, examples: List[Dict[str, Any]], meta: Dict[str, Any]
+    ) -> Tuple[Optional[np.ndarray], IVFIndex]:
+        """Encode all examples into an on-disk staging matrix, build and publish an IVF index.
+
+        Caller holds the build lock.
+        """
+        weights = None
+        if self.encoder.weighted:
+            step = max(1, len(examples) // ANN_IDF_SAMPLE)
+            sample = self.encoder.encode([example["question"] for example in examples[::step]])
+            df = (sample > 0).sum(axis=0)
+            weights = (np.log((1.0 + len(sample)) / (1.0 + df)) + 1.0).astype(np.float32)
+        ids = np.array([example["id"] for example in examples], dtype=np.int64)
+        meta = {**meta, "weights": weights.tolist() if weights is not None else None}
+        with IVFBuild(settings.few_shot_ann_dir) as build:
+            vectors = build.staging(len(examples), self.encoder.dim)
+            for start in range(0, len(examples), ANN_ENCODE_BATCH):
+                batch = examples[start:start + ANN_ENCODE_BATCH]
+                vectors[start:start + len(batch)] = _unit_vectors(
+                    self.encoder.encode([e["question"] for e in batch]), weights
+                )
+            build.write(ids, vectors, meta=meta)
+            del vectors
+            return weights, build.publish()
+
+    def _rebuild_and_save(self, ann: IVFIndex, snapshot, meta: Dict[str, Any]) -> IVFIndex:
+        """Build merged inverted lists and publish them (runs in a worker thread)."""
+        with build_lock(settings.few_shot_ann_dir):
+            return ann.rebuilt(snapshot, settings.few_shot_ann_dir, meta=meta)
+
+    def _replace_ann(self, ann: Optional[IVFIndex]):
+        """Swap the IVF index, releasing the previous build so it can be cleaned up."""
+        if self._ann is not None and self._ann is not ann:
+            self._ann.close()
+        self._ann = ann
+
+    def _schedule_rebuild(self):
+        """Start a background rebuild once pending IVF changes exceed the rebuild ratio."""
+        limit = max(ANN_MIN_PENDING, settings.few_shot_ann_rebuild_ratio * len(self._ann.ids))
+        if self._rebuild_task is not None or self._ann.pending_changes() <= limit:
+            return
+        self._rebuild_task = asyncio.create_task(self._run_rebuild())
+
+    async def _run_rebuild(self):
+        """Background rebuild; failures are logged, not raised."""
+        try:
+            await self.rebuild_ann()
+        except Exception as e:
+            print(f"⚠ Few-shot ANN rebuild failed: {e}")
+        finally:
+            self._rebuild_task = None
+
+    def _ann_vectors(self, questions: List[str]) -> np.ndarray:
+        """Encode questions into the IVF vector space."""
+        return _unit_vectors(self.encoder.encode(questions), self._ann_weights)
+
+    def _search_ann(
+        self,
+        question: str,
+        top_k: int,
+        min_similarity: float,
+        exclude_conversation_id: Optional[str],
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """Approximate top-k from the IVF index."""
+        # Over-fetch so excluded examples do not leave the result short
+        k = top_k * 4 if exclude_conversation_id is not None else top_k
+        ids, scores = self._ann.search(
+            self._ann_vectors([question])[0], k, settings.few_shot_ann_nprobe
+        )
+        results = []
+        for example_id, score in zip(ids.tolist(), scores.tolist()):
+            row = self._rows.get(example_id)
+            if row is None or score < min_similarity:
+                continue
+            example = self._examples[row]
+            if exclude_conversation_id is not None and example.get("conversation_id") == exclude_conversation_id:
+                continue
+            results.append((example, score))
+            if len(results) == top_k:
+                break
+        return results
+
+    def _encode(self, questions: List[str]) -> np.ndarray:
+        """Encode questions (zero-width vectors when fuzzy matching)."""
+        if self.encoder is None:
+            return np.zeros((len(questions), 0), dtype=np.float32)
+        return self.encoder.encode(questions)
+
+    def _conversation_code(self, conversation_id: Optional[str]) -> int:
+        """Map a conversation id to a small int for vectorized exclusion."""
+        if conversation_id is None:
+            return -1
+        return self._conversations.setdefault(conversation_id, len(self._conversations))
+
+    def _weights(self) -> np.ndarray:
+        """Smoothed IDF per dimension (cached until the next change)."""
+        if self._idf is None:
+            count = len(self._examples)
+            self._idf = (np.log((1.0 + count) / (1.0 + self._df)) + 1.0).astype(np.float32)
+        return self._idf
+
+    def _row_norms(self, weights: np.ndarray) -> np.ndarray:
+        """Norms of the IDF-weighted rows (cached until the next change)."""
+        if self._norms is None:
+            matrix = self._matrix[:len(self._examples)]
+            norms = np.sqrt(np.einsum("ij,ij,j->i", matrix, matrix, weights * weights))
+            norms[norms == 0.0] = 1.0
+            self._norms = norms
+        return self._norms
+
+
+# Global few-shot example index
+few_shot_index = FewShotIndex()
@@ -1,84 +1,102 @@
 """Similar question search for few-shot learning."""
 from typing import List, Dict, Any, Optional
-import Levenshtein
-from ..database.history import history_manager
+from ..config import settings
+from ..tools.sql_normalizer import sql_skeleton
+from .few_shot_index import few_shot_index
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt token count (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def select_diverse_examples(
+    candidates: List[Dict[str, Any]],
+    max_examples: int,
+    token_budget: int = 0
+) -> List[Dict[str, Any]]:
+    """Pick the best example of each SQL skeleton within a token budget.
+
+    Candidates are grouped by sql_skeleton (the SQL with literals replaced by
+    placeholders), so near-duplicates that only differ in filter values take
+    a single prompt slot. Skeletons are taken in score order; an example that
+    would exceed the budget is skipped in favour of shorter ones.
+
+    Args:
+        candidates: Examples with question/sql/similarity_score, best first
+        max_examples: Maximum number of examples returned
+        token_budget: Estimated tokens the examples may use (0 = no limit)
+
+    Returns:
+        Selected examples, best first
+    """
+    selected = []
+    seen = set()
+    used = 0
+    for example in candidates:
+        if len(selected) >= max_examples:
+            break
+        skeleton = sql_skeleton(example["sql"])
+        if skeleton in seen:
+            continue
+        seen.add(skeleton)
+        cost = estimate_tokens(f"Question: {example['question']}\nSQL: {example['sql']}\n")
+        if token_budget and used + cost > token_budget:
+            continue
+        used += cost
+        selected.append(example)
+    return selected
 
 
 class HistorySearchService:
     """Service for finding similar past queries."""
-    
-    def _calculate_similarity(self, query1: str, query2: str) -> float:
-        """Calculate similarity score between two questions.
-        
-        Uses Levenshtein distance normalized to 0-1 range.
-        
-        Args:
-            query1: First question
-            query2: Second question
-            
-        Returns:
-            Similarity score (0.0 to 1.0, higher is more similar)
-        """
-        # Normalize strings
-        q1 = query1.lower().strip()
-        q2 = query2.lower().strip()
-        
-        # Calculate Levenshtein distance
-        distance = Levenshtein.distance(q1, q2)
-        max_len = max(len(q1), len(q2))
-        
-        if max_len == 0:
-            return 1.0
-        
-        # Convert to similarity score (0-1)
-        similarity = 1.0 - (distance / max_len)
-        return similarity
-    
+
     async def find_similar_queries(
         self,
         question: str,
         top_k: int = 5,
         min_similarity: float = 0.3,
-        exclude_conversation_id: Optional[str] = None
+        exclude_conversation_id: Optional[str] = None,
+        token_budget: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """Find similar questions from query history.
-        
+
+        Every liked example is scored in one batch by the in-memory
+        few_shot_index: cosine similarity of question embeddings, or a
+        token-sort ratio with FEW_SHOT_EMBEDDING_BACKEND=fuzzy. The index is
+        kept current by feedback and its sync loop, so this does no I/O once
+        it is loaded. The FEW_SHOT_CANDIDATES nearest examples are then
+        reduced by select_diverse_examples.
+
         Args:
             question: Current user question
             top_k: Number of similar examples to return
             min_similarity: Minimum similarity threshold
             exclude_conversation_id: Exclude queries from this conversation
-            
+            token_budget: Estimated example tokens (None = FEW_SHOT_TOKEN_BUDGET)
+
         Returns:
             List of similar query examples with similarity scores
         """
-        # Get liked messages (user-approved examples for few-shot learning)
-        past_queries = await history_manager.get_liked_messages(
-            limit=100,
-            exclude_conversation_id=exclude_conversation_id
-        )
-        
-        if not past_queries:
-            return []
-        
-        # Calculate similarity scores
-        scored_queries = []
-        for query in past_queries:
-            similarity = self._calculate_similarity(question, query["question"])
-            
-            if similarity >= min_similarity:
-                scored_queries.append({
-                    "question": query["question"],
-                    "sql": query["sql"],
-                    "intent": query["intent"],
-                    "similarity_score": similarity
-                })
-        
-        # Sort by similarity score (descending)
-        scored_queries.sort(key=lambda x: x["similarity_score"], reverse=True)
-        
-        # Return top-k results
-        return scored_queries[:top_k]
+        if not few_shot_index.loaded:
+            await few_shot_index.sync()
+        candidates = [
+            {
+                "question": example["question"],
+                "sql": example["sql"],
+                "intent": example["intent"],
+                "similarity_score": similarity
+            }
+            for example, similarity in few_shot_index.search(
+                question,
+                top_k=max(top_k, settings.few_shot_candidates),
+                min_similarity=min_similarity,
+                exclude_conversation_id=exclude_conversation_id
+            )
+        ]
+        if token_budget is None:
+            token_budget = settings.few_shot_token_budget
+        return select_diverse_examples(candidates, top_k, token_budget)
 
 
 # Global history search service instance
@@ -0,0 +1,341 @@
+"""Index recommendations for the target database from EXPLAIN QUERY PLAN."""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+import sqlparse
+from sqlparse.sql import Identifier, IdentifierList
+from sqlparse.tokens import Comment, Comparison, Keyword, Name, Whitespace
+from ..database.connection import target_db
+from ..database.history import history_manager
+from ..tools.sql_validator import sql_validator
+
+# Widest index we propose; wider "covering" candidates fall back to key columns only
+MAX_INDEX_COLUMNS = 6
+
+# Upper bound on recommendations considered by apply()
+MAX_RECOMMENDATIONS = 50
+
+# Relative cost of a temp B-tree (sort) compared to a full scan of the same table
+TEMP_BTREE_WEIGHT = 0.5
+
+_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?$")
+_AUTO_INDEX_RE = re.compile(
+    r"^SEARCH (?:TABLE )?(\w+)(?: AS (\w+))? USING AUTOMATIC (?:COVERING |PARTIAL )*INDEX \((.*)\)$"
+)
+_TEMP_BTREE_RE = re.compile(r"^USE TEMP B-TREE FOR (.+)$")
+
+_CLAUSE_KEYWORDS = {
+    "SELECT": "select",
+    "FROM": "from",
+    "JOIN": "from",
+    "INNER JOIN": "from",
+    "LEFT JOIN": "from",
+    "LEFT OUTER JOIN": "from",
+    "CROSS JOIN": "from",
+    "ON": "where",
+    "WHERE": "where",
+    "GROUP BY": "group",
+    "HAVING": "having",
+    "ORDER BY": "order",
+    "LIMIT": "limit",
+}
+_EQUALITY_OPERATORS = {"=", "==", "IN", "IS"}
+
+
+class IndexAdvisor:
+    """Proposes covering indexes for full scans and temp B-trees seen in query plans."""
+
+    async def explain(self, sql: str) -> List[str]:
+        """Run EXPLAIN QUERY PLAN and return the plan detail lines.
+
+        Args:
+            sql: SELECT statement
+
+        Returns:
+            Plan detail strings (e.g. 'SCAN v_staff_hr_format')
+        """
+        rows = await target_db.fetchall(f"EXPLAIN QUERY PLAN {sql.strip().rstrip(';')}")
+        return [row["detail"] for row in rows]
+
+    async def recommend(self, history_limit: int = 1000, top_k: int = 10) -> Dict[str, Any]:
+        """Aggregate plan problems across query_history into ranked index proposals.
+
+        Args:
+            history_limit: Number of distinct successful SQL statements to analyze
+            top_k: Maximum number of recommendations to return
+
+        Returns:
+            Dictionary with 'analyzed_queries' and ranked 'recommendations'
+        """
+        history = await history_manager.get_executed_sql_counts(limit=history_limit)
+
+        tables = await self._load_tables()
+        row_estimates: Dict[str, int] = {}
+        candidates: Dict[Tuple[str, Tuple[str, ...]], Dict[str, Any]] = {}
+        analyzed = 0
+
+        for entry in history:
+            sql = entry["sql"]
+            weight = entry["count"]
+            if not sql_validator.validate_sql(sql)["valid"]:
+                continue
+            try:
+                plan = await self.explain(sql)
+            except Exception:
+                # Statements referencing dropped tables/columns no longer plan
+                continue
+            analyzed += 1
+
+            usage = self._column_usage(sql, tables)
+            for table, problem in self._plan_problems(plan, usage["aliases"]).items():
+                columns = self._candidate_columns(usage["tables"].get(table))
+                if not columns:
+                    continue
+                if table not in row_estimates:
+                    row_estimates[table] = await self._estimate_rows(table)
+
+                rows = row_estimates[table]
+                benefit = rows * problem["full_scans"] + rows * TEMP_BTREE_WEIGHT * problem["temp_btrees"]
+                candidate = candidates.setdefault(
+                    (table, columns),
+                    {
+                        "table": table,
+                        "columns": list(columns),
+                        "occurrences": 0,
+                        "full_scans": 0,
+                        "temp_btrees": 0,
+                        "estimated_benefit": 0.0,
+                        "example_sql": sql,
+                    },
+                )
+                candidate["occurrences"] += weight
+                candidate["full_scans"] += problem["full_scans"] * weight
+                candidate["temp_btrees"] += problem["temp_btrees"] * weight
+                candidate["estimated_benefit"] += benefit * weight
+
+        existing = await self._existing_index_columns(list({t for t, _ in candidates}))
+        ranked = sorted(candidates.values(), key=lambda c: c["estimated_benefit"], reverse=True)
+
+        recommendations: List[Dict[str, Any]] = []
+        for candidate in ranked:
+            columns = candidate["columns"]
+            if any(cols[: len(columns)] == columns for cols in existing.get(candidate["table"], [])):
+                continue
+            # Fold candidates served by a wider, higher-ranked index on the same table
+            wider = next(
+                (
+                    r for r in recommendations
+                    if r["table"] == candidate["table"] and r["columns"][: len(columns)] == columns
+                ),
+                None,
+            )
+            if wider is not None:
+                for key in ("occurrences", "full_scans", "temp_btrees", "estimated_benefit"):
+                    wider[key] += candidate[key]
+                continue
+            candidate["name"] = self._index_name(candidate["table"], columns)
+            candidate["create_sql"] = self._create_sql(candidate["name"], candidate["table"], columns)
+            recommendations.append(candidate)
+
+        recommendations.sort(key=lambda c: c["estimated_benefit"], reverse=True)
+        return {
+            "analyzed_queries": analyzed,
+            "recommendations": recommendations[:top_k],
+        }
+
+    async def apply(self, names: Optional[List[str]] = None, history_limit: int = 1000) -> List[str]:
+        """Create recommended indexes in target.db.
+
+        Args:
+            names: Index names to create (default: every current recommendation)
+            history_limit: Number of distinct SQL statements to analyze
+
+        Returns:
+            Names of the indexes that were created
+        """
+        report = await self.recommend(history_limit=history_limit, top_k=MAX_RECOMMENDATIONS)
+        applied = []
+        for rec in report["recommendations"]:
+            if names is not None and rec["name"] not in names:
+                continue
+            await target_db.execute(rec["create_sql"])
+            await target_db.execute(f'ANALYZE "{rec["table"]}"')
+            applied.append(rec["name"])
+        return applied
+
+    async def _load_tables(self) -> Dict[str, List[str]]:
+        """Map each real table in target.db to its column names."""
+        rows = await target_db.fetchall(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        )
+        tables = {}
+        for row in rows:
+            info = await target_db.fetchall(f'PRAGMA table_info("{row["name"]}")')
+            tables[row["name"]] = [col["name"] for col in info]
+        return tables
+
+    async def _estimate_rows(self, table: str) -> int:
+        """Estimate table size, preferring ANALYZE statistics over COUNT(*)."""
+        try:
+            row = await target_db.fetchone(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1",
+                (table,),
+            )
+            if row and row["stat"]:
+                return int(str(row["stat"]).split()[0])
+        except Exception:
+            # sqlite_stat1 only exists after ANALYZE
+            pass
+        row = await target_db.fetchone(f'SELECT COUNT(*) AS n FROM "{table}"')
+        return max(int(row["n"]), 1) if row else 1
+
+    async def _existing_index_columns(self, tables: List[str]) -> Dict[str, List[List[str]]]:
+        """Return the column lists of indexes already present on each table."""
+        existing: Dict[str, List[List[str]]] = {}
+        for table in tables:
+            existing[table] = []
+            for index in await target_db.fetchall(f'PRAGMA index_list("{table}")'):
+                info = await target_db.fetchall(f'PRAGMA index_info("{index["name"]}")')
+                existing[table].append([col["name"] for col in info])
+        return existing
+
+    def _plan_problems(self, plan: List[str], aliases: Dict[str, str]) -> Dict[str, Dict[str, int]]:
+        """Attribute full scans, automatic indexes and temp B-trees to tables."""
+        problems: Dict[str, Dict[str, int]] = {}
+        scanned: List[str] = []
+
+        for detail in plan:
+            scan = _SCAN_RE.match(detail) or _AUTO_INDEX_RE.match(detail)
+            if scan:
+                name = scan.group(2) or scan.group(1)
+                table = aliases.get(name, scan.group(1))
+                problems.setdefault(table, {"full_scans": 0, "temp_btrees": 0})["full_scans"] += 1
+                scanned.append(table)
+            elif _TEMP_BTREE_RE.match(detail) and scanned:
+                # Sorting applies to the outermost scanned table in practice
+                problems[scanned[0]]["temp_btrees"] += 1
+
+        return problems
+
+    def _column_usage(self, sql: str, tables: Dict[str, List[str]]) -> Dict[str, Any]:
+        """Classify referenced columns per table by the clause they appear in.
+
+        Returns:
+            {'aliases': {alias: table}, 'tables': {table: {'eq', 'range', 'group', 'order', 'other'}}}
+        """
+        statement = sqlparse.parse(sql.strip().rstrip(";"))[0]
+        aliases: Dict[str, str] = {}
+        self._collect_aliases(statement, tables, aliases, in_from=False)
+        from_tables = list(dict.fromkeys(aliases.values()))
+
+        usage: Dict[str, Dict[str, List[str]]] = {
+            t: {"eq": [], "range": [], "group": [], "order": [], "other": [], "star": []}
+            for t in from_tables
+        }
+
+        tokens = [
+            tok for tok in statement.flatten()
+            if tok.ttype not in Whitespace and tok.ttype not in Comment
+        ]
+        clause = None
+        for i, tok in enumerate(tokens):
+            upper = " ".join(tok.value.upper().split())
+            if tok.ttype in Keyword and upper in _CLAUSE_KEYWORDS:
+                clause = _CLAUSE_KEYWORDS[upper]
+                continue
+            if tok.value == "*" and clause == "select":
+                for t in from_tables:
+                    usage[t]["star"].append("*")
+                continue
+            # Columns such as "section" or "alias" are lexed as keywords
+            is_column_keyword = tok.ttype in Keyword and any(tok.value in tables[t] for t in from_tables)
+            if (tok.ttype not in Name and not is_column_keyword) or clause in (None, "from", "limit"):
+                continue
+            if i + 1 < len(tokens) and tokens[i + 1].value in (".", "("):
+                continue  # qualifier or function name
+
+            qualifier = None
+            if i >= 2 and tokens[i - 1].value == "." and tokens[i - 2].ttype in Name:
+                qualifier = tokens[i - 2].value
+            owner = self._resolve_owner(tok.value, qualifier, aliases, from_tables, tables)
+            if owner is None:
+                continue
+
+            bucket = "other"
+            if clause == "where":
+                op = tokens[i + 1] if i + 1 < len(tokens) else None
+                op_value = " ".join(op.value.upper().split()) if op is not None else ""
+                if op is not None and (op.ttype in Comparison or op.ttype in Keyword):
+                    bucket = "eq" if op_value in _EQUALITY_OPERATORS else "range"
+                else:
+                    bucket = "range"
+            elif clause in ("group", "order"):
+                bucket = clause
+            columns = usage[owner][bucket]
+            if tok.value not in columns:
+                columns.append(tok.value)
+
+        return {"aliases": aliases, "tables": usage}
+
+    def _collect_aliases(self, token, tables, aliases, in_from):
+        """Walk the parse tree recording table names and aliases in FROM/JOIN clauses."""
+        for child in getattr(token, "tokens", []):
+            if child.ttype in Keyword:
+                upper = " ".join(child.value.upper().split())
+                if upper in _CLAUSE_KEYWORDS:
+                    in_from = _CLAUSE_KEYWORDS[upper] == "from"
+                continue
+            if in_from and isinstance(child, (Identifier, IdentifierList)):
+                identifiers = child.get_identifiers() if isinstance(child, IdentifierList) else [child]
+                for ident in identifiers:
+                    if not isinstance(ident, Identifier):
+                        continue
+                    real = ident.get_real_name()
+                    if real in tables:
+                        aliases[ident.get_alias() or real] = real
+                        aliases.setdefault(real, real)
+                    else:
+                        self._collect_aliases(ident, tables, aliases, in_from=False)
+            elif child.is_group:
+                self._collect_aliases(child, tables, aliases, in_from=False)
+
+    def _resolve_owner(self, column, qualifier, aliases, from_tables, tables) -> Optional[str]:
+        """Find which FROM table a column reference belongs to."""
+        if qualifier is not None:
+            table = aliases.get(qualifier)
+            return table if table and column in tables[table] else None
+        owners = [t for t in from_tables if column in tables[t]]
+        return owners[0] if len(owners) == 1 else None
+
+    def _candidate_columns(self, usage: Optional[Dict[str, List[str]]]) -> Tuple[str, ...]:
+        """Order index columns: equality, GROUP BY, ORDER BY, one range, then covering extras."""
+        if not usage:
+            return ()
+
+        key: List[str] = []
+        for col in usage["eq"] + usage["group"] + usage["order"] + usage["range"][:1]:
+            if col not in key:
+                key.append(col)
+        if not key:
+            return ()
+
+        covering = list(key)
+        if not usage["star"]:
+            for col in usage["range"][1:] + usage["other"]:
+                if col not in covering:
+                    covering.append(col)
+        if len(covering) <= MAX_INDEX_COLUMNS and not usage["star"]:
+            return tuple(covering)
+        return tuple(key[:MAX_INDEX_COLUMNS])
+
+    def _index_name(self, table: str, columns: List[str]) -> str:
+        """Build a deterministic index name."""
+        return f"idx_advisor_{table}_{'_'.join(columns)}"[:120]
+
+    def _create_sql(self, name: str, table: str, columns: List[str]) -> str:
+        """Build the CREATE INDEX statement for a recommendation."""
+        cols = ", ".join(f'"{c}"' for c in columns)
+        return f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({cols})'
+
+
+# Global index advisor instance
+index_advisor = IndexAdvisor()
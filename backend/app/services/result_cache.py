@@ -0,0 +1,98 @@
+"""In-memory LRU cache for SQL execution results."""
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from ..config import settings
+
+
+class ResultCache:
+    """Byte-bounded LRU cache of successful query results.
+
+    Entries are keyed by the caller (canonical SQL + target data version) and
+    sized by their JSON encoding, which is also what ends up in history.db.
+    """
+
+    def __init__(self, max_bytes: int):
+        """Initialize result cache.
+
+        Args:
+            max_bytes: Upper bound on the total size of cached results
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Look up a cached result and mark it as most recently used.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Shallow copy of the cached result or None on miss
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        result, size = entry
+        self.hits += 1
+        self.bytes_saved += size
+        return dict(result)
+
+    def put(self, key: Hashable, result: Dict[str, Any]) -> bool:
+        """Store a result, evicting least recently used entries as needed.
+
+        Args:
+            key: Cache key
+            result: Execution result dictionary
+
+        Returns:
+            True if the result was cached, False if it is larger than the cache
+        """
+        size = len(json.dumps(result, default=str))
+        if size > self.max_bytes:
+            return False
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+
+        self._entries[key] = (dict(result), size)
+        self._bytes += size
+
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+        return True
+
+    def clear(self):
+        """Drop all entries (stats are kept)."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+# Global result cache instance
+result_cache = ResultCache(settings.result_cache_max_bytes)
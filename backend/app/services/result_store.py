@@ -0,0 +1,205 @@
+"""Server-side materialized result sets with keyset pagination."""
+import json
+import time
+import uuid
+from typing import Any, Dict, Optional
+from ..database.connection import results_db
+from ..database.history import history_manager
+from ..config import settings
+
+# Minimum seconds between expired-result purges
+PURGE_INTERVAL_SECONDS = 3600
+
+
+class ResultStore:
+    """Spills executed query results to results.db and serves them page by page.
+
+    Rows are numbered 0..total-1 and keyed by (result_id, row_num), so a page
+    request is an index seek on the primary key regardless of its position.
+    results.db is a cache: history.db keeps every row of a message's result, and
+    pages of expired sets are served from there.
+    """
+
+    def __init__(self):
+        self._initialized = False
+        self._last_purge = 0.0
+
+    async def init(self):
+        """Create result tables if needed."""
+        await results_db.execute("""
+            CREATE TABLE IF NOT EXISTS result_sets (
+                id TEXT PRIMARY KEY,
+                columns_json TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        await results_db.execute("""
+            CREATE TABLE IF NOT EXISTS result_rows (
+                result_id TEXT NOT NULL,
+                row_num INTEGER NOT NULL,
+                row_json TEXT NOT NULL,
+                PRIMARY KEY (result_id, row_num)
+            ) WITHOUT ROWID
+        """)
+        await results_db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_result_sets_created
+            ON result_sets(created_at)
+        """)
+        self._initialized = True
+
+    async def save(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Materialize a result larger than one page and trim it to the first page.
+
+        Results that fit in one page are returned as they are, without touching
+        results.db.
+
+        Args:
+            result: Execution result with 'rows' and 'columns'
+
+        Returns:
+            Copy of the result holding only the first page plus total 'count',
+            'has_more' and, when materialized, 'result_id'
+        """
+        rows = result.get("rows", []) or []
+        page_size = settings.result_page_size
+        if len(rows) <= page_size:
+            return {**result, "count": len(rows), "result_id": None, "has_more": False}
+
+        if not self._initialized:
+            await self.init()
+        await self._maybe_purge()
+
+        result_id = str(uuid.uuid4())
+        async with results_db.transaction() as conn:
+            await conn.execute(
+                "INSERT INTO result_sets (id, columns_json, total) VALUES (?, ?, ?)",
+                (result_id, json.dumps(result.get("columns", []) or []), len(rows)),
+            )
+            await conn.executemany(
+                "INSERT INTO result_rows (result_id, row_num, row_json) VALUES (?, ?, ?)",
+                ((result_id, i, json.dumps(row, default=str)) for i, row in enumerate(rows)),
+            )
+
+        return {
+            **result,
+            "rows": rows[:page_size],
+            "count": len(rows),
+            "result_id": result_id,
+            "has_more": True,
+        }
+
+    def first_page(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Trim a full stored result to its first page (the rest is paged by result_id)."""
+        rows = result.get("rows", []) or []
+        if len(rows) <= settings.result_page_size:
+            return result
+        return {**result, "rows": rows[:settings.result_page_size], "has_more": True}
+
+    async def get_page(
+        self,
+        result_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Fetch one page of a materialized result.
+
+        Args:
+            result_id: Result set ID
+            offset: Row number to start from (use 'next_offset' of the previous page)
+            limit: Page size (default from config, capped by max_result_page_size)
+
+        Returns:
+            Page dictionary or None if the result set does not exist
+        """
+        if not self._initialized:
+            await self.init()
+
+        offset = max(offset, 0)
+        limit = min(max(limit or settings.result_page_size, 1), settings.max_result_page_size)
+        header = await results_db.fetchone(
+            "SELECT columns_json, total FROM result_sets WHERE id = ?",
+            (result_id,),
+        )
+        if not header:
+            return await self._page_from_history(result_id, offset, limit)
+
+        rows = await results_db.fetchall(
+            """
+            SELECT row_num, row_json FROM result_rows
+            WHERE result_id = ? AND row_num >= ?
+            ORDER BY row_num
+            LIMIT ?
+            """,
+            (result_id, offset, limit),
+        )
+
+        total = header["total"]
+        next_offset = rows[-1]["row_num"] + 1 if rows else offset
+        has_more = next_offset < total
+        return {
+            "result_id": result_id,
+            "columns": json.loads(header["columns_json"]),
+            "rows": [json.loads(r["row_json"]) for r in rows],
+            "offset": offset,
+            "limit": limit,
+            "total": total,
+            "next_offset": next_offset if has_more else None,
+            "has_more": has_more,
+        }
+
+    async def _page_from_history(self, result_id: str, offset: int, limit: int) -> Optional[Dict[str, Any]]:
+        """Serve a page of an expired result set from the full result kept in history.db."""
+        result = await history_manager.get_result_by_id(result_id)
+        if result is None:
+            return None
+        rows = result.get("rows", []) or []
+        next_offset = min(offset + limit, len(rows))
+        has_more = next_offset < len(rows)
+        return {
+            "result_id": result_id,
+            "columns": result.get("columns", []) or [],
+            "rows": rows[offset:next_offset],
+            "offset": offset,
+            "limit": limit,
+            "total": len(rows),
+            "next_offset": next_offset if has_more else None,
+            "has_more": has_more,
+        }
+
+    async def purge_expired(self) -> int:
+        """Delete result sets older than result_store_ttl_hours.
+
+        Returns:
+            Number of result sets deleted
+        """
+        if settings.result_store_ttl_hours <= 0:
+            return 0
+        if not self._initialized:
+            await self.init()
+
+        modifier = f"-{int(settings.result_store_ttl_hours)} hours"
+        await results_db.execute(
+            """
+            DELETE FROM result_rows WHERE result_id IN (
+                SELECT id FROM result_sets WHERE created_at < datetime('now', ?)
+            )
+            """,
+            (modifier,),
+        )
+        cur = await results_db.execute(
+            "DELETE FROM result_sets WHERE created_at < datetime('now', ?)",
+            (modifier,),
+        )
+        return getattr(cur, "rowcount", 0)
+
+    async def _maybe_purge(self):
+        """Purge expired results at most once per PURGE_INTERVAL_SECONDS."""
+        now = time.monotonic()
+        if now - self._last_purge >= PURGE_INTERVAL_SECONDS:
+            self._last_purge = now
+            await self.purge_expired()
+
+
+# Global result store instance
+result_store = ResultStore()
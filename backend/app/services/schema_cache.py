@@ -0,0 +1,111 @@
+"""Compiled registry schema cache for prompt building."""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from ..config import settings
+from ..database.history import history_manager
+from ..database.schema import schema_manager
+
+
+class CompiledSchemaCache:
+    """Caches compiled schema dicts and prompt text per (table set, registry version).
+
+    The registry version is bumped by triggers on every definition or business
+    context change, so a lookup costs one point query plus a dict lookup; all
+    active definitions are decoded once per version instead of per request.
+    Reloading the schema file (schema_manager.clear_cache) also invalidates it
+    while the file's business_context is in use.
+    Cached values are shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """Initialize schema cache.
+
+        Args:
+            max_entries: Compiled table sets kept per registry version
+        """
+        self.max_entries = max_entries
+        self._version: Optional[Tuple[str, int]] = None
+        self._definitions: Dict[str, Dict[str, Any]] = {}
+        self._business_context: Dict[str, Any] = {}
+        # Schema file dict whose business_context is used (no registry context saved)
+        self._file_schema: Optional[Dict[str, Any]] = None
+        self._compiled: "OrderedDict[Hashable, Optional[Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, target_tables: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Return {"text", "dict"} built from the registry, or None if nothing matches.
+
+        Args:
+            target_tables: Tables to include (in order); all active tables when empty
+
+        Returns:
+            Compiled schema, or None when the registry has no matching active table
+        """
+        version = await history_manager.get_registry_version()
+        file_changed = (
+            self._file_schema is not None and schema_manager.load_schema() is not self._file_schema
+        )
+        if version != self._version or file_changed:
+            await self._load(version)
+
+        key = tuple(dict.fromkeys(target_tables)) if target_tables else None
+        if key in self._compiled:
+            self.hits += 1
+            self._compiled.move_to_end(key)
+            return self._compiled[key]
+
+        self.misses += 1
+        compiled = self._compile(list(key) if key else sorted(self._definitions))
+        self._compiled[key] = compiled
+        while len(self._compiled) > self.max_entries:
+            self._compiled.popitem(last=False)
+        return compiled
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters."""
+        return {
+            "version": list(self._version) if self._version else None,
+            "entries": len(self._compiled),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    async def _load(self, version: Tuple[str, int]):
+        """Decode all active definitions and business context for a new version."""
+        definitions = await history_manager.list_table_definitions(active_only=True)
+        business_context, explicit = await history_manager.get_registry_business_context()
+        self._file_schema = None
+        if not explicit:
+            self._file_schema = schema_manager.load_schema()
+            business_context = self._file_schema.get("business_context") or {}
+        self._definitions = {td["table_name"]: td for td in definitions}
+        self._business_context = business_context
+        self._compiled.clear()
+        self._version = version
+
+    def _compile(self, table_names: List[str]) -> Optional[Dict[str, Any]]:
+        """Build the schema dict and prompt text for the given tables."""
+        registry_defs = [self._definitions[name] for name in table_names if name in self._definitions]
+        if not registry_defs:
+            return None
+        schema_dict = {
+            "tables": [
+                {
+                    "name": td["table_name"],
+                    "columns": td.get("columns", []) or [],
+                }
+                for td in registry_defs
+            ],
+            "relationships": [
+                r
+                for td in registry_defs
+                for r in (td.get("relationships", []) or [])
+            ],
+            "business_context": self._business_context,
+        }
+        return {"text": schema_manager.format_schema_as_text(schema_dict), "dict": schema_dict}
+
+
+# Global compiled schema cache instance
+schema_cache = CompiledSchemaCache(settings.schema_cache_max_entries)
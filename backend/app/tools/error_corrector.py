@@ -1,6 +1,7 @@
 """Error correction tool using LLM."""
 from typing import Dict, Any, List
 from ..services.llm_gateway.factory import LLMProviderFactory
+from ..database.engines.factory import ExecutionEngineFactory
 from ..config import settings
 
 
@@ -19,7 +20,8 @@ class ErrorCorrector:
         error_message: str,
         schema: str,
         conversation_history: List[Dict[str, str]] = None,
-        retry_count: int = 0
+        retry_count: int = 0,
+        intent: str = None
     ) -> Dict[str, str]:
         """Correct a failed SQL query.
         
@@ -30,6 +32,7 @@ class ErrorCorrector:
             schema: Database schema
             conversation_history: Conversation context
             retry_count: Current retry attempt number
+            intent: Detected intent (selects the SQL dialect)
             
         Returns:
             Dictionary with corrected 'sql' and 'explanation'
@@ -40,7 +43,8 @@ class ErrorCorrector:
             error_message=error_message,
             schema=schema,
             conversation_history=conversation_history,
-            retry_count=retry_count
+            retry_count=retry_count,
+            intent=intent
         )
         
         response_schema = {
@@ -63,7 +67,8 @@ class ErrorCorrector:
         error_message: str,
         schema: str,
         conversation_history: List[Dict[str, str]] = None,
-        retry_count: int = 0
+        retry_count: int = 0,
+        intent: str = None
     ) -> str:
         """Build error correction prompt.
         
@@ -74,6 +79,7 @@ class ErrorCorrector:
             schema: Database schema
             conversation_history: Conversation context
             retry_count: Retry attempt
+            intent: Detected intent
             
         Returns:
             Formatted prompt
@@ -88,6 +94,8 @@ class ErrorCorrector:
             context = self.llm.format_conversation_history(conversation_history)
             prompt += f"{context}\n"
         
+        engine_class = ExecutionEngineFactory.engine_class_for_intent(intent)
+
         # Add error details
         prompt += f"""Original question: "{question}"
 
@@ -106,7 +114,7 @@ Analyze the error and generate a corrected SQL query following these rules:
 2. Only query tables and columns that exist in the schema
 3. Fix the specific error mentioned in the error message
 4. Maintain the intent of the original query
-5. Use proper SQL syntax (SQLite flavor)
+5. Use proper SQL syntax ({engine_class.dialect} flavor). {engine_class.dialect_notes}
 
 Common error fixes:
 - Column not found: Check column names in schema
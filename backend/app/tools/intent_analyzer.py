@@ -1,9 +1,11 @@
 """Intent analysis tool using LLM Gateway."""
+import asyncio
 from typing import Dict, Any, List, Optional, Tuple
 from ..services.llm_gateway.factory import LLMProviderFactory
 from ..config import settings
 from ..constants import INTENT_TYPES
 from ..database.history import history_manager
+from .table_matcher import TableMatcher
 
 
 class IntentAnalyzer:
@@ -13,6 +15,8 @@ class IntentAnalyzer:
         self.llm = LLMProviderFactory.get_provider(
             model_tier="thinking"  # Use accurate model for intent analysis
         )
+        # Compiled table matchers keyed by active_only, rebuilt when the registry version changes
+        self._matchers: Dict[bool, TableMatcher] = {}
     
     async def analyze_intent(
         self,
@@ -59,42 +63,12 @@ class IntentAnalyzer:
 
         Hybrid approach:
         - Heuristic matching using registered `table_name`, `columns`, and `tags`
+          (one pass of a TableMatcher compiled per registry version)
         - LLM fallback only when heuristic confidence is low.
         """
-        table_defs = await history_manager.list_table_definitions(active_only=active_only)
-        question_l = (question or "").lower()
-
-        scored: List[Tuple[float, str, List[str]]] = []
-        for td in table_defs:
-            table_name = td.get("table_name")
-            if not table_name:
-                continue
-
-            table_l = str(table_name).lower()
-            score = 0.0
-            reasons: List[str] = []
-
-            if table_l and table_l in question_l:
-                score += 3.0
-                reasons.append(f"table_name_match:{table_name}")
-
-            for col in td.get("columns", []) or []:
-                col_name = (col.get("name") if isinstance(col, dict) else None) or None
-                if not col_name:
-                    continue
-                col_l = str(col_name).lower()
-                if col_l in question_l:
-                    score += 1.0
-                    reasons.append(f"column_match:{col_name}")
-
-            for tag in td.get("tags", []) or []:
-                tag_l = str(tag).lower()
-                if tag_l and tag_l in question_l:
-                    score += 0.5
-                    reasons.append(f"tag_match:{tag}")
-
-            if score > 0:
-                scored.append((score, table_name, reasons))
+        matcher = await self.get_table_matcher(active_only)
+        table_defs = matcher.definitions
+        scored: List[Tuple[float, str, List[str]]] = matcher.match(question)
 
         if not scored:
             # No heuristic matches at all; avoid network calls unless explicitly allowed.
@@ -110,7 +84,6 @@ class IntentAnalyzer:
             if not settings.gemini_api_key:
                 return heuristic
         else:
-            scored.sort(key=lambda x: x[0], reverse=True)
             best_score = scored[0][0]
             confidence = min(1.0, best_score / 4.0)  # table_name(3) + column(1) => 1.0
             target_tables = [t for _, t, _ in scored[:top_k]]
@@ -162,7 +135,6 @@ Return:
         except Exception:
             # Safe fallback: if LLM fails, return the heuristic result we computed above.
             if scored:
-                scored.sort(key=lambda x: x[0], reverse=True)
                 return {
                     "target_tables": [t for _, t, _ in scored[:top_k]],
                     "confidence": min(0.5, scored[0][0] / 4.0),
@@ -183,6 +155,27 @@ Return:
             "matched_reasons": result.get("matched_reasons", []) or [],
         }
     
+    async def get_table_matcher(self, active_only: bool = True) -> TableMatcher:
+        """Return the table matcher for the current registry version.
+
+        Costs one registry version lookup while the registry is unchanged;
+        definitions are reloaded and the automaton recompiled only after a change.
+
+        Args:
+            active_only: Match only active table definitions
+
+        Returns:
+            Compiled matcher (shared; treat as read-only)
+        """
+        version = await history_manager.get_registry_version()
+        matcher = self._matchers.get(active_only)
+        if matcher is None or matcher.version != version:
+            definitions = await history_manager.list_table_definitions(active_only=active_only)
+            # Compiling is CPU-bound (about 0.5 s for 2,000 tables); keep it off the event loop
+            matcher = await asyncio.to_thread(TableMatcher, definitions, version)
+            self._matchers[active_only] = matcher
+        return matcher
+
     def _build_prompt(
         self,
         question: str,
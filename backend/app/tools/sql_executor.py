@@ -1,51 +1,85 @@
 """SQL execution tool with safety limits."""
 import asyncio
-from typing import Dict, Any, List
-from ..database.connection import target_db
+from typing import Dict, Any, List, Optional
+from ..database.engines.factory import ExecutionEngineFactory
+from ..services.admission import admission_controller, AdmissionRejected
+from ..services.result_cache import result_cache
 from ..config import settings
+from .sql_normalizer import canonicalize_sql
+from .sql_rewriter import sql_rewriter
 
 
 class SQLExecutor:
     """Executes SQL queries with safety limits."""
     
-    async def execute_query(self, sql: str) -> Dict[str, Any]:
+    async def execute_query(
+        self,
+        sql: str,
+        intent: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        lane: str = "interactive",
+    ) -> Dict[str, Any]:
         """Execute SQL query with timeout and row limits.
         
         Args:
             sql: Validated SQL query to execute
+            intent: Detected intent, used to pick the execution engine
+            conversation_id: Conversation issuing the query (admission fairness)
+            lane: Admission priority lane, 'interactive' or 'batch' (evals, scripts)
             
         Returns:
             Dictionary with execution result or error
         """
         try:
+            engine = ExecutionEngineFactory.get_engine_for_intent(intent)
+
             # Add LIMIT clause if not present (safety measure)
             sql_with_limit = self._ensure_limit(sql)
+
+            # Answer hot COUNT aggregations from the summary tables in target.db
+            if settings.enable_summary_tables and engine.name == "sqlite":
+                sql_with_limit = sql_rewriter.rewrite(sql_with_limit) or sql_with_limit
+
+            # Serve repeated queries from memory while the engine's data is unchanged
+            cache_key = None
+            if settings.enable_result_cache:
+                cache_key = (
+                    engine.name,
+                    canonicalize_sql(sql_with_limit),
+                    await engine.data_version(),
+                )
+                cached = result_cache.get(cache_key)
+                if cached is not None:
+                    return cached
             
-            # Execute with timeout
-            rows = await asyncio.wait_for(
-                target_db.fetchall(sql_with_limit),
-                timeout=settings.query_timeout_seconds
-            )
-            
-            # Convert rows to list of dicts
-            results = []
-            columns = []
-            
-            if rows:
-                # Get column names from first row
-                columns = list(rows[0].keys())
-                
-                # Convert each row
-                for row in rows:
-                    results.append(dict(row))
+            cost_class = "light"
+            if settings.enable_admission_control:
+                cost_class = await admission_controller.classify(sql_with_limit, engine.name)
+
+            # Execute with timeout once admitted; wait_for returns only after the
+            # engine has interrupted the query, so the slot is never freed early
+            async with admission_controller.admit(cost_class, conversation_id, lane):
+                columns, results = await asyncio.wait_for(
+                    engine.fetch(sql_with_limit, cost_class),
+                    timeout=settings.query_timeout_seconds
+                )
             
-            return {
+            result = {
                 "success": True,
                 "rows": results,
                 "count": len(results),
                 "columns": columns
             }
+            if cache_key is not None:
+                result_cache.put(cache_key, result)
+            return result
             
+        except AdmissionRejected as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "error_type": "admission_rejected"
+            }
         except asyncio.TimeoutError:
             return {
                 "success": False,
@@ -59,6 +93,14 @@ class SQLExecutor:
                 "error_type": type(e).__name__
             }
     
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return result cache statistics."""
+        return result_cache.stats()
+
+    def admission_stats(self) -> Dict[str, Any]:
+        """Return admission controller load and counters."""
+        return admission_controller.stats()
+
     def _ensure_limit(self, sql: str) -> str:
         """Ensure SQL has a LIMIT clause for safety.
         
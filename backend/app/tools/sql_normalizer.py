@@ -0,0 +1,136 @@
+"""SQL canonicalization helpers shared by caching and history features."""
+from typing import List, Optional
+import sqlparse
+from sqlparse.tokens import Comment, Keyword, Name, Number, String, Whitespace
+
+
+def canonicalize_sql(sql: str) -> str:
+    """Return a canonical form of a SQL statement for use as a lookup key.
+
+    Two statements that only differ in whitespace, keyword/function case,
+    comments, a trailing semicolon or the spelling of numeric literals
+    (``010`` vs ``10``, ``1.50`` vs ``1.5``) map to the same string.
+    Identifiers and string literals are kept verbatim because they change
+    the result. Unaliased expression columns are labelled by SQLite from the
+    original text, so a cached result keeps the labels of the first query.
+
+    Args:
+        sql: SQL query
+
+    Returns:
+        Canonical SQL string
+    """
+    tokens = _significant_tokens(sql)
+    parts = []
+    for i, token in enumerate(tokens):
+        value = token.value
+        if _is_case_insensitive(tokens, i):
+            value = " ".join(value.upper().split())
+        elif token.ttype in Number.Integer:
+            value = str(int(value))
+        elif token.ttype in Number.Float:
+            value = repr(float(value))
+        parts.append(value)
+    return " ".join(parts)
+
+
+def sql_skeleton(sql: str) -> str:
+    """Return the template of a SQL statement with its literals as placeholders.
+
+    Like canonicalize_sql, but every number and string literal becomes ``?``
+    and a run of placeholders in an ``IN (...)`` or ``VALUES (...)`` list
+    collapses to one, so queries that only differ in the values they filter
+    on share a skeleton. Function arguments keep one ``?`` each
+    (``substr(x, 1, 3)`` and ``substr(x, 1)`` differ).
+
+    Args:
+        sql: SQL query
+
+    Returns:
+        Skeleton string ("" for an empty statement)
+    """
+    tokens = _significant_tokens(sql)
+    parts: List[str] = []
+    # One entry per open parenthesis: "IN" / "VALUES" for a literal list, else None
+    lists: List[Optional[str]] = []
+    closed = None  # Kind of the parenthesis closed last (a "," after a VALUES row opens another)
+    for i, token in enumerate(tokens):
+        if token.ttype in Number or token.ttype in String.Single:
+            if lists and lists[-1] and parts[-2:] == ["?", ","]:
+                parts.pop()
+                continue
+            parts.append("?")
+            continue
+        if token.value == "(":
+            previous = parts[-1].split(" ")[-1] if parts else ""
+            if previous in ("IN", "VALUES"):
+                lists.append(previous)
+            else:
+                lists.append("VALUES" if previous == "," and closed == "VALUES" else None)
+        elif token.value == ")":
+            closed = lists.pop() if lists else None
+        elif token.ttype in Keyword:
+            closed = None
+            if lists:
+                lists[-1] = None  # A subquery, not a literal list
+        if _is_case_insensitive(tokens, i):
+            parts.append(" ".join(token.value.upper().split()))
+        else:
+            parts.append(token.value)
+    return " ".join(parts)
+
+
+def _significant_tokens(sql: str) -> list:
+    """Flattened tokens of one statement without whitespace and comments."""
+    statement = sql.strip().rstrip(";").strip()
+    if not statement:
+        return []
+    return [
+        token
+        for token in sqlparse.parse(statement)[0].flatten()
+        if token.ttype not in Whitespace and token.ttype not in Comment
+    ]
+
+
+def _is_case_insensitive(tokens: list, i: int) -> bool:
+    """Keywords and function names are case-insensitive."""
+    next_value = tokens[i + 1].value if i + 1 < len(tokens) else ""
+    return tokens[i].ttype in Keyword or (tokens[i].ttype in Name and next_value == "(")
+
+
+def extract_table_names(sql: str) -> List[str]:
+    """Return table names referenced after FROM/JOIN, in order of appearance.
+
+    Args:
+        sql: SQL query
+
+    Returns:
+        Distinct table names (quotes stripped)
+    """
+    statement = sql.strip().rstrip(";").strip()
+    if not statement:
+        return []
+
+    tables: List[str] = []
+    in_from = False       # Inside a FROM/JOIN list (commas introduce more tables)
+    expect_table = False  # Next identifier is a table name
+    for token in sqlparse.parse(statement)[0].flatten():
+        if token.ttype in Whitespace or token.ttype in Comment:
+            continue
+        if token.ttype in Keyword:
+            word = token.normalized.upper()
+            if word == "FROM" or word.endswith("JOIN"):
+                in_from = expect_table = True
+            elif word != "AS":
+                in_from = expect_table = False
+            continue
+        if expect_table and (token.ttype in Name or token.ttype in String.Symbol):
+            name = token.value.strip('"`[]')
+            if name not in tables:
+                tables.append(name)
+            expect_table = False
+        elif token.value == ",":
+            expect_table = in_from
+        elif token.value in ("(", ")"):
+            in_from = expect_table = False
+    return tables
@@ -0,0 +1,187 @@
+"""Rewrite COUNT aggregations over the staff table onto summary tables."""
+from typing import Dict, List, Optional, Set, Tuple
+import sqlparse
+from sqlparse.tokens import Comment, Keyword, Literal, Name, Punctuation, Whitespace, Wildcard
+from ..database.summaries import SUMMARY_COUNT_COLUMN, SUMMARY_SOURCE_TABLE, summary_manager
+
+# Aggregates other than COUNT would need the raw rows
+_OTHER_AGGREGATES = {"SUM", "AVG", "MIN", "MAX", "TOTAL", "GROUP_CONCAT", "STRING_AGG"}
+
+# Constructs we never rewrite (multiple sources, row-level semantics, windows)
+_REJECTED_KEYWORDS = {"UNION", "INTERSECT", "EXCEPT", "WITH", "DISTINCT", "OVER", "WINDOW", "VALUES"}
+
+_CLAUSES_AFTER_FROM = {"WHERE", "GROUP BY", "HAVING", "ORDER BY", "LIMIT"}
+
+
+def _unquote(value: str) -> str:
+    """Strip identifier quotes and lowercase."""
+    if len(value) >= 2 and value[0] in "\"`[" and value[-1] in "\"`]":
+        value = value[1:-1]
+    return value.lower()
+
+
+def _is_identifier(token) -> bool:
+    return token.ttype in Name or token.ttype in Literal.String.Symbol
+
+
+def _is_keyword(token, *words: str) -> bool:
+    return token is not None and token.ttype in Keyword and token.normalized.upper() in words
+
+
+class SQLRewriter:
+    """Routes matching aggregate queries to incrementally maintained summaries.
+
+    A query is rewritten only when it reads the staff table alone, its only
+    aggregate is COUNT(*) / COUNT(1), and every column it references is a key
+    column of one summary table. COUNT(*) then becomes the sum of the summary's
+    row counts, which yields identical groups, filters, HAVING and ORDER BY.
+    """
+
+    def rewrite(self, sql: str) -> Optional[str]:
+        """Return an equivalent query over a summary table, or None.
+
+        Args:
+            sql: Validated SELECT statement
+
+        Returns:
+            Rewritten SQL, or None when no summary table can answer the query
+        """
+        if not summary_manager.summaries:
+            return None
+
+        statements = [s for s in sqlparse.parse(sql.strip().rstrip(";")) if s.value.strip()]
+        if len(statements) != 1:
+            return None
+        tokens = list(statements[0].flatten())
+        sig = [t for t in tokens if not (t.ttype in Whitespace or t.ttype in Comment)]
+
+        from_pos = self._check_shape(sig)
+        if from_pos is None:
+            return None
+
+        # FROM <table> [[AS] alias]
+        if _unquote(sig[from_pos + 1].value) != SUMMARY_SOURCE_TABLE:
+            return None
+        source_names = {SUMMARY_SOURCE_TABLE}
+        end_of_from = from_pos + 2
+        if _is_keyword(self._at(sig, end_of_from), "AS"):
+            end_of_from += 1
+        alias_token = self._at(sig, end_of_from)
+        if alias_token is not None and _is_identifier(alias_token):
+            source_names.add(_unquote(alias_token.value))
+            end_of_from += 1
+        following = self._at(sig, end_of_from)
+        if following is not None and not _is_keyword(following, *_CLAUSES_AFTER_FROM):
+            return None
+
+        aliases = {
+            _unquote(token.value)
+            for prev, token in zip(sig, sig[1:])
+            if _is_keyword(prev, "AS") and _is_identifier(token)
+        }
+        columns = {c.lower() for c in summary_manager.source_columns}
+
+        referenced: Set[str] = set()
+        count_spans: List[Tuple[int, int]] = []
+        pos = 1
+        while pos < len(sig):
+            if from_pos < pos < end_of_from:
+                pos += 1
+                continue
+            token = sig[pos]
+            nxt = self._at(sig, pos + 1)
+            if _is_identifier(token):
+                name = _unquote(token.value)
+                if nxt is not None and nxt.value == "(":
+                    upper = token.value.upper()
+                    if upper in _OTHER_AGGREGATES:
+                        return None
+                    if upper == "COUNT":
+                        arg, close = self._at(sig, pos + 2), self._at(sig, pos + 3)
+                        if arg is None or close is None or close.value != ")":
+                            return None
+                        if not (arg.ttype in Wildcard or arg.value == "1"):
+                            return None
+                        count_spans.append((pos, pos + 3))
+                        pos += 4
+                        continue
+                elif nxt is not None and nxt.ttype in Punctuation and nxt.value == ".":
+                    if name not in source_names:
+                        return None
+                elif name in columns:
+                    referenced.add(name)
+                elif name not in aliases:
+                    return None
+            elif token.ttype in Keyword and token.value.lower() in columns:
+                # Keyword-named columns (e.g. section, alias)
+                referenced.add(token.value.lower())
+            pos += 1
+
+        if not count_spans or SUMMARY_COUNT_COLUMN in aliases:
+            return None
+        summary = summary_manager.find_summary(referenced)
+        if summary is None:
+            return None
+        return self._render(tokens, sig, from_pos, summary["table"], count_spans)
+
+    def _check_shape(self, sig) -> Optional[int]:
+        """Return the FROM position of a single plain SELECT, else None."""
+        if not sig or not _is_keyword(sig[0], "SELECT"):
+            return None
+        from_pos = None
+        for pos, token in enumerate(sig):
+            if token.ttype not in Keyword:
+                continue
+            word = token.normalized.upper()
+            if (word == "SELECT" and pos > 0) or "JOIN" in word or word in _REJECTED_KEYWORDS:
+                return None
+            if word == "FROM":
+                if from_pos is not None:
+                    return None
+                from_pos = pos
+        if from_pos is None or from_pos + 1 >= len(sig):
+            return None
+        return from_pos
+
+    def _at(self, sig, pos: int):
+        """Significant token at pos, or None past the end."""
+        return sig[pos] if 0 <= pos < len(sig) else None
+
+    def _render(self, tokens, sig, from_pos: int, summary_table: str, count_spans) -> Optional[str]:
+        """Emit the rewritten SQL, keeping original COUNT labels in the select list."""
+        replacements: Dict[int, Tuple[int, str]] = {}  # id(start token) -> (id(end token), text)
+        for start, end in count_spans:
+            original = "".join(t.value for t in tokens[tokens.index(sig[start]):tokens.index(sig[end]) + 1])
+            text = f'COALESCE(SUM("{SUMMARY_COUNT_COLUMN}"), 0)'
+            if start < from_pos:
+                prev, nxt = sig[start - 1], self._at(sig, end + 1)
+                bare_item = (prev.value == "," or _is_keyword(prev, "SELECT")) and (
+                    nxt is not None and (nxt.value == "," or _is_keyword(nxt, "FROM"))
+                )
+                if bare_item:
+                    # SQLite labels unaliased columns with their source text
+                    text += ' AS "{}"'.format(original.replace('"', '""'))
+                elif not _is_keyword(nxt, "AS"):
+                    # COUNT inside an unaliased expression: the column label would change
+                    return None
+            replacements[id(sig[start])] = (id(sig[end]), text)
+
+        out = []
+        skipping_to = None
+        for token in tokens:
+            if skipping_to is not None:
+                if id(token) == skipping_to:
+                    skipping_to = None
+                continue
+            if id(token) in replacements:
+                skipping_to, text = replacements[id(token)]
+                out.append(text)
+            elif _is_identifier(token) and _unquote(token.value) == SUMMARY_SOURCE_TABLE:
+                out.append(f'"{summary_table}"')
+            else:
+                out.append(token.value)
+        return "".join(out)
+
+
+# Global SQL rewriter instance
+sql_rewriter = SQLRewriter()
@@ -1,6 +1,7 @@
 """SQL generation tool using LLM Gateway with few-shot learning."""
 from typing import Dict, Any, List
 from ..services.llm_gateway.factory import LLMProviderFactory
+from ..database.engines.factory import ExecutionEngineFactory
 from ..config import settings
 
 
@@ -87,7 +88,7 @@ class SQLWriter:
         # Add few-shot examples
         if similar_examples:
             prompt += "Here are some similar examples:\n\n"
-            for i, example in enumerate(similar_examples[:3], 1):  # Limit to top 3
+            for i, example in enumerate(similar_examples[:settings.few_shot_max_examples], 1):
                 prompt += f"Example {i}:\n"
                 prompt += f"Question: {example['question']}\n"
                 prompt += f"SQL: {example['sql']}\n\n"
@@ -96,13 +97,15 @@ class SQLWriter:
         if intent:
             prompt += f"Detected intent: {intent}\n\n"
         
+        engine_class = ExecutionEngineFactory.engine_class_for_intent(intent)
+
         # Add current question and instructions
         prompt += f"""Current question: "{question}"
 
 Generate a SQL query for this question following these rules:
 1. ONLY use SELECT statements (no UPDATE, DELETE, INSERT, etc.)
 2. Only query tables and columns that exist in the schema
-3. Use proper SQL syntax (SQLite flavor)
+3. Use proper SQL syntax ({engine_class.dialect} flavor). {engine_class.dialect_notes}
 4. Include appropriate WHERE, JOIN, GROUP BY, ORDER BY clauses as needed
 5. Use LIMIT to restrict results if appropriate
 6. Consider the conversation context when generating the query
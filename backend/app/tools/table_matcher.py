@@ -0,0 +1,126 @@
+"""Multi-pattern table matcher for registry-based table detection."""
+from collections import deque
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+# Score contributed by each kind of match
+TABLE_NAME_WEIGHT = 3.0
+COLUMN_WEIGHT = 1.0
+TAG_WEIGHT = 0.5
+
+
+class TableMatcher:
+    """Aho-Corasick automaton over table names, column names and tags.
+
+    Every lowercased name in the registry becomes one pattern of a single
+    automaton, so a question is scored against all tables in one pass over
+    its characters instead of one substring check per table, column and tag.
+    Matching is plain substring containment, as before: a pattern counts once
+    per question however often it occurs. Build one per registry version and
+    treat it as read-only.
+    """
+
+    def __init__(self, definitions: List[Dict[str, Any]], version: Optional[Hashable] = None):
+        """Compile the automaton.
+
+        Args:
+            definitions: Table definitions (list_table_definitions)
+            version: Registry version the definitions were read at
+        """
+        self.definitions = definitions
+        self.version = version
+        self.table_names: List[str] = []
+        # Per pattern id: (table index, weight, position in the table's reasons, reason)
+        self._entries: List[List[Tuple[int, float, int, str]]] = []
+        self._pattern_ids: Dict[str, int] = {}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for td in definitions:
+            table_name = td.get("table_name")
+            if not table_name:
+                continue
+            table = len(self.table_names)
+            self.table_names.append(table_name)
+            position = 0
+            patterns = [(str(table_name), TABLE_NAME_WEIGHT, f"table_name_match:{table_name}")]
+            for col in td.get("columns", []) or []:
+                col_name = col.get("name") if isinstance(col, dict) else None
+                if col_name:
+                    patterns.append((str(col_name), COLUMN_WEIGHT, f"column_match:{col_name}"))
+            for tag in td.get("tags", []) or []:
+                patterns.append((str(tag), TAG_WEIGHT, f"tag_match:{tag}"))
+            for text, weight, reason in patterns:
+                if text:
+                    self._entries[self._add_pattern(text.lower())].append((table, weight, position, reason))
+                    position += 1
+        self._link()
+
+    def __len__(self) -> int:
+        return len(self.table_names)
+
+    def match(self, question: str) -> List[Tuple[float, str, List[str]]]:
+        """Score every table whose name, columns or tags occur in the question.
+
+        Args:
+            question: User question
+
+        Returns:
+            (score, table_name, reasons) for matching tables, best first
+            (registry order among equal scores)
+        """
+        found = set()
+        node = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for char in (question or "").lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+
+        scores: Dict[int, float] = {}
+        reasons: Dict[int, List[Tuple[int, str]]] = {}
+        for pattern_id in found:
+            for table, weight, position, reason in self._entries[pattern_id]:
+                scores[table] = scores.get(table, 0.0) + weight
+                reasons.setdefault(table, []).append((position, reason))
+        return [
+            (scores[table], self.table_names[table], [reason for _, reason in sorted(reasons[table])])
+            for table in sorted(scores, key=lambda t: (-scores[t], t))
+        ]
+
+    def _add_pattern(self, text: str) -> int:
+        """Insert a pattern into the trie and return its id."""
+        pattern_id = self._pattern_ids.get(text)
+        if pattern_id is not None:
+            return pattern_id
+        node = 0
+        for char in text:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][char] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = child
+        pattern_id = len(self._entries)
+        self._pattern_ids[text] = pattern_id
+        self._entries.append([])
+        self._output[node].append(pattern_id)
+        return pattern_id
+
+    def _link(self):
+        """Compute failure links breadth-first and merge suffix outputs."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                if self._output[self._fail[child]]:
+                    self._output[child] = self._output[child] + self._output[self._fail[child]]
+                queue.append(child)
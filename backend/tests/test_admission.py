@@ -0,0 +1,143 @@
+"""Tests for query admission control."""
+import asyncio
+
+import pytest
+
+from app.database.connection import DatabaseManager, ReadConnectionPool
+from app.services import admission as admission_mod
+from app.services.admission import AdmissionController, AdmissionRejected
+
+
+async def _seed_target(db: DatabaseManager, rows: int):
+    await db.execute("CREATE TABLE v_staff_hr_format (id INTEGER PRIMARY KEY, emp_no TEXT, division TEXT)")
+    await db.executemany(
+        "INSERT INTO v_staff_hr_format (emp_no, division) VALUES (?, ?)",
+        [(str(i), f"div {i % 4}") for i in range(rows)],
+    )
+    await db.execute("ANALYZE")
+
+
+def test_classify_uses_query_plan_and_table_size(monkeypatch, tmp_path):
+    target = DatabaseManager(str(tmp_path / "target.db"))
+    monkeypatch.setattr(admission_mod, "target_light_pool", ReadConnectionPool(target.db_path, 1))
+    monkeypatch.setattr(admission_mod.settings, "admission_light_scan_rows", 100)
+    controller = AdmissionController(max_heavy=1)
+
+    async def run():
+        await _seed_target(target, 500)
+        return (
+            await controller.classify("SELECT emp_no FROM v_staff_hr_format WHERE id = 3"),
+            await controller.classify("SELECT division, COUNT(*) FROM v_staff_hr_format GROUP BY division"),
+            await controller.classify("SELECT 1", engine_name="duckdb"),
+        )
+
+    lookup, aggregate, other_engine = asyncio.run(run())
+
+    assert lookup == "light"
+    assert aggregate == "heavy"
+    assert other_engine == "heavy"
+
+
+def test_heavy_queries_are_served_by_lane_then_conversation_fairness():
+    controller = AdmissionController(max_heavy=1, max_per_conversation=1, queue_timeout=5)
+    order = []
+
+    async def query(name, conversation_id, lane="interactive"):
+        async with controller.admit("heavy", conversation_id, lane):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        blocker = asyncio.create_task(query("a1", "a"))
+        await asyncio.sleep(0)
+        tasks = [
+            asyncio.create_task(query("batch", "c", lane="batch")),
+            asyncio.create_task(query("a2", "a")),
+            asyncio.create_task(query("b1", "b")),
+        ]
+        await asyncio.sleep(0)
+        light_started = asyncio.get_running_loop().time()
+        async with controller.admit("light", "z"):
+            light_wait = asyncio.get_running_loop().time() - light_started
+        await asyncio.gather(blocker, *tasks)
+        return light_wait
+
+    light_wait = asyncio.run(run())
+
+    assert order == ["a1", "a2", "b1", "batch"]
+    assert light_wait < 0.005
+    assert controller.stats()["running_heavy"] == 0
+    assert controller.stats()["admitted_heavy"] == 4
+
+
+def test_per_conversation_limit_lets_other_conversations_through():
+    controller = AdmissionController(max_heavy=2, max_per_conversation=1, queue_timeout=5)
+    order = []
+
+    async def query(name, conversation_id):
+        async with controller.admit("heavy", conversation_id):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(query("a1", "a"), query("a2", "a"), query("b1", "b"))
+
+    asyncio.run(run())
+
+    assert order[:2] == ["a1", "b1"]
+
+
+def test_heavy_query_is_rejected_after_queue_deadline():
+    controller = AdmissionController(max_heavy=1, queue_timeout=0.01)
+
+    async def run():
+        async with controller.admit("heavy", "a"):
+            with pytest.raises(AdmissionRejected):
+                async with controller.admit("heavy", "b"):
+                    pass
+
+    asyncio.run(run())
+
+    stats = controller.stats()
+    assert stats["rejected"] == 1
+    assert stats["running_heavy"] == 0
+    assert stats["queued"] == {"interactive": 0, "batch": 0}
+
+
+def test_light_query_runs_while_heavy_query_is_interrupted_on_timeout(tmp_path):
+    target = DatabaseManager(str(tmp_path / "target.db"))
+    light_pool = ReadConnectionPool(target.db_path, 1)
+    heavy_pool = ReadConnectionPool(target.db_path, 1)
+    controller = AdmissionController(max_heavy=1, queue_timeout=5)
+    slow_sql = (
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) "
+        "SELECT COUNT(*) FROM n"
+    )
+
+    async def heavy():
+        async with controller.admit("heavy", "a"):
+            await asyncio.wait_for(heavy_pool.fetchall(slow_sql), timeout=0.3)
+
+    async def run():
+        await _seed_target(target, 10)
+        heavy_task = asyncio.create_task(heavy())
+        await asyncio.sleep(0.05)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        rows = await light_pool.fetchall("SELECT emp_no FROM v_staff_hr_format WHERE id = 3")
+        light_elapsed = loop.time() - started
+        with pytest.raises(asyncio.TimeoutError):
+            await heavy_task
+        # The interrupted connection is idle and usable again
+        after = await heavy_pool.fetchall("SELECT COUNT(*) AS n FROM v_staff_hr_format")
+        await light_pool.close()
+        await heavy_pool.close()
+        await target.close()
+        return rows, light_elapsed, after
+
+    rows, light_elapsed, after = asyncio.run(run())
+
+    assert rows[0]["emp_no"] == "2"
+    assert light_elapsed < 0.2
+    assert after[0]["n"] == 10
+    assert controller.stats()["running_heavy"] == 0
@@ -0,0 +1,159 @@
+"""Tests for the IVF approximate nearest-neighbor index."""
+import asyncio
+
+import numpy as np
+
+from app.database.history import history_manager
+from app.services import few_shot_index as few_shot_index_mod
+from app.services.ann_index import IVFBuild, IVFIndex, normalize_rows, recall_at_k
+from app.services.embeddings import HashedNgramEncoder
+from app.services.few_shot_index import FewShotIndex
+
+
+def _clustered(count: int, dim: int = 32, seed: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = normalize_rows(rng.normal(size=(50, dim)).astype(np.float32))
+    noise = 0.05 * rng.normal(size=(count, dim)).astype(np.float32)
+    return normalize_rows(centers[rng.integers(0, 50, count)] + noise)
+
+
+def _publish(directory, ids, vectors, meta=None) -> IVFIndex:
+    with IVFBuild(str(directory)) as build:
+        build.write(ids, vectors, meta=meta)
+        return build.publish()
+
+
+def test_search_recall_against_exact_top_k(tmp_path):
+    vectors = _clustered(5000)
+    index = _publish(tmp_path, np.arange(5000), vectors)
+    queries = vectors[:50]
+
+    approximate = [index.search(q, 10, nprobe=8)[0] for q in queries]
+    exact = [np.argsort(-(vectors @ q))[:10] for q in queries]
+
+    assert recall_at_k(approximate, exact) >= 0.9
+
+
+def test_saved_index_is_memory_mapped_and_keeps_results(tmp_path):
+    vectors = _clustered(2000)
+    _publish(tmp_path, np.arange(100, 2100), vectors, meta={"seq": 7}).close()
+    _publish(tmp_path, np.arange(100, 2100), vectors, meta={"seq": 7}).close()
+
+    opened = IVFIndex.open(str(tmp_path))
+
+    assert isinstance(opened.vectors, np.memmap)
+    assert opened.meta == {"seq": 7}
+    assert len(list(tmp_path.glob("build-*"))) == 1
+    assert opened.search(vectors[5], 1)[0].tolist() == [105]
+    assert IVFIndex.open(str(tmp_path / "missing")) is None
+
+
+def test_builds_in_use_by_other_workers_are_not_deleted(tmp_path):
+    vectors = _clustered(500)
+    ids = np.arange(500)
+    # Another worker still reads the first build and is writing a new one
+    held = _publish(tmp_path, ids, vectors)
+    in_progress = IVFBuild(str(tmp_path))
+    unused = _publish(tmp_path, ids, vectors)
+    unused.close()
+
+    latest = _publish(tmp_path, ids, vectors)
+
+    assert held.path.exists()
+    assert in_progress.path.exists()
+    assert not unused.path.exists()
+    assert held.search(vectors[7], 1)[0].tolist() == [7]
+    assert IVFIndex.open(str(tmp_path)).path == latest.path
+    assert not list(tmp_path.glob("CURRENT.*"))
+
+    held.close()
+    with in_progress:
+        pass
+    _publish(tmp_path, ids, vectors).close()
+    assert not held.path.exists()
+    assert not in_progress.path.exists()
+
+
+def test_delta_tombstones_and_rebuild_carry_over(tmp_path):
+    vectors = _clustered(1000)
+    index = _publish(tmp_path / "base", np.arange(1000), vectors)
+
+    index.remove(3)
+    index.add(4, vectors[10])
+    index.add(5000, vectors[20])
+    snapshot = index.snapshot()
+    rebuilt = index.rebuilt(snapshot, str(tmp_path))
+    # Changes made while the rebuild ran
+    index.remove(5000)
+    index.add(6000, vectors[30])
+    index.carry_over(rebuilt, snapshot)
+
+    for ann in (index, rebuilt):
+        found = ann.search(vectors[3], 1000, nprobe=len(ann.centroids))[0].tolist()
+        assert 3 not in found and 5000 not in found
+        assert ann.search(vectors[10], 2, nprobe=len(ann.centroids))[0].tolist()[:2].count(4) == 1
+        assert 6000 in ann.search(vectors[30], 3, nprobe=len(ann.centroids))[0].tolist()
+        assert len(ann) == 1000
+
+
+def test_few_shot_index_switches_to_persisted_ann(monkeypatch, tmp_path):
+    monkeypatch.setattr(few_shot_index_mod.settings, "few_shot_ann_min_examples", 2)
+    monkeypatch.setattr(few_shot_index_mod.settings, "few_shot_ann_dir", str(tmp_path))
+
+    async def like(conversation_id: str, question: str, sql: str):
+        await history_manager.create_conversation(conversation_id)
+        await history_manager.save_message(conversation_id, "user", question)
+        message_id = await history_manager.save_message(conversation_id, "assistant", "answer", sql=sql)
+        await history_manager.set_feedback_by_message_id(message_id, "like")
+
+    async def run():
+        await history_manager.reset_database()
+        await like("c1", "How many employees per department?", "SELECT 1")
+        await like("c2", "Average salary by job title", "SELECT 2")
+        index = FewShotIndex(HashedNgramEncoder(dim=256))
+        await index.sync()
+        await like("c3", "List employees hired in 2023", "SELECT 3")
+        await index.sync()
+        restarted = FewShotIndex(HashedNgramEncoder(dim=256))
+        await restarted.sync()
+        return index, restarted
+
+    index, restarted = asyncio.run(run())
+
+    for ann_index in (index, restarted):
+        assert ann_index.stats()["ann"] is not None
+        assert ann_index.search("employees hired in 2023", top_k=1)[0][0]["sql"] == "SELECT 3"
+        excluded = ann_index.search("salary by title", top_k=3, exclude_conversation_id="c2")
+        assert "SELECT 2" not in [example["sql"] for example, _ in excluded]
+    assert restarted.stats()["ann"]["vectors"] == 2  # Saved build reused, c3 applied from the change log
+
+
+def test_ann_load_keeps_serving_the_previous_index_until_swapped(monkeypatch, tmp_path):
+    monkeypatch.setattr(few_shot_index_mod.settings, "few_shot_ann_min_examples", 2)
+    monkeypatch.setattr(few_shot_index_mod.settings, "few_shot_ann_dir", str(tmp_path))
+    index = FewShotIndex(HashedNgramEncoder(dim=256))
+    searched_during_build = []
+    open_or_build = index._open_or_build_ann
+
+    def open_or_build_while_searching(*args):
+        # Runs in the worker thread while sync() awaits it
+        searched_during_build.append(index.search("employees per department", top_k=1))
+        return open_or_build(*args)
+
+    monkeypatch.setattr(index, "_open_or_build_ann", open_or_build_while_searching)
+
+    async def run():
+        await history_manager.reset_database()
+        for conversation_id, question in (("c1", "Employees per department"), ("c2", "Salary by title")):
+            await history_manager.create_conversation(conversation_id)
+            await history_manager.save_message(conversation_id, "user", question)
+            message_id = await history_manager.save_message(conversation_id, "assistant", "answer", sql="SELECT 1")
+            await history_manager.set_feedback_by_message_id(message_id, "like")
+        index.load(await history_manager.list_few_shot_examples())
+        await index.sync()
+
+    asyncio.run(run())
+
+    assert searched_during_build[0][0][0]["question"] == "Employees per department"
+    assert index.stats()["ann"] is not None
+    assert index.search("salary by title", top_k=1)[0][0]["question"] == "Salary by title"
@@ -32,7 +32,7 @@ def test_chat_stream_reaches_complete_event(monkeypatch):
     async def fake_generate_sql(question, schema, conversation_history=None, similar_examples=None, intent=None):
         return {"sql": "SELECT id FROM products WHERE price > 100", "explanation": "filter products by price"}
 
-    async def fake_execute_query(sql):
+    async def fake_execute_query(sql, intent=None, conversation_id=None):
         return {
             "success": True,
             "rows": [{"id": 1}],
@@ -0,0 +1,79 @@
+"""Tests for ETag / Last-Modified on conversation endpoints."""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.database.connection import history_db
+from app.database.history import history_manager
+from app.main import app
+
+
+def _seed() -> int:
+    async def run():
+        await history_manager.reset_database()
+        await history_manager.create_conversation("c1")
+        await history_manager.save_message("c1", "user", "How many staff?")
+        return await history_manager.save_message("c1", "assistant", "42", sql="SELECT COUNT(*) FROM t")
+
+    return asyncio.run(run())
+
+
+def test_conversation_etag_changes_with_messages_and_feedback():
+    message_id = _seed()
+    client = TestClient(app)
+
+    first = client.get("/api/conversations/c1")
+    etag = first.headers["etag"]
+    unchanged = client.get("/api/conversations/c1", headers={"If-None-Match": etag})
+    by_date = client.get(
+        "/api/conversations/c1", headers={"If-Modified-Since": first.headers["last-modified"]}
+    )
+
+    asyncio.run(history_manager.set_feedback_by_message_id(message_id, "like"))
+    after_feedback = client.get("/api/conversations/c1", headers={"If-None-Match": etag})
+
+    asyncio.run(history_manager.save_message("c1", "user", "And per division?"))
+    after_message = client.get(
+        "/api/conversations/c1", headers={"If-None-Match": after_feedback.headers["etag"]}
+    )
+
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "no-cache"
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+    assert by_date.status_code == 304
+    assert after_feedback.status_code == 200
+    assert after_feedback.json()["messages"][1]["feedback"] == "like"
+    assert after_message.status_code == 200
+    assert len(after_message.json()["messages"]) == 3
+
+
+def test_conversation_list_etag():
+    _seed()
+    client = TestClient(app)
+
+    first = client.get("/api/conversations")
+    unchanged = client.get("/api/conversations", headers={"If-None-Match": first.headers["etag"]})
+    other_page = client.get(
+        "/api/conversations", params={"limit": 1}, headers={"If-None-Match": first.headers["etag"]}
+    )
+    asyncio.run(history_manager.create_conversation("c2"))
+    after_create = client.get("/api/conversations", headers={"If-None-Match": first.headers["etag"]})
+
+    assert unchanged.status_code == 304
+    assert other_page.status_code == 200
+    assert after_create.status_code == 200
+    assert after_create.json()["count"] == 2
+
+
+def test_conversation_list_etag_changes_within_the_same_second():
+    _seed()
+    client = TestClient(app)
+
+    first = client.get("/api/conversations")
+    # Same count and same updated_at second, but the title shown in the sidebar changed
+    asyncio.run(history_db.execute("UPDATE conversations SET title = 'Renamed' WHERE id = 'c1'"))
+    after_rename = client.get("/api/conversations", headers={"If-None-Match": first.headers["etag"]})
+
+    assert after_rename.status_code == 200
+    assert after_rename.json()["conversations"][0]["title"] == "Renamed"
@@ -0,0 +1,96 @@
+"""Tests for the write-through conversation context cache."""
+import asyncio
+
+from app.database import history as history_mod
+from app.database.context_cache import ConversationContextCache
+from app.database.history import history_manager
+
+
+def test_context_is_served_write_through_from_cache(monkeypatch):
+    cache = ConversationContextCache(max_conversations=8, max_messages=4)
+    monkeypatch.setattr(history_mod, "context_cache", cache)
+
+    async def run():
+        await history_manager.reset_database()
+        await history_manager.create_conversation("c1")
+        for i in range(3):
+            await history_manager.save_message("c1", "user", f"q{i}")
+            await history_manager.save_message(
+                "c1", "assistant", f"a{i}", sql="SELECT 1", result={"rows": [{"x": 1}], "count": 1}
+            )
+        return await history_manager.get_context_messages("c1", 3)
+
+    context = asyncio.run(run())
+
+    assert context == [
+        {"role": "assistant", "content": "a1"},
+        {"role": "user", "content": "q2"},
+        {"role": "assistant", "content": "a2"},
+    ]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 0
+
+
+def test_cache_miss_loads_projection_and_matches_database(monkeypatch):
+    cache = ConversationContextCache(max_conversations=1, max_messages=4)
+    monkeypatch.setattr(history_mod, "context_cache", cache)
+
+    async def run():
+        await history_manager.reset_database()
+        for conversation_id in ("c1", "c2"):
+            await history_manager.create_conversation(conversation_id)
+            for i in range(3):
+                await history_manager.save_message(conversation_id, "user", f"{conversation_id} q{i}")
+        # c1 was evicted by c2 (capacity 1)
+        first = await history_manager.get_context_messages("c1", 2)
+        second = await history_manager.get_context_messages("c1", 2)
+        too_many = await history_manager.get_context_messages("c1", 10)
+        return first, second, too_many
+
+    first, second, too_many = asyncio.run(run())
+
+    assert first == second == [
+        {"role": "user", "content": "c1 q1"},
+        {"role": "user", "content": "c1 q2"},
+    ]
+    assert len(too_many) == 3
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_fill_is_skipped_when_a_write_raced_the_read():
+    cache = ConversationContextCache(max_messages=4)
+    seen = cache.write_seq()
+    cache.append("c1", 2, "user", "new message")
+
+    cache.fill("c1", [{"id": 1, "role": "user", "content": "old"}], seen)
+
+    assert cache.get("c1", 4, [1]) is None
+
+
+def test_messages_written_by_another_worker_invalidate_the_entry(monkeypatch):
+    cache = ConversationContextCache(max_conversations=8, max_messages=4)
+    monkeypatch.setattr(history_mod, "context_cache", cache)
+
+    async def run():
+        await history_manager.reset_database()
+        await history_manager.create_conversation("c1")
+        await history_manager.save_message("c1", "user", "q0")
+        cached = await history_manager.get_context_messages("c1", 4)
+        # Another worker's save: history.db changes, this process's cache does not
+        await history_mod.history_db.execute(
+            "INSERT INTO conversation_messages (conversation_id, role, content) VALUES (?, ?, ?)",
+            ("c1", "assistant", "a0"),
+        )
+        await history_manager.save_message("c1", "user", "q1")
+        return cached, await history_manager.get_context_messages("c1", 4)
+
+    cached, context = asyncio.run(run())
+
+    assert cached == [{"role": "user", "content": "q0"}]
+    assert context == [
+        {"role": "user", "content": "q0"},
+        {"role": "assistant", "content": "a0"},
+        {"role": "user", "content": "q1"},
+    ]
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,60 @@
+"""Tests for denormalized conversation titles and keyset pagination."""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.database.history import history_manager
+from app.main import app
+
+
+def _seed(count: int):
+    async def run():
+        await history_manager.reset_database()
+        for i in range(count):
+            conversation_id = f"conv-{i}"
+            await history_manager.create_conversation(conversation_id)
+            await history_manager.save_message(conversation_id, "user", f"question {i} " + "x" * 60)
+            await history_manager.save_message(conversation_id, "assistant", "answer")
+            await history_manager.save_message(conversation_id, "user", "follow-up")
+
+    asyncio.run(run())
+
+
+def test_title_is_stored_from_first_user_message():
+    _seed(1)
+
+    conversation = asyncio.run(history_manager.get_conversation("conv-0"))
+
+    assert conversation["title"] == ("question 0 " + "x" * 60)[:50] + "..."
+
+
+def test_conversation_list_pages_with_cursor():
+    _seed(5)
+    client = TestClient(app)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/conversations", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        seen.extend(item["id"] for item in data["conversations"])
+        assert all(item["title"].startswith("question") for item in data["conversations"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == [f"conv-{i}" for i in range(5)]
+    assert len(seen) == len(set(seen))
+
+
+def test_conversation_list_rejects_bad_cursor():
+    _seed(1)
+    client = TestClient(app)
+
+    response = client.get("/api/conversations", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
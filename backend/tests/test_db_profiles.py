@@ -0,0 +1,58 @@
+"""Tests for SQLite PRAGMA profiles and maintenance."""
+import asyncio
+
+import pytest
+
+from app.database.benchmark import benchmark_profile
+from app.database.connection import DatabaseManager, resolve_pragmas
+from app.database.maintenance import DatabaseMaintenance
+
+
+def test_resolve_pragmas_merges_overrides_and_orders_busy_timeout_first():
+    pragmas = resolve_pragmas("balanced", {"synchronous": "FULL"})
+
+    assert pragmas["synchronous"] == "FULL"
+    assert list(pragmas)[0] == "busy_timeout"
+    assert resolve_pragmas("default") == {}
+
+
+def test_resolve_pragmas_rejects_unknown_names():
+    with pytest.raises(ValueError):
+        resolve_pragmas("nope")
+    with pytest.raises(ValueError):
+        resolve_pragmas("default", {"writable_schema": "ON"})
+
+
+def test_database_manager_applies_profile_on_connect(tmp_path):
+    db = DatabaseManager(str(tmp_path / "t.db"), resolve_pragmas("balanced"))
+
+    async def run():
+        journal = await db.fetchone("PRAGMA journal_mode")
+        synchronous = await db.fetchone("PRAGMA synchronous")
+        await DatabaseMaintenance([db]).run_once()
+        await db.close()
+        return journal[0], synchronous[0]
+
+    journal_mode, synchronous = asyncio.run(run())
+
+    assert journal_mode == "wal"
+    assert synchronous == 1  # NORMAL
+
+
+def test_group_commit_connections_sync_fully(tmp_path):
+    db = DatabaseManager(str(tmp_path / "t.db"), resolve_pragmas("balanced"), group_commit_ms=2)
+
+    async def run():
+        synchronous = await db.fetchone("PRAGMA synchronous")
+        await db.close()
+        return synchronous[0]
+
+    assert asyncio.run(run()) == 2  # FULL
+
+
+def test_benchmark_profile_reports_throughput(tmp_path):
+    stats = asyncio.run(benchmark_profile("balanced", writes=20, reads=3, rows=100, workdir=str(tmp_path)))
+
+    assert stats["profile"] == "balanced"
+    assert stats["writes_per_sec"] > 0
+    assert stats["reads_per_sec"] > 0
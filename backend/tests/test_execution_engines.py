@@ -0,0 +1,62 @@
+"""Tests for pluggable execution engines."""
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.database.engines.duckdb import DuckDBEngine
+from app.database.engines.factory import ExecutionEngineFactory
+from app.database.engines.sqlite import SQLiteEngine
+from app.tools.sql_writer import sql_writer
+
+
+def test_analytic_intents_route_to_analytic_engine(monkeypatch):
+    monkeypatch.setattr(settings, "execution_engine", "sqlite")
+    monkeypatch.setattr(settings, "analytic_execution_engine", "duckdb")
+
+    assert ExecutionEngineFactory.engine_name_for_intent("aggregation") == "duckdb"
+    assert ExecutionEngineFactory.engine_name_for_intent("joining") == "duckdb"
+    assert ExecutionEngineFactory.engine_name_for_intent("filtering") == "sqlite"
+    assert ExecutionEngineFactory.engine_class_for_intent("aggregation") is DuckDBEngine
+    assert ExecutionEngineFactory.engine_class_for_intent(None) is SQLiteEngine
+
+
+def test_sql_writer_prompt_uses_engine_dialect(monkeypatch):
+    monkeypatch.setattr(settings, "analytic_execution_engine", "duckdb")
+
+    analytic = sql_writer._build_prompt(question="headcount by division", schema="", intent="aggregation")
+    lookup = sql_writer._build_prompt(question="who is emp 1", schema="", intent="filtering")
+
+    assert "DuckDB flavor" in analytic
+    assert "SQLite flavor" in lookup
+
+
+def test_duckdb_engine_queries_parquet_exports(tmp_path):
+    duckdb = pytest.importorskip("duckdb")
+
+    conn = duckdb.connect(":memory:")
+    conn.execute(
+        f"""
+        COPY (
+            SELECT * FROM (VALUES ('HR', DATE '2024-01-02'), ('HR', NULL), ('Finance', NULL))
+                AS t(division, termination_date)
+        ) TO '{tmp_path / "v_staff_hr_format.parquet"}' (FORMAT PARQUET)
+        """
+    )
+    conn.close()
+
+    engine = DuckDBEngine(sqlite_path=str(tmp_path / "unused.db"), parquet_dir=str(tmp_path))
+    columns, rows = asyncio.run(
+        engine.fetch(
+            "SELECT division, COUNT(*) AS headcount, MAX(termination_date) AS last_exit "
+            "FROM v_staff_hr_format GROUP BY division ORDER BY division"
+        )
+    )
+
+    assert columns == ["division", "headcount", "last_exit"]
+    assert rows == [
+        {"division": "Finance", "headcount": 1, "last_exit": None},
+        {"division": "HR", "headcount": 2, "last_exit": "2024-01-02"},
+    ]
+    assert asyncio.run(engine.data_version())
+    asyncio.run(engine.close())
@@ -0,0 +1,73 @@
+"""Tests for the indexed few-shot example store."""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.database.history import history_manager
+from app.main import app
+
+
+async def _conversation(conversation_id: str, question: str, sql: str) -> int:
+    await history_manager.create_conversation(conversation_id)
+    await history_manager.save_message(conversation_id, "user", question)
+    return await history_manager.save_message(
+        conversation_id, "assistant", "answer", sql=sql, metadata={"intent": "aggregation"}
+    )
+
+
+def test_like_stores_example_and_unlike_removes_it():
+    async def run():
+        await history_manager.reset_database()
+        message_id = await _conversation(
+            "c1", "  How many   staff per division? ",
+            "SELECT d.name, COUNT(*) FROM v_staff_hr_format s JOIN divisions d ON d.id = s.division_id GROUP BY 1",
+        )
+        await _conversation("c2", "List staff", "SELECT * FROM v_staff_hr_format")
+        await history_manager.set_feedback_by_message_id(message_id, "like")
+        liked = await history_manager.list_few_shot_examples()
+        await history_manager.set_feedback_by_message_id(message_id, "dislike")
+        after_dislike = await history_manager.list_few_shot_examples()
+        revision = (await history_manager.get_conversation_version("c1"))["revision"]
+        return liked, after_dislike, revision
+
+    liked, after_dislike, revision = asyncio.run(run())
+
+    assert len(liked) == 1
+    assert liked[0]["question"] == "  How many   staff per division? "
+    assert liked[0]["intent"] == "aggregation"
+    assert liked[0]["tables"] == ["v_staff_hr_format", "divisions"]
+    assert after_dislike == []
+    assert revision == 2
+
+
+def test_feedback_endpoint_accepts_message_id_or_sql():
+    async def seed():
+        await history_manager.reset_database()
+        first = await _conversation("c1", "Count staff", "SELECT COUNT(*) FROM v_staff_hr_format")
+        await history_manager.save_message("c1", "user", "Count divisions")
+        second = await history_manager.save_message(
+            "c1", "assistant", "answer", sql="SELECT COUNT(DISTINCT division) FROM v_staff_hr_format"
+        )
+        return first, second
+
+    first, second = asyncio.run(seed())
+    client = TestClient(app)
+
+    by_id = client.post("/api/feedback", json={"conversation_id": "c1", "message_id": second, "status": "like"})
+    by_sql = client.post(
+        "/api/feedback",
+        json={"conversation_id": "c1", "sql": "SELECT COUNT(*) FROM v_staff_hr_format", "status": "like"},
+    )
+    missing = client.post("/api/feedback", json={"conversation_id": "c1", "status": "like"})
+    unknown_id = client.post("/api/feedback", json={"conversation_id": "c1", "message_id": 9999, "status": "like"})
+    unknown_sql = client.post(
+        "/api/feedback", json={"conversation_id": "c1", "sql": "SELECT 1", "status": "like"}
+    )
+
+    assert by_id.status_code == 200
+    assert by_sql.status_code == 200
+    assert missing.status_code == 400
+    assert unknown_id.status_code == 404
+    assert unknown_sql.status_code == 404
+    liked = asyncio.run(history_manager.list_few_shot_examples())
+    assert {example["question"] for example in liked} == {"Count staff", "Count divisions"}
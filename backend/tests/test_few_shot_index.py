@@ -0,0 +1,133 @@
+"""Tests for the in-memory few-shot embedding index."""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.database.connection import history_db
+from app.database.history import history_manager
+from app.main import app
+from app.services.embeddings import HashedNgramEncoder, normalize_text
+from app.services.few_shot_index import FewShotIndex, few_shot_index
+from app.services.history_search import history_search_service
+
+
+def _example(example_id: int, question: str, conversation_id: str = "c1") -> dict:
+    return {
+        "id": example_id,
+        "conversation_id": conversation_id,
+        "question": question,
+        "sql": f"SELECT {example_id}",
+        "intent": None,
+    }
+
+
+def test_normalize_text_strips_vietnamese_diacritics():
+    assert normalize_text("  Số NHÂN viên   đã nghỉ ") == "so nhan vien da nghi"
+
+
+def test_search_ranks_paraphrases_and_excludes_conversation():
+    index = FewShotIndex(HashedNgramEncoder(dim=512))
+    index.load([
+        _example(1, "How many employees per department?"),
+        _example(2, "List employees hired in 2023", "c2"),
+        _example(3, "Average salary by job title", "c3"),
+    ])
+
+    hits = index.search("number of employees in each department", top_k=2)
+    excluded = index.search("number of employees in each department", top_k=3, exclude_conversation_id="c1")
+
+    assert [example["id"] for example, _ in hits][0] == 1
+    assert hits[0][1] > hits[1][1]
+    assert 1 not in [example["id"] for example, _ in excluded]
+
+
+def test_upsert_and_remove_keep_rows_consistent():
+    index = FewShotIndex(HashedNgramEncoder(dim=256))
+    index.load([_example(i, f"question number {i}") for i in range(1, 4)])
+
+    index.remove(1)
+    index.upsert(_example(2, "average salary by title"))
+    for i in range(4, 1100):
+        index.upsert(_example(i, f"question number {i}"))
+
+    assert len(index) == 1098
+    assert index.search("question number 1", top_k=1)[0][0]["id"] != 1
+    assert index.search("average salary by title", top_k=1)[0][0]["id"] == 2
+    assert index.stats()["capacity"] >= 1098
+
+
+def test_feedback_updates_live_index_without_search_io(monkeypatch):
+    async def seed():
+        await history_manager.reset_database()
+        await few_shot_index.sync()
+        await history_manager.create_conversation("c1")
+        await history_manager.save_message("c1", "user", "How many staff per division?")
+        return await history_manager.save_message("c1", "assistant", "answer", sql="SELECT division FROM t")
+
+    def search(**kwargs):
+        return asyncio.run(history_search_service.find_similar_queries("staff count per division", **kwargs))
+
+    liked = asyncio.run(seed())
+    client = TestClient(app)
+    before = search()
+    client.post("/api/feedback", json={"conversation_id": "c1", "message_id": liked, "status": "like"})
+
+    # Retrieval must not touch the database once the index is loaded
+    async def no_io(*args, **kwargs):
+        raise AssertionError("few-shot search hit the database")
+    monkeypatch.setattr(history_db, "fetchall", no_io)
+    monkeypatch.setattr(history_db, "fetchone", no_io)
+    after_like = search()
+    excluded = search(exclude_conversation_id="c1")
+    monkeypatch.undo()
+
+    client.post("/api/feedback", json={"conversation_id": "c1", "message_id": liked, "status": "none"})
+    after_unlike = search()
+
+    assert before == []
+    assert [example["sql"] for example in after_like] == ["SELECT division FROM t"]
+    assert excluded == []
+    assert after_unlike == []
+    assert client.get("/api/admin/few-shot-index").json()["examples"] == 0
+
+
+def test_fuzzy_backend_scores_all_examples_without_embeddings():
+    index = FewShotIndex(backend="fuzzy")
+    index.load([
+        _example(1, "Số nhân viên theo phòng ban"),
+        _example(2, "Average salary by job title", "c2"),
+    ])
+    index.upsert(_example(3, "List employees hired in 2023", "c3"))
+
+    hits = index.search("theo phong ban so nhan vien", top_k=3, min_similarity=0.5)
+
+    assert index.encoder is None
+    assert [(example["id"], score) for example, score in hits] == [(1, 1.0)]
+
+
+def test_reader_behind_pruned_change_log_reloads():
+    async def run():
+        await history_manager.reset_database()
+        reader = FewShotIndex(HashedNgramEncoder(dim=256))
+        await reader.sync()
+        await history_manager.create_conversation("c1")
+        for question in ("How many staff per division?", "Average salary by title"):
+            await history_manager.save_message("c1", "user", question)
+            message_id = await history_manager.save_message("c1", "assistant", "answer", sql="SELECT 1")
+            await history_manager.set_feedback_by_message_id(message_id, "like")
+        await history_db.execute("UPDATE few_shot_changes SET changed_at = '2020-01-01 00:00:00'")
+        pruned = await history_manager.prune_few_shot_changes(24)
+        remaining = await history_db.fetchone("SELECT COUNT(*) AS n FROM few_shot_changes")
+        _, seq, pruned_seq = await history_manager.get_few_shot_sync_state()
+        stale = await history_manager.get_few_shot_changes(0)
+        await reader.sync()
+        return pruned, remaining["n"], seq, pruned_seq, stale, reader
+
+    pruned, remaining, seq, pruned_seq, stale, reader = asyncio.run(run())
+
+    assert pruned == 2
+    assert remaining == 0
+    assert seq == pruned_seq > 0
+    assert stale is None
+    assert len(reader) == 2
+    assert reader.stats()["seq"] == seq
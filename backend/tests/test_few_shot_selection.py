@@ -0,0 +1,43 @@
+"""Tests for SQL skeletons and diverse few-shot example selection."""
+from app.services.history_search import estimate_tokens, select_diverse_examples
+from app.tools.sql_normalizer import sql_skeleton
+
+
+def _example(question: str, sql: str, score: float) -> dict:
+    return {"question": question, "sql": sql, "intent": None, "similarity_score": score}
+
+
+def test_sql_skeleton_replaces_literals_and_collapses_lists():
+    a = sql_skeleton("select name from emp where dept in ('HR', 'IT') and salary > 1000.5 limit 10;")
+    b = sql_skeleton("SELECT name FROM emp WHERE dept IN ('Sales') AND salary > 3 LIMIT 5")
+
+    assert a == b == "SELECT name FROM emp WHERE dept IN ( ? ) AND salary > ? LIMIT ?"
+    assert sql_skeleton("SELECT name FROM staff WHERE x = 1") != sql_skeleton("SELECT name FROM emp WHERE x = 1")
+    assert sql_skeleton("  ") == ""
+
+
+def test_sql_skeleton_keeps_function_arguments_apart():
+    assert sql_skeleton("SELECT substr(name, 1, 3) FROM emp") == "SELECT SUBSTR ( name , ? , ? ) FROM emp"
+    assert sql_skeleton("SELECT substr(name, 1, 3) FROM emp") != sql_skeleton("SELECT substr(name, 2) FROM emp")
+    assert sql_skeleton("INSERT INTO t VALUES (1, 'a'), (2, 'b')") == "INSERT INTO t VALUES ( ? ) , ( ? )"
+    assert sql_skeleton("SELECT * FROM t WHERE a IN (SELECT 1, 2 FROM u)") == (
+        "SELECT * FROM t WHERE a IN ( SELECT ? , ? FROM u )"
+    )
+
+
+def test_select_diverse_examples_keeps_one_per_skeleton_within_budget():
+    long_sql = "SELECT " + ", ".join(f"col{i}" for i in range(200)) + " FROM emp"
+    candidates = [
+        _example("Headcount in HR", "SELECT COUNT(*) FROM emp WHERE dept = 'HR'", 0.9),
+        _example("Headcount in IT", "SELECT COUNT(*) FROM emp WHERE dept = 'IT'", 0.8),
+        _example("Every column of emp", long_sql, 0.7),
+        _example("Average salary by dept", "SELECT dept, AVG(salary) FROM emp GROUP BY dept", 0.6),
+        _example("Hires in 2023", "SELECT * FROM emp WHERE year = 2023", 0.5),
+    ]
+
+    unlimited = select_diverse_examples(candidates, max_examples=3)
+    budgeted = select_diverse_examples(candidates, max_examples=3, token_budget=100)
+
+    assert [e["question"] for e in unlimited] == ["Headcount in HR", "Every column of emp", "Average salary by dept"]
+    assert [e["question"] for e in budgeted] == ["Headcount in HR", "Average salary by dept", "Hires in 2023"]
+    assert estimate_tokens(long_sql) > 100
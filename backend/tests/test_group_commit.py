@@ -0,0 +1,91 @@
+"""Tests for group-commit write batching in DatabaseManager."""
+import asyncio
+import sqlite3
+
+from app.database.connection import DatabaseManager
+
+
+def test_concurrent_writes_share_commits(tmp_path):
+    path = str(tmp_path / "history.db")
+    db = DatabaseManager(path, group_commit_ms=5, group_commit_max=16)
+
+    async def run():
+        await db.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, value TEXT)")
+        cursors = await asyncio.gather(
+            *(db.execute("INSERT INTO items (value) VALUES (?)", (str(i),)) for i in range(40))
+        )
+        # Durable once awaited: visible to an independent connection
+        other = sqlite3.connect(path)
+        count = other.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        other.close()
+        await db.close()
+        return cursors, count
+
+    cursors, count = asyncio.run(run())
+
+    assert count == 40
+    assert len({cursor.lastrowid for cursor in cursors}) == 40
+    stats = db.write_stats()
+    assert stats["statements"] == 41
+    assert stats["max_batch_size"] == 16
+    assert stats["batches"] < 10
+
+
+def test_failing_write_only_fails_its_caller(tmp_path):
+    db = DatabaseManager(str(tmp_path / "history.db"), group_commit_ms=5)
+
+    async def run():
+        await db.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, value TEXT UNIQUE)")
+        results = await asyncio.gather(
+            db.execute("INSERT INTO items (value) VALUES ('a')"),
+            db.execute("INSERT INTO items (value) VALUES ('a')"),
+            db.executemany("INSERT INTO items (value) VALUES (?)", [("b",), ("c",)]),
+            return_exceptions=True,
+        )
+        rows = await db.fetchall("SELECT value FROM items ORDER BY value")
+        await db.close()
+        return results, [row["value"] for row in rows]
+
+    results, values = asyncio.run(run())
+
+    assert isinstance(results[1], sqlite3.IntegrityError)
+    assert not isinstance(results[0], BaseException)
+    assert values == ["a", "b", "c"]
+    assert db.write_stats()["failed_statements"] == 1
+
+
+def test_group_commit_disabled_commits_each_write(tmp_path):
+    db = DatabaseManager(str(tmp_path / "history.db"))
+
+    async def run():
+        await db.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+        await db.execute("INSERT INTO items DEFAULT VALUES")
+        await db.close()
+
+    asyncio.run(run())
+
+    assert db.write_stats()["batches"] == 0
+    other = sqlite3.connect(str(tmp_path / "history.db"))
+    assert other.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+    other.close()
+
+
+def test_transaction_commits_queued_writes_and_rolls_back_on_error(tmp_path):
+    db = DatabaseManager(str(tmp_path / "history.db"), group_commit_ms=50)
+
+    async def run():
+        await db.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, value TEXT)")
+        queued = asyncio.create_task(db.execute("INSERT INTO items (value) VALUES ('queued')"))
+        await asyncio.sleep(0)
+        try:
+            async with db.transaction() as conn:
+                await conn.execute("INSERT INTO items (value) VALUES ('partial')")
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        await queued
+        rows = await db.fetchall("SELECT value FROM items ORDER BY id")
+        await db.close()
+        return [row["value"] for row in rows]
+
+    assert asyncio.run(run()) == ["queued"]
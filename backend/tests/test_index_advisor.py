@@ -0,0 +1,70 @@
+"""Tests for the EXPLAIN QUERY PLAN driven index advisor."""
+import asyncio
+
+from app.database.connection import DatabaseManager
+from app.database.history import history_manager
+from app.services import index_advisor as index_advisor_mod
+from app.services.index_advisor import index_advisor
+
+
+async def _seed_target(db: DatabaseManager):
+    await db.execute(
+        """
+        CREATE TABLE v_staff_hr_format (
+            id INTEGER PRIMARY KEY,
+            emp_no TEXT,
+            emp_name TEXT,
+            division TEXT,
+            cost_centre_short TEXT,
+            termination_date DATE
+        )
+        """
+    )
+    conn = await db.connect()
+    await conn.executemany(
+        "INSERT INTO v_staff_hr_format (emp_no, emp_name, division, cost_centre_short) VALUES (?, ?, ?, ?)",
+        [(str(i), f"name {i}", f"div {i % 5}", f"cc{i % 20}") for i in range(200)],
+    )
+    await conn.commit()
+
+
+def test_index_advisor_recommends_and_applies_indexes(monkeypatch, tmp_path):
+    target = DatabaseManager(str(tmp_path / "target.db"))
+    monkeypatch.setattr(index_advisor_mod, "target_db", target)
+    asyncio.run(_seed_target(target))
+
+    asyncio.run(history_manager.reset_database())
+    hot_sql = (
+        "SELECT emp_name FROM v_staff_hr_format "
+        "WHERE cost_centre_short = 'PDD' AND termination_date IS NULL"
+    )
+    for _ in range(3):
+        asyncio.run(history_manager.save_query("c1", "who is at PDD", hot_sql))
+    asyncio.run(
+        history_manager.save_query(
+            "c1",
+            "headcount by division",
+            "SELECT division, COUNT(*) AS n FROM v_staff_hr_format GROUP BY division",
+        )
+    )
+
+    report = asyncio.run(index_advisor.recommend())
+    assert report["analyzed_queries"] == 2
+
+    recs = report["recommendations"]
+    top = recs[0]
+    assert top["table"] == "v_staff_hr_format"
+    assert top["columns"] == ["cost_centre_short", "termination_date", "emp_name"]
+    assert top["occurrences"] == 3
+    assert any(r["columns"] == ["division"] for r in recs)
+
+    applied = asyncio.run(index_advisor.apply(names=[top["name"]]))
+    assert applied == [top["name"]]
+
+    plan = asyncio.run(index_advisor.explain(hot_sql))
+    assert any("COVERING INDEX" in line for line in plan)
+
+    # Applied indexes are no longer proposed
+    report_after = asyncio.run(index_advisor.recommend())
+    assert all(r["name"] != top["name"] for r in report_after["recommendations"])
+    asyncio.run(target.close())
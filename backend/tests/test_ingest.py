@@ -0,0 +1,130 @@
+"""Tests for the bulk ingestion tool."""
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+from app.database import summaries as summaries_mod
+from app.database.connection import DatabaseManager
+from app.database.ingest import ingest_file
+from app.database.summaries import SummaryManager
+
+
+def _create_staff_table(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """
+        CREATE TABLE v_staff_hr_format (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            emp_no TEXT,
+            emp_name TEXT,
+            division TEXT,
+            termination_date DATE,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.execute("CREATE INDEX idx_staff_division ON v_staff_hr_format(division)")
+    conn.commit()
+    conn.close()
+
+
+def test_ingest_csv_then_upsert_jsonl(tmp_path):
+    db_path = str(tmp_path / "target.db")
+    _create_staff_table(db_path)
+
+    csv_path = tmp_path / "extract.csv"
+    lines = ["emp_no,emp_name,division,termination_date,unknown_col"]
+    lines += [f"{i:08d},Name {i},{'HR' if i % 2 else 'Finance'},,x" for i in range(1, 251)]
+    csv_path.write_text("\n".join(lines) + "\n")
+
+    stats = ingest_file(str(csv_path), db_path=db_path, mode="upsert", chunk_size=64, commit_rows=100)
+    assert stats["rows"] == 250
+    assert stats["skipped_columns"] == ["unknown_col"]
+    assert stats["rebuilt_indexes"] == ["idx_staff_division"]
+    assert stats["rows_per_sec"] > 0
+
+    jsonl_path = tmp_path / "delta.jsonl"
+    jsonl_path.write_text(
+        "\n".join(
+            json.dumps(r)
+            for r in [
+                {"emp_no": "00000001", "emp_name": "Renamed", "division": "HR", "termination_date": "2025-01-31"},
+                {"emp_no": "00000999", "emp_name": "New Hire", "division": "IT", "termination_date": None},
+            ]
+        )
+    )
+    stats = ingest_file(str(jsonl_path), db_path=db_path, mode="upsert")
+    assert stats["rows"] == 2
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM v_staff_hr_format").fetchone()[0] == 251
+    assert conn.execute(
+        "SELECT emp_name, termination_date FROM v_staff_hr_format WHERE emp_no = '00000001'"
+    ).fetchone() == ("Renamed", "2025-01-31")
+    assert conn.execute(
+        "SELECT termination_date FROM v_staff_hr_format WHERE emp_no = '00000002'"
+    ).fetchone() == (None,)
+    indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_staff_division", "ux_v_staff_hr_format_emp_no"} <= indexes
+    conn.close()
+
+
+def test_ingest_rejects_records_with_different_keys(tmp_path):
+    db_path = str(tmp_path / "target.db")
+    _create_staff_table(db_path)
+    jsonl_path = tmp_path / "extract.jsonl"
+    jsonl_path.write_text(
+        "\n".join(
+            json.dumps(r)
+            for r in [
+                {"emp_no": "00000001", "emp_name": "A"},
+                {"emp_no": "00000002", "emp_name": "B", "division": "HR"},
+            ]
+        )
+    )
+
+    with pytest.raises(ValueError, match=r"Record 2 .*unexpected division"):
+        ingest_file(str(jsonl_path), db_path=db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM v_staff_hr_format").fetchone()[0] == 0
+    assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_staff_division'").fetchone()
+    conn.close()
+
+
+def test_ingest_suspends_summary_triggers_and_recomputes_summaries(monkeypatch, tmp_path):
+    db_path = str(tmp_path / "target.db")
+    _create_staff_table(db_path)
+    db = DatabaseManager(db_path)
+    monkeypatch.setattr(summaries_mod, "target_db", db)
+
+    async def ensure():
+        await SummaryManager().ensure()
+        await db.close()
+
+    asyncio.run(ensure())
+
+    def load(rows, **kwargs):
+        path = tmp_path / "extract.jsonl"
+        path.write_text("\n".join(json.dumps(r) for r in rows) + "\n")
+        return ingest_file(str(path), db_path=db_path, chunk_size=7, commit_rows=20, **kwargs)
+
+    first = load([{"emp_no": str(i), "division": f"d{i % 3}"} for i in range(50)], mode="upsert")
+    reload = load([{"emp_no": str(i), "division": "HR"} for i in range(10)], truncate=True)
+
+    conn = sqlite3.connect(db_path)
+    summary = conn.execute(
+        "SELECT division, agg_rows FROM agg_v_staff_hr_format_by_division ORDER BY division"
+    ).fetchall()
+    triggers = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    conn.execute("INSERT INTO v_staff_hr_format (emp_no, division) VALUES ('x', 'HR')")
+    after_insert = conn.execute("SELECT agg_rows FROM agg_v_staff_hr_format_by_division").fetchall()
+    conn.close()
+
+    assert first["refreshed_summaries"] == ["agg_v_staff_hr_format_by_division"]
+    assert reload["rows"] == 10
+    assert summary == [("HR", 10)]
+    assert len(triggers) == 3
+    assert after_insert == [(11,)]
@@ -0,0 +1,96 @@
+"""Tests for PRAGMA user_version schema migrations."""
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.database.connection import DatabaseManager
+from app.database.history import HISTORY_MIGRATIONS
+
+
+def _migrate(path: str, migrations=HISTORY_MIGRATIONS):
+    async def run():
+        db = DatabaseManager(path)
+        try:
+            return await db.migrate(migrations)
+        finally:
+            await db.close()
+
+    return asyncio.run(run())
+
+
+def test_fresh_database_applies_all_migrations_once(tmp_path):
+    path = str(tmp_path / "history.db")
+
+    first = _migrate(path)
+    second = _migrate(path)
+
+    latest = HISTORY_MIGRATIONS[-1][0]
+    assert first["from_version"] == 0
+    assert first["to_version"] == latest
+    assert first["applied"] == [name for _, name, _ in HISTORY_MIGRATIONS]
+    assert second["from_version"] == latest
+    assert second["applied"] == []
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == latest
+    conn.close()
+
+
+def test_unversioned_legacy_database_is_adopted_without_data_loss(tmp_path):
+    path = str(tmp_path / "history.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE conversations (
+            id TEXT PRIMARY KEY,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            user_id TEXT
+        );
+        CREATE TABLE conversation_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            sql TEXT,
+            result_json TEXT,
+            error TEXT,
+            metadata_json TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        INSERT INTO conversations (id) VALUES ('c1');
+        INSERT INTO conversation_messages (conversation_id, role, content)
+        VALUES ('c1', 'user', 'how many staff are there');
+    """)
+    conn.close()
+
+    result = _migrate(path)
+
+    assert result["from_version"] == 0
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT title FROM conversations WHERE id = 'c1'").fetchone()[0] == (
+        "how many staff are there"
+    )
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(conversation_messages)")}
+    assert {"feedback", "result_hash"} <= columns
+    hits = conn.execute("SELECT rowid FROM messages_fts WHERE messages_fts MATCH 'staff'").fetchall()
+    assert hits == [(1,)]
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name LIKE 'few_shot%fts%'").fetchall() == []
+    conn.close()
+
+
+def test_failed_migration_rolls_back_every_pending_step(tmp_path):
+    path = str(tmp_path / "history.db")
+
+    async def create_table(conn):
+        await conn.execute("CREATE TABLE first_step (id INTEGER)")
+
+    async def fail(conn):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        _migrate(path, [(1, "first", create_table), (2, "second", fail)])
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'first_step'").fetchone() is None
+    conn.close()
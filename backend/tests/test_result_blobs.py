@@ -0,0 +1,94 @@
+"""Tests for compressed, deduplicated result blob storage."""
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app.database.connection import history_db
+from app.database.history import history_manager
+from app.database.result_blobs import decode_result, encode_result
+from app.main import app
+
+
+def test_encode_result_round_trips_and_shrinks_repetitive_rows():
+    result = {
+        "success": True,
+        "rows": [{"emp_no": str(i), "division": "Operations"} for i in range(500)],
+        "count": 500,
+        "columns": ["emp_no", "division"],
+    }
+
+    digest, codec, raw_size, data = encode_result(result)
+
+    assert codec == "zlib"
+    assert len(data) * 4 < raw_size
+    assert decode_result(codec, data) == result
+    assert encode_result(json.dumps(result))[0] == digest
+
+
+def test_message_and_query_history_share_one_blob():
+    result = {"success": True, "rows": [{"n": 1}], "count": 1, "columns": ["n"]}
+
+    async def run():
+        await history_manager.reset_database()
+        await history_manager.create_conversation("c1")
+        await history_manager.save_message("c1", "user", "how many?")
+        await history_manager.save_message("c1", "assistant", "1", sql="SELECT 1 AS n", result=result)
+        await history_manager.save_query("c1", "how many?", "SELECT 1 AS n", execution_result=result)
+        blobs = await history_db.fetchone("SELECT COUNT(*) AS n FROM result_blobs")
+        full = await history_manager.get_conversation_messages("c1")
+        light = await history_manager.get_conversation_messages("c1", include_results=False)
+        return blobs["n"], full, light
+
+    blob_count, full, light = asyncio.run(run())
+
+    assert blob_count == 1
+    assert full[1]["results"] == result
+    assert light[1]["results"] is None
+    assert light[1]["content"] == "1"
+
+
+def test_legacy_result_json_rows_are_still_readable():
+    result = {"success": True, "rows": [{"n": 2}], "count": 1, "columns": ["n"]}
+
+    async def run():
+        await history_manager.reset_database()
+        await history_manager.create_conversation("c2")
+        await history_db.execute(
+            """
+            INSERT INTO conversation_messages (conversation_id, role, content, result_json)
+            VALUES ('c2', 'assistant', 'legacy', ?)
+            """,
+            (json.dumps(result),),
+        )
+        return await history_manager.get_conversation_messages("c2")
+
+    messages = asyncio.run(run())
+
+    assert messages[0]["results"] == result
+
+
+def test_conversation_endpoint_returns_result_hash_and_results_load_per_message():
+    result = {"success": True, "rows": [{"n": 3}], "count": 1, "columns": ["n"]}
+
+    async def seed():
+        await history_manager.reset_database()
+        await history_manager.create_conversation("c3")
+        await history_manager.save_message("c3", "user", "how many?")
+        return await history_manager.save_message("c3", "assistant", "3", sql="SELECT 3 AS n", result=result)
+
+    message_id = asyncio.run(seed())
+    client = TestClient(app)
+
+    conversation = client.get("/api/conversations/c3").json()
+    loaded = client.get(f"/api/conversations/c3/messages/{message_id}/results")
+    other_conversation = client.get(f"/api/conversations/c1/messages/{message_id}/results")
+    question = client.get(f"/api/conversations/c3/messages/{message_id - 1}/results")
+
+    assert conversation["messages"][1]["results"] is None
+    assert conversation["messages"][1]["result_hash"]
+    assert conversation["messages"][0]["result_hash"] is None
+    assert loaded.status_code == 200
+    assert loaded.json()["rows"] == result["rows"]
+    assert other_conversation.status_code == 404
+    assert question.status_code == 404
@@ -0,0 +1,73 @@
+"""Tests for the SQL result cache."""
+import asyncio
+
+from app.config import settings
+from app.database.connection import target_light_pool
+from app.database.engines.factory import ExecutionEngineFactory
+from app.services.result_cache import ResultCache, result_cache
+from app.tools.sql_executor import sql_executor
+from app.tools.sql_normalizer import canonicalize_sql
+
+
+def test_canonicalize_sql_ignores_formatting_differences():
+    a = "select division, count(*) as headcount from v_staff_hr_format where job_level = 'A' group by division;"
+    b = """SELECT  division, count(*)   AS headcount
+           FROM v_staff_hr_format -- headcount
+           WHERE job_level='A'
+           GROUP   BY division"""
+
+    assert canonicalize_sql(a) == canonicalize_sql(b)
+
+
+def test_canonicalize_sql_keeps_literals_distinct():
+    assert canonicalize_sql("SELECT * FROM t WHERE x = 010") == canonicalize_sql("SELECT * FROM t WHERE x = 10")
+    assert canonicalize_sql("SELECT * FROM t WHERE x = 'a'") != canonicalize_sql("SELECT * FROM t WHERE x = 'A'")
+
+
+def test_result_cache_evicts_least_recently_used_by_bytes():
+    cache = ResultCache(max_bytes=250)
+    payload = {"success": True, "rows": [{"v": "x" * 40}], "count": 1, "columns": ["v"]}
+
+    assert cache.put("a", payload)
+    assert cache.put("b", payload)
+    assert cache.get("a") is not None  # "b" is now least recently used
+    assert cache.put("c", payload)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    stats = cache.stats()
+    assert stats["bytes"] <= 250
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["bytes_saved"] > 0
+
+
+def test_executor_serves_repeated_sql_from_cache(monkeypatch):
+    result_cache.clear()
+    calls = []
+    version = [1]
+
+    async def fake_fetchall(query, params=()):
+        calls.append(query)
+        return [{"division": "HR", "headcount": 3}]
+
+    async def fake_data_version():
+        return (version[0], None, None)
+
+    engine = ExecutionEngineFactory.get_engine("sqlite")
+    monkeypatch.setattr(target_light_pool, "fetchall", fake_fetchall)
+    monkeypatch.setattr(engine, "data_version", fake_data_version)
+    # Only count executions, not admission-control EXPLAINs
+    monkeypatch.setattr(settings, "enable_admission_control", False)
+
+    first = asyncio.run(sql_executor.execute_query("SELECT division, COUNT(*) AS headcount FROM v GROUP BY division"))
+    second = asyncio.run(sql_executor.execute_query("select division, count(*) as headcount from v group by division"))
+
+    assert first == second
+    assert len(calls) == 1
+
+    # A write to target.db changes the data version and invalidates the entry
+    version[0] = 2
+    asyncio.run(sql_executor.execute_query("SELECT division, COUNT(*) AS headcount FROM v GROUP BY division"))
+    assert len(calls) == 2
@@ -0,0 +1,109 @@
+"""Tests for server-side paginated result sets."""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.database.connection import DatabaseManager
+from app.database.history import history_manager
+from app.main import app
+from app.services import result_store as result_store_mod
+from app.services.result_store import ResultStore
+
+
+def _result(n: int):
+    rows = [{"emp_no": str(i), "division": f"div {i % 3}"} for i in range(n)]
+    return {"success": True, "rows": rows, "count": n, "columns": ["emp_no", "division"]}
+
+
+def test_result_store_keeps_first_page_and_pages_through_rest(monkeypatch, tmp_path):
+    monkeypatch.setattr(result_store_mod, "results_db", DatabaseManager(str(tmp_path / "results.db")))
+    monkeypatch.setattr(settings, "result_page_size", 10)
+    store = ResultStore()
+
+    async def run():
+        saved = await store.save(_result(25))
+        pages = []
+        offset = 0
+        while offset is not None:
+            page = await store.get_page(saved["result_id"], offset=offset, limit=10)
+            pages.append(page)
+            offset = page["next_offset"]
+        return saved, pages
+
+    saved, pages = asyncio.run(run())
+
+    assert len(saved["rows"]) == 10
+    assert saved["count"] == 25
+    assert saved["has_more"] is True
+    assert [len(p["rows"]) for p in pages] == [10, 10, 5]
+    assert pages[-1]["has_more"] is False
+    assert pages[1]["rows"][0] == {"emp_no": "10", "division": "div 1"}
+    assert all(p["total"] == 25 for p in pages)
+
+
+def test_result_store_small_result_has_no_more_pages(monkeypatch, tmp_path):
+    monkeypatch.setattr(result_store_mod, "results_db", DatabaseManager(str(tmp_path / "results.db")))
+    store = ResultStore()
+
+    saved = asyncio.run(store.save(_result(3)))
+
+    assert saved["has_more"] is False
+    assert saved["result_id"] is None
+    assert saved["count"] == 3
+    assert len(saved["rows"]) == 3
+    assert not (tmp_path / "results.db").exists()
+
+
+def test_get_result_page_endpoint(monkeypatch, tmp_path):
+    monkeypatch.setattr(result_store_mod, "results_db", DatabaseManager(str(tmp_path / "results.db")))
+    monkeypatch.setattr(result_store_mod.result_store, "_initialized", False)
+    monkeypatch.setattr(settings, "result_page_size", 2)
+    asyncio.run(history_manager.init_database())  # Unknown result ids fall back to history.db
+    saved = asyncio.run(result_store_mod.result_store.save(_result(5)))
+    client = TestClient(app)
+
+    response = client.get(f"/api/results/{saved['result_id']}", params={"offset": 2, "limit": 2})
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["emp_no"] for r in data["rows"]] == ["2", "3"]
+    assert data["next_offset"] == 4
+    assert data["has_more"] is True
+
+    missing = client.get("/api/results/does-not-exist")
+    assert missing.status_code == 404
+
+
+def test_history_keeps_every_row_and_serves_pages_after_expiry(monkeypatch, tmp_path):
+    monkeypatch.setattr(result_store_mod, "results_db", DatabaseManager(str(tmp_path / "results.db")))
+    monkeypatch.setattr(settings, "result_page_size", 10)
+    store = ResultStore()
+    monkeypatch.setattr(result_store_mod, "result_store", store)
+    monkeypatch.setattr("app.services.conversation.result_store", store)
+    monkeypatch.setattr("app.api.routes.result_store", store)
+    full = _result(25)
+
+    async def run():
+        await history_manager.reset_database()
+        await history_manager.create_conversation("c1")
+        page = await store.save(full)
+        message_id = await history_manager.save_message(
+            "c1", "assistant", "25 rows", sql="SELECT 1", result={**page, "rows": full["rows"]}
+        )
+        # Expire the results.db copy
+        await result_store_mod.results_db.execute("DELETE FROM result_rows")
+        await result_store_mod.results_db.execute("DELETE FROM result_sets")
+        return page["result_id"], message_id
+
+    result_id, message_id = asyncio.run(run())
+    client = TestClient(app)
+
+    first = client.get(f"/api/conversations/c1/messages/{message_id}/results").json()
+    second = client.get(f"/api/results/{result_id}", params={"offset": 10, "limit": 10}).json()
+    last = client.get(f"/api/results/{result_id}", params={"offset": 20, "limit": 10}).json()
+
+    assert len(first["rows"]) == 10
+    assert first["has_more"] is True and first["result_id"] == result_id
+    assert second["rows"][0] == {"emp_no": "10", "division": "div 1"}
+    assert second["next_offset"] == 20
+    assert len(last["rows"]) == 5 and last["has_more"] is False
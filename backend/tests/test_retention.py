@@ -0,0 +1,138 @@
+"""Tests for history retention, archival and incremental vacuum."""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.database import retention as retention_mod
+from app.database.connection import history_db
+from app.database.history import history_manager
+from app.database.retention import RetentionManager
+from app.main import app
+
+
+def _setup(monkeypatch, tmp_path) -> RetentionManager:
+    manager = RetentionManager(str(tmp_path / "archive"))
+    monkeypatch.setattr(retention_mod, "retention_manager", manager)
+    monkeypatch.setattr("app.services.conversation.retention_manager", manager)
+    monkeypatch.setattr(retention_mod.settings, "history_retention_days", 30)
+    monkeypatch.setattr(retention_mod.settings, "history_max_size_mb", 0)
+    return manager
+
+
+async def _seed():
+    await history_manager.reset_database()
+    for conversation_id, updated_at in (("old", "2020-03-15 10:00:00"), ("new", None)):
+        await history_manager.create_conversation(conversation_id)
+        await history_manager.save_message(conversation_id, "user", f"{conversation_id} question")
+        await history_manager.save_message(
+            conversation_id, "assistant", "answer", sql="SELECT 1",
+            result={"rows": [{"n": conversation_id * 500}], "count": 1},
+        )
+        if updated_at:
+            await history_db.execute(
+                "UPDATE conversations SET updated_at = ? WHERE id = ?", (updated_at, conversation_id)
+            )
+    await history_db.execute("UPDATE result_blobs SET created_at = '2020-03-15 10:00:00'")
+
+
+def test_old_conversations_are_archived_and_still_fetchable(monkeypatch, tmp_path):
+    manager = _setup(monkeypatch, tmp_path)
+
+    async def run():
+        await _seed()
+        await manager.init()
+        result = await manager.run_once()
+        mode = (await history_db.fetchone("PRAGMA auto_vacuum"))[0]
+        blobs = (await history_db.fetchone("SELECT COUNT(*) FROM result_blobs"))[0]
+        return result, mode, blobs
+
+    result, mode, blobs = asyncio.run(run())
+
+    assert result["archived_conversations"] == 1
+    assert result["deleted_blobs"] == 1
+    assert blobs == 1
+    assert mode == 2
+    assert (tmp_path / "archive" / "history-2020-03.db").exists()
+
+    client = TestClient(app)
+    listed = [c["id"] for c in client.get("/api/conversations").json()["conversations"]]
+    archived = client.get("/api/conversations/old").json()
+
+    assert listed == ["new"]
+    assert archived["archived"] is True
+    assert [m["content"] for m in archived["messages"]] == ["old question", "answer"]
+    assert archived["messages"][1]["results"]["rows"][0]["n"] == "old" * 500
+    assert client.get("/api/conversations/new").json()["archived"] is False
+
+
+def test_size_budget_archives_oldest_first(monkeypatch, tmp_path):
+    manager = _setup(monkeypatch, tmp_path)
+    monkeypatch.setattr(retention_mod.settings, "history_retention_days", 0)
+    monkeypatch.setattr(retention_mod.settings, "history_max_size_mb", 1)
+    monkeypatch.setattr(retention_mod, "SIZE_POLICY_BATCH", 1)
+
+    async def run():
+        await _seed()
+        await history_db.execute(
+            "UPDATE conversation_messages SET content = ? WHERE conversation_id = 'old'",
+            ("x" * 2 * 1024 * 1024,),
+        )
+        return await manager.run_once(), await history_manager.conversation_exists("new")
+
+    result, new_exists = asyncio.run(run())
+
+    assert result["archived_conversations"] == 1
+    assert new_exists
+
+
+def test_conversation_changed_during_archival_is_kept_whole(monkeypatch, tmp_path):
+    manager = _setup(monkeypatch, tmp_path)
+    write_archive = manager._write_archive
+
+    async def write_archive_then_reply(archive_file, conversations):
+        await write_archive(archive_file, conversations)
+        # A reply lands between the snapshot and the delete
+        await history_manager.save_message("old", "user", "late question")
+
+    monkeypatch.setattr(manager, "_write_archive", write_archive_then_reply)
+
+    async def run():
+        await _seed()
+        result = await manager.run_once()
+        messages = await history_manager.get_conversation_messages("old")
+        indexed = await history_db.fetchone("SELECT COUNT(*) FROM archived_conversations")
+        return result, [m["content"] for m in messages], indexed[0]
+
+    result, contents, indexed = asyncio.run(run())
+
+    assert result["archived_conversations"] == 0
+    assert contents == ["old question", "answer", "late question"]
+    assert indexed == 0
+
+
+def test_age_policy_archives_in_bounded_batches(monkeypatch, tmp_path):
+    manager = _setup(monkeypatch, tmp_path)
+    monkeypatch.setattr(retention_mod, "AGE_POLICY_BATCH", 1)
+    batches = []
+    archive_conversations = manager.archive_conversations
+
+    async def record_batch(conversation_ids):
+        batches.append(list(conversation_ids))
+        return await archive_conversations(conversation_ids)
+
+    monkeypatch.setattr(manager, "archive_conversations", record_batch)
+
+    async def run():
+        await _seed()
+        for conversation_id in ("older", "oldest"):
+            await history_manager.create_conversation(conversation_id)
+            await history_manager.save_message(conversation_id, "user", "question")
+        await history_db.execute("UPDATE conversations SET updated_at = '2019-01-01 00:00:00' WHERE id = 'older'")
+        await history_db.execute("UPDATE conversations SET updated_at = '2018-01-01 00:00:00' WHERE id = 'oldest'")
+        return await manager.run_once()
+
+    result = asyncio.run(run())
+
+    assert result["archived_conversations"] == 3
+    assert batches[:3] == [["oldest"], ["older"], ["old"]]
+    assert all(len(batch) <= 1 for batch in batches)
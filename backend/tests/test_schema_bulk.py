@@ -0,0 +1,61 @@
+"""Tests for bulk NDJSON schema registry import/export."""
+import asyncio
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+from app.database.history import history_manager
+from app.main import app
+
+
+def _ndjson(count: int, offset: int = 0) -> str:
+    return "\n".join(
+        json.dumps({
+            "table_name": f"table_{i:04d}",
+            "columns": [{"name": f"col_{c}", "type": "TEXT"} for c in range(20)],
+            "description": f"Bảng số {i}",
+            "tags": ["warehouse"],
+        }, ensure_ascii=False)
+        for i in range(offset, offset + count)
+    ) + "\n"
+
+
+def test_bulk_import_and_export_round_trip():
+    asyncio.run(history_manager.reset_database())
+    client = TestClient(app)
+
+    started = time.perf_counter()
+    first = client.post(
+        "/api/schema/tables:bulk",
+        content=_ndjson(500).encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    elapsed = time.perf_counter() - started
+    second = client.post("/api/schema/tables:bulk", content=_ndjson(10, offset=495).encode())
+    exported = client.get("/api/schema/export")
+
+    assert first.status_code == 200
+    assert first.json()["created"] == 500
+    assert elapsed < 1.0
+    assert second.json() == {**second.json(), "imported": 10, "created": 5, "updated": 5}
+    lines = [json.loads(line) for line in exported.text.splitlines()]
+    assert exported.headers["content-type"].startswith("application/x-ndjson")
+    assert len(lines) == 505
+    assert lines[0]["table_name"] == "table_0000"
+    assert lines[1]["description"] == "Bảng số 1"
+
+    reimported = client.post("/api/schema/tables:bulk", content=exported.content)
+    assert reimported.json()["updated"] == 505
+
+
+def test_bulk_import_is_all_or_nothing():
+    asyncio.run(history_manager.reset_database())
+    client = TestClient(app)
+    body = _ndjson(3) + '{"table_name": "broken"}\nnot json\n'
+
+    response = client.post("/api/schema/tables:bulk", content=body.encode())
+
+    assert response.status_code == 400
+    assert [e["line"] for e in response.json()["detail"]["errors"]] == [4, 5]
+    assert asyncio.run(history_manager.list_table_definitions(active_only=False)) == []
@@ -0,0 +1,56 @@
+"""Tests for the versioned compiled-schema cache."""
+import asyncio
+
+from app.database.history import history_manager
+from app.services.schema_cache import CompiledSchemaCache
+
+
+async def _define(table_name: str, is_active: bool = True):
+    await history_manager.upsert_table_definition(
+        table_name=table_name,
+        columns=[{"name": "id", "type": "INTEGER"}],
+        relationships=[],
+        is_active=is_active,
+    )
+
+
+def test_registry_changes_bump_version_and_invalidate():
+    cache = CompiledSchemaCache()
+
+    async def run():
+        await history_manager.reset_database()
+        await history_manager.set_registry_business_context({"note": "v1"})
+        await _define("orders")
+        await _define("products")
+        v0 = await history_manager.get_registry_version()
+        first = await cache.get(["products", "orders", "products"])
+        again = await cache.get(["products", "orders"])
+        missing = await cache.get(["nope"])
+        await history_manager.set_table_definition_active("orders", False)
+        after_deactivate = await cache.get(["products", "orders"])
+        await history_manager.set_registry_business_context({"note": "v2"})
+        after_context = await cache.get(None)
+        v1 = await history_manager.get_registry_version()
+        return v0, v1, first, again, missing, after_deactivate, after_context
+
+    v0, v1, first, again, missing, after_deactivate, after_context = asyncio.run(run())
+
+    assert v0[0] == v1[0] and v1[1] == v0[1] + 2
+    assert [t["name"] for t in first["dict"]["tables"]] == ["products", "orders"]
+    assert again is first
+    assert missing is None
+    assert [t["name"] for t in after_deactivate["dict"]["tables"]] == ["products"]
+    assert "v2" in after_context["text"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_reset_starts_a_new_epoch():
+    async def run():
+        await history_manager.reset_database()
+        before = await history_manager.get_registry_version()
+        await history_manager.reset_database()
+        return before, await history_manager.get_registry_version()
+
+    before, after = asyncio.run(run())
+
+    assert before != after
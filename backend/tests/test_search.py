@@ -0,0 +1,49 @@
+"""Tests for FTS5 search over questions and SQL."""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.database.history import build_fts_query, history_manager
+from app.main import app
+
+
+def _seed() -> int:
+    async def run():
+        await history_manager.reset_database()
+        await history_manager.create_conversation("c1")
+        await history_manager.save_message("c1", "user", "Số nhân viên theo phòng ban")
+        liked = await history_manager.save_message(
+            "c1", "assistant", "| division | n |", sql="SELECT division, COUNT(*) FROM v_staff_hr_format GROUP BY division"
+        )
+        await history_manager.create_conversation("c2")
+        await history_manager.save_message("c2", "user", "List resigned staff in 2023")
+        await history_manager.save_message(
+            "c2", "assistant", "division breakdown", sql="SELECT emp_no FROM v_staff_hr_format WHERE termination_date LIKE '2023%'"
+        )
+        await history_manager.set_feedback_by_message_id(liked, "like")
+        return liked
+
+    return asyncio.run(run())
+
+
+def test_search_endpoint_ranks_questions_and_sql():
+    _seed()
+    client = TestClient(app)
+
+    accentless = client.get("/api/search", params={"q": "nhan vien"}).json()
+    sql_hits = client.get("/api/search", params={"q": "termination_da"}).json()
+    answer_text = client.get("/api/search", params={"q": "breakdown"}).json()
+    empty = client.get("/api/search", params={"q": "  "})
+
+    assert accentless["count"] == 1
+    assert accentless["results"][0]["conversation_id"] == "c1"
+    assert "<mark>" in accentless["results"][0]["snippet"]
+    assert [hit["role"] for hit in sql_hits["results"]] == ["assistant"]
+    assert answer_text["count"] == 0  # Assistant markdown is not indexed
+    assert empty.status_code == 400
+
+
+def test_fts_query_quotes_operators():
+    assert build_fts_query('count" OR NEAR(x') == '"count" "or" "near" "x"*'
+    assert build_fts_query("!!") is None
+
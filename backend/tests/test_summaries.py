@@ -0,0 +1,158 @@
+"""Tests for trigger-maintained summary tables and the SQL rewrite stage."""
+import asyncio
+
+from app.database import summaries as summaries_mod
+from app.database.connection import DatabaseManager
+from app.database.summaries import SummaryManager
+from app.tools.sql_rewriter import sql_rewriter
+
+
+async def _seed(db: DatabaseManager):
+    await db.execute(
+        """
+        CREATE TABLE v_staff_hr_format (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            emp_no TEXT,
+            section TEXT,
+            division TEXT,
+            cost_centre_short TEXT,
+            job_level TEXT,
+            termination_date DATE
+        )
+        """
+    )
+    await db.executemany(
+        "INSERT INTO v_staff_hr_format (emp_no, section, division, cost_centre_short, job_level, termination_date) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (
+                str(i),
+                f"s{i % 2}",
+                None if i % 17 == 0 else f"div {i % 4}",
+                f"cc{i % 7}",
+                "ABC"[i % 3],
+                None if i % 5 else ("2020-01-01" if i % 2 else "2999-01-01"),
+            )
+            for i in range(300)
+        ],
+    )
+
+
+def _setup(monkeypatch, tmp_path):
+    db = DatabaseManager(str(tmp_path / "target.db"))
+    manager = SummaryManager()
+    monkeypatch.setattr(summaries_mod, "target_db", db)
+    monkeypatch.setattr(summaries_mod, "summary_manager", manager)
+    monkeypatch.setattr("app.tools.sql_rewriter.summary_manager", manager)
+    return db, manager
+
+
+QUERIES = [
+    "SELECT division, COUNT(*) AS headcount FROM v_staff_hr_format GROUP BY division ORDER BY headcount DESC, division",
+    "SELECT job_level, COUNT(*) FROM v_staff_hr_format "
+    "WHERE termination_date IS NULL OR termination_date > date('now') GROUP BY job_level",
+    "SELECT COUNT(*) AS resigned FROM v_staff_hr_format s "
+    "WHERE s.termination_date IS NOT NULL AND s.termination_date <= date('now')",
+    "SELECT cost_centre_short, count(1) AS n FROM v_staff_hr_format "
+    "GROUP BY cost_centre_short HAVING count(1) > 40 ORDER BY cost_centre_short LIMIT 3",
+    "SELECT COUNT(*) FROM v_staff_hr_format WHERE division = 'nope'",
+]
+
+
+def test_rewritten_queries_return_identical_results(monkeypatch, tmp_path):
+    db, manager = _setup(monkeypatch, tmp_path)
+
+    async def run():
+        await _seed(db)
+        await manager.ensure()
+        pairs = []
+        for sql in QUERIES:
+            rewritten = sql_rewriter.rewrite(sql)
+            assert rewritten is not None and "agg_v_staff_hr_format_by_" in rewritten, sql
+            original_rows = [dict(r) for r in await db.fetchall(sql)]
+            rewritten_rows = [dict(r) for r in await db.fetchall(rewritten)]
+            pairs.append((original_rows, rewritten_rows))
+        return pairs
+
+    for original_rows, rewritten_rows in asyncio.run(run()):
+        assert original_rows == rewritten_rows
+
+
+def test_non_matching_queries_are_not_rewritten(monkeypatch, tmp_path):
+    db, manager = _setup(monkeypatch, tmp_path)
+
+    async def run():
+        await _seed(db)
+        await manager.ensure()
+
+    asyncio.run(run())
+
+    assert sql_rewriter.rewrite("SELECT division, emp_no FROM v_staff_hr_format") is None
+    assert sql_rewriter.rewrite("SELECT division, COUNT(*) FROM v_staff_hr_format WHERE section = 's1' GROUP BY division") is None
+    assert sql_rewriter.rewrite("SELECT division, COUNT(DISTINCT emp_no) FROM v_staff_hr_format GROUP BY division") is None
+    assert sql_rewriter.rewrite("SELECT division, AVG(id) FROM v_staff_hr_format GROUP BY division") is None
+    assert sql_rewriter.rewrite("SELECT division, job_level, COUNT(*) FROM v_staff_hr_format GROUP BY 1, 2") is None
+    assert sql_rewriter.rewrite("SELECT COUNT(*) * 2 FROM v_staff_hr_format") is None
+    assert sql_rewriter.rewrite(
+        "SELECT COUNT(*) FROM v_staff_hr_format WHERE division IN (SELECT division FROM other)"
+    ) is None
+
+
+def test_triggers_keep_summaries_current(monkeypatch, tmp_path):
+    db, manager = _setup(monkeypatch, tmp_path)
+    sql = "SELECT division, COUNT(*) AS n FROM v_staff_hr_format GROUP BY division ORDER BY division"
+
+    async def run():
+        await _seed(db)
+        await manager.ensure()
+        await db.execute("INSERT INTO v_staff_hr_format (emp_no, division) VALUES ('x1', 'div new')")
+        await db.execute("UPDATE v_staff_hr_format SET division = 'div 1' WHERE division = 'div 0'")
+        await db.execute("UPDATE v_staff_hr_format SET termination_date = '2021-05-05' WHERE id < 50")
+        await db.execute("DELETE FROM v_staff_hr_format WHERE division IS NULL")
+        rewritten = sql_rewriter.rewrite(sql)
+        original_rows = [dict(r) for r in await db.fetchall(sql)]
+        rewritten_rows = [dict(r) for r in await db.fetchall(rewritten)]
+        rebuilt = await manager.rebuild()
+        after_rebuild = [dict(r) for r in await db.fetchall(rewritten)]
+        return original_rows, rewritten_rows, after_rebuild, rebuilt
+
+    original_rows, rewritten_rows, after_rebuild, rebuilt = asyncio.run(run())
+
+    assert rewritten_rows == original_rows
+    assert after_rebuild == original_rows
+    assert {"div new", "div 1"} <= {r["division"] for r in original_rows}
+    assert len(rebuilt["tables"]) == 3
+
+
+def test_view_source_is_skipped_and_half_built_summary_is_repaired(monkeypatch, tmp_path):
+    db, manager = _setup(monkeypatch, tmp_path)
+    sql = "SELECT division, COUNT(*) AS n FROM v_staff_hr_format GROUP BY division ORDER BY division"
+
+    async def run():
+        await db.execute("CREATE TABLE staff (id INTEGER PRIMARY KEY, division TEXT, termination_date DATE)")
+        await db.execute(
+            "CREATE VIEW v_staff_hr_format AS SELECT id, division, division AS cost_centre_short, "
+            "division AS job_level, termination_date FROM staff"
+        )
+        on_view = await manager.ensure()
+        view_summaries = list(manager.summaries)
+        await db.execute("DROP VIEW v_staff_hr_format")
+
+        await _seed(db)
+        # Summary table left over without triggers and with stale rows
+        await db.execute(
+            'CREATE TABLE "agg_v_staff_hr_format_by_division" (division TEXT, termination_date DATE, agg_rows INTEGER NOT NULL)'
+        )
+        await db.execute("INSERT INTO agg_v_staff_hr_format_by_division VALUES ('stale', NULL, 1)")
+        created = await manager.ensure()
+        await db.execute("INSERT INTO v_staff_hr_format (emp_no, division) VALUES ('x1', 'div new')")
+        original_rows = [dict(r) for r in await db.fetchall(sql)]
+        rewritten_rows = [dict(r) for r in await db.fetchall(sql_rewriter.rewrite(sql))]
+        return on_view, view_summaries, created, original_rows, rewritten_rows
+
+    on_view, view_summaries, created, original_rows, rewritten_rows = asyncio.run(run())
+
+    assert on_view == [] and view_summaries == []
+    assert "agg_v_staff_hr_format_by_division" not in created
+    assert len(created) == 2
+    assert rewritten_rows == original_rows
@@ -0,0 +1,73 @@
+"""Tests for the Aho-Corasick table matcher used by table detection."""
+import asyncio
+import random
+
+from app.database.history import history_manager
+from app.tools.intent_analyzer import intent_analyzer
+from app.tools.table_matcher import TableMatcher
+
+
+def _substring_scores(definitions, question):
+    """Former nested substring scoring, kept as the reference."""
+    question_l = question.lower()
+    scored = []
+    for td in definitions:
+        score, reasons = 0.0, []
+        if td["table_name"].lower() in question_l:
+            score += 3.0
+            reasons.append(f"table_name_match:{td['table_name']}")
+        for col in td["columns"]:
+            if col["name"].lower() in question_l:
+                score += 1.0
+                reasons.append(f"column_match:{col['name']}")
+        for tag in td["tags"]:
+            if tag.lower() in question_l:
+                score += 0.5
+                reasons.append(f"tag_match:{tag}")
+        if score > 0:
+            scored.append((score, td["table_name"], reasons))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored
+
+
+def test_matcher_agrees_with_substring_scoring():
+    rng = random.Random(3)
+    words = ["emp", "employee", "salary", "dept", "department", "id", "name", "hire", "date", "ee"]
+    definitions = [
+        {
+            "table_name": f"{rng.choice(words)}_{i}" if i % 3 else rng.choice(words),
+            "columns": [{"name": "_".join(rng.sample(words, rng.randint(1, 2)))} for _ in range(4)],
+            "tags": rng.sample(words, 2),
+        }
+        for i in range(60)
+    ]
+    matcher = TableMatcher(definitions)
+
+    for _ in range(50):
+        question = " ".join(rng.choice(words + ["_", "of", "1", "2"]) for _ in range(8)).upper()
+        assert matcher.match(question) == _substring_scores(definitions, question)
+    assert matcher.match("") == []
+
+
+def test_detect_target_tables_recompiles_only_on_registry_change():
+    async def run():
+        await history_manager.reset_database()
+        await history_manager.upsert_table_definition(
+            table_name="staff", columns=[{"name": "salary", "type": "REAL"}], tags=["hr"], is_active=True
+        )
+        first = await intent_analyzer.detect_target_tables("staff salary", allow_llm_fallback=False)
+        matcher = await intent_analyzer.get_table_matcher()
+        same = await intent_analyzer.get_table_matcher()
+        await history_manager.upsert_table_definition(
+            table_name="payroll", columns=[{"name": "salary", "type": "REAL"}], is_active=True
+        )
+        second = await intent_analyzer.detect_target_tables("payroll salary", allow_llm_fallback=False)
+        return first, matcher, same, second, await intent_analyzer.get_table_matcher()
+
+    first, matcher, same, second, rebuilt = asyncio.run(run())
+
+    assert first["target_tables"] == ["staff"]
+    assert first["matched_reasons"] == ["table_name_match:staff", "column_match:salary"]
+    assert same is matcher
+    assert rebuilt is not matcher and len(rebuilt) == 2
+    assert second["target_tables"] == ["payroll", "staff"]
@@ -2,6 +2,7 @@ import { Avatar } from '../ui/Avatar';
 import { AlertCircle, Database, ThumbsUp, ThumbsDown } from 'lucide-react';
 import type { Message } from '../../types/chat';
 import { SQLCodeBlock } from '../sql/SQLCodeBlock';
+import { ResultsTable } from './ResultsTable';
 import { useChatStore } from '../../stores/useChatStore';
 import { api } from '../../services/api';
 import { cn } from '../../lib/utils';
@@ -24,7 +25,7 @@ export const AssistantMessage = ({ message }: AssistantMessageProps) => {
     setMessageFeedback(message.id, next);
 
     try {
-      await api.submitFeedback(message.sql, next ?? 'none', activeConversationId);
+      await api.submitFeedback(message.sql, next ?? 'none', activeConversationId, message.serverId);
     } catch (e) {
       console.error('Failed to submit feedback:', e);
       // Revert optimistic update on failure
@@ -131,6 +132,21 @@ export const AssistantMessage = ({ message }: AssistantMessageProps) => {
           </div>
         )}
 
+        {/* Query results — first page, with "load more" for server-side result sets */}
+        {message.results && message.results.rows.length > 0 && (
+          <ResultsTable
+            key={message.results.result_id ?? `${message.id}-${message.results.count}`}
+            results={message.results}
+          />
+        )}
+        {/* Stored result of a history message — decompressed on the server only when opened */}
+        {!message.results && message.resultHash && message.serverId !== undefined && activeConversationId && (
+          <ResultsTable
+            key={message.resultHash}
+            loadResults={() => api.getMessageResult(activeConversationId, message.serverId!)}
+          />
+        )}
+
         {/* Error */}
         {message.error && (
           <div className="surface elevated rounded-lg px-4 py-3 border border-error bg-error/10">
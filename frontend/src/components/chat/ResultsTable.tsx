@@ -0,0 +1,113 @@
+import { useState } from 'react';
+import type { SyntheticEvent } from 'react';
+import { Loader2, Table } from 'lucide-react';
+import type { QueryResult } from '../../types/chat';
+import { api } from '../../services/api';
+import { Button } from '../ui/Button';
+
+interface ResultsTableProps {
+  /** Result already in hand (streamed, archived or legacy messages) */
+  results?: QueryResult;
+  /** Fetches a stored result the first time the table is opened */
+  loadResults?: () => Promise<QueryResult>;
+}
+
+const formatCell = (value: unknown): string => {
+  if (value === null || value === undefined) return '';
+  if (typeof value === 'object') return JSON.stringify(value);
+  return String(value);
+};
+
+export const ResultsTable = ({ results, loadResults }: ResultsTableProps) => {
+  const [data, setData] = useState<QueryResult | null>(results ?? null);
+  const [rows, setRows] = useState(results?.rows ?? []);
+  const [hasMore, setHasMore] = useState(Boolean(results?.result_id && results.has_more));
+  const [isLoading, setIsLoading] = useState(false);
+  const [error, setError] = useState<string | null>(null);
+
+  const columns = data?.columns?.length ? data.columns : Object.keys(rows[0] ?? {});
+
+  const handleToggle = async (event: SyntheticEvent<HTMLDetailsElement>) => {
+    if (!event.currentTarget.open || data || !loadResults || isLoading) return;
+    setIsLoading(true);
+    setError(null);
+    try {
+      const loaded = await loadResults();
+      setData(loaded);
+      setRows(loaded.rows);
+      setHasMore(Boolean(loaded.result_id && loaded.has_more));
+    } catch (e) {
+      console.error('Failed to load results:', e);
+      setError('Could not load the results.');
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
+  const handleLoadMore = async () => {
+    if (!data?.result_id || isLoading) return;
+    setIsLoading(true);
+    setError(null);
+    try {
+      const page = await api.getResultPage(data.result_id, rows.length);
+      setRows((prev) => [...prev, ...page.rows]);
+      setHasMore(page.has_more);
+    } catch (e) {
+      console.error('Failed to load more rows:', e);
+      setError('Could not load more rows (the result may have expired).');
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
+  return (
+    <details className="surface rounded-lg overflow-hidden border border-default" onToggle={handleToggle}>
+      <summary className="px-4 py-2 surface flex items-center gap-2 cursor-pointer select-none">
+        <Table className="w-4 h-4 text-primary" />
+        <span className="text-xs font-medium">Query Results</span>
+        <span className="ml-auto text-xs text-muted">
+          {data ? `Showing ${rows.length} of ${data.count} rows` : isLoading ? 'Loading...' : 'Click to load'}
+        </span>
+      </summary>
+
+      {data && (
+        <div className="overflow-auto max-h-96 border-t border-default">
+          <table className="w-full text-xs border-collapse">
+            <thead className="bg-light-elevated dark:bg-dark-elevated sticky top-0">
+              <tr>
+                {columns.map((column) => (
+                  <th key={column} className="px-3 py-2 text-left font-medium border border-default">
+                    {column}
+                  </th>
+                ))}
+              </tr>
+            </thead>
+            <tbody>
+              {rows.map((row, idx) => (
+                <tr key={idx}>
+                  {columns.map((column) => (
+                    <td key={column} className="px-3 py-2 border border-default">
+                      {formatCell(row[column])}
+                    </td>
+                  ))}
+                </tr>
+              ))}
+            </tbody>
+          </table>
+        </div>
+      )}
+
+      {(hasMore || error) && (
+        <div className="px-4 py-2 border-t border-default flex items-center gap-3">
+          {error && <span className="text-xs text-error">{error}</span>}
+          {hasMore && (
+            <Button variant="ghost" size="sm" className="ml-auto text-xs" onClick={handleLoadMore} disabled={isLoading}>
+              {isLoading && <Loader2 className="w-3 h-3 mr-1 animate-spin" />}
+              Load more
+            </Button>
+          )}
+        </div>
+      )}
+    </details>
+  );
+};
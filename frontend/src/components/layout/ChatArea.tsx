@@ -35,9 +35,11 @@ export const ChatArea = () => {
       content: msg.content,
       sql: msg.sql,
       results: msg.results,
+      resultHash: msg.result_hash ?? undefined,
       error: msg.error,
       metadata: msg.metadata,
       feedback: msg.feedback as 'like' | 'dislike' | null | undefined,
+      serverId: msg.id,
       timestamp: new Date(msg.timestamp).getTime(),
     }));
     setMessages(mapped);
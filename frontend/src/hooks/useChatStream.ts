@@ -98,6 +98,8 @@ export const useChatStream = () => {
                 rows: (payload.rows as Array<Record<string, unknown>>) ?? [],
                 count: Number(payload.count ?? 0),
                 columns: (payload.columns as string[] | undefined) ?? undefined,
+                result_id: typeof payload.result_id === 'string' ? payload.result_id : undefined,
+                has_more: payload.has_more === true,
               };
               updateLastMessage({ results: finalResults });
             } else if (eventType === 'formatted_response') {
@@ -114,6 +116,7 @@ export const useChatStream = () => {
                 content: formattedMarkdown || (finalSQL ? 'Query completed' : 'No response generated'),
                 sql: finalSQL || undefined,
                 results: finalResults,
+                serverId: typeof payload.message_id === 'number' ? payload.message_id : undefined,
               });
             } else if (eventType === 'error') {
               const errorText = typeof payload.error === 'string' ? payload.error : 'Unknown error';
@@ -2,10 +2,14 @@ import type {
   ConversationResponse,
   ConversationsListResponse,
   HealthResponse,
+  QueryResult,
+  ResultPageResponse,
+  SchemaBulkImportResponse,
   SchemaBusinessContextResponse,
   SchemaDetectRequest,
   SchemaDetectResponse,
   SchemaTableDefinition,
+  SearchResponse,
 } from '../types/api';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
@@ -40,8 +44,38 @@ export const api = {
     return response.json();
   },
 
-  async getConversations(): Promise<ConversationsListResponse> {
-    const response = await fetch(`${API_BASE_URL}/api/conversations`);
+  async getMessageResult(conversationId: string, messageId: number): Promise<QueryResult> {
+    const response = await fetch(`${API_BASE_URL}/api/conversations/${conversationId}/messages/${messageId}/results`);
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    return response.json();
+  },
+
+  async getResultPage(resultId: string, offset = 0, limit?: number): Promise<ResultPageResponse> {
+    const params = new URLSearchParams({ offset: String(offset) });
+    if (limit !== undefined) {
+      params.set('limit', String(limit));
+    }
+    const response = await fetch(`${API_BASE_URL}/api/results/${resultId}?${params}`);
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    return response.json();
+  },
+
+  async getConversations(cursor?: string): Promise<ConversationsListResponse> {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    const response = await fetch(`${API_BASE_URL}/api/conversations${query}`);
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    return response.json();
+  },
+
+  async search(q: string, limit = 20): Promise<SearchResponse> {
+    const params = new URLSearchParams({ q, limit: String(limit) });
+    const response = await fetch(`${API_BASE_URL}/api/search?${params}`);
     if (!response.ok) {
       throw new Error(`HTTP error! status: ${response.status}`);
     }
@@ -60,11 +94,12 @@ export const api = {
     sql: string,
     status: 'like' | 'dislike' | 'none',
     conversationId: string,
+    messageId?: number,
   ): Promise<{ status: string; message: string }> {
     const response = await fetch(`${API_BASE_URL}/api/feedback`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ sql, status, conversation_id: conversationId }),
+      body: JSON.stringify({ sql, status, conversation_id: conversationId, message_id: messageId }),
     });
     if (!response.ok) {
       throw new Error(`HTTP error! status: ${response.status}`);
@@ -124,6 +159,26 @@ export const api = {
     return response.json();
   },
 
+  async bulkImportSchemaTables(tables: SchemaTableDefinition[]): Promise<SchemaBulkImportResponse> {
+    const response = await fetch(`${API_BASE_URL}/api/schema/tables:bulk`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/x-ndjson' },
+      body: tables.map((table) => JSON.stringify(table)).join('\n'),
+    });
+    if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+    return response.json();
+  },
+
+  async exportSchemaTables(activeOnly: boolean = false): Promise<SchemaTableDefinition[]> {
+    const response = await fetch(`${API_BASE_URL}/api/schema/export?active_only=${activeOnly}`);
+    if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+    const text = await response.text();
+    return text
+      .split('\n')
+      .filter((line) => line.trim())
+      .map((line) => JSON.parse(line) as SchemaTableDefinition);
+  },
+
   async deleteSchemaTable(tableName: string): Promise<void> {
     const response = await fetch(`${API_BASE_URL}/api/schema/tables/${encodeURIComponent(tableName)}`, {
       method: 'DELETE',
@@ -9,6 +9,19 @@ export interface QueryResult {
   count: number;
   columns?: string[];
   error?: string;
+  result_id?: string;
+  has_more?: boolean;
+}
+
+export interface ResultPageResponse {
+  result_id: string;
+  columns: string[];
+  rows: Array<Record<string, unknown>>;
+  offset: number;
+  limit: number;
+  total: number;
+  next_offset: number | null;
+  has_more: boolean;
 }
 
 export interface ConversationMessage {
@@ -17,6 +30,7 @@ export interface ConversationMessage {
   content: string;
   sql?: string;
   results?: QueryResult;
+  result_hash?: string | null;
   error?: string;
   metadata?: Record<string, unknown>;
   feedback?: string | null;
@@ -32,6 +46,7 @@ export interface ConversationMetadata {
 
 export interface ConversationResponse extends ConversationMetadata {
   messages: ConversationMessage[];
+  archived?: boolean;
 }
 
 export type ConversationListItem = ConversationMetadata;
@@ -39,6 +54,23 @@ export type ConversationListItem = ConversationMetadata;
 export interface ConversationsListResponse {
   conversations: ConversationListItem[];
   count: number;
+  next_cursor?: string | null;
+}
+
+export interface SearchHit {
+  message_id: number;
+  conversation_id: string;
+  conversation_title: string;
+  role: 'user' | 'assistant';
+  snippet: string;
+  score: number;
+  timestamp: string;
+}
+
+export interface SearchResponse {
+  query: string;
+  results: SearchHit[];
+  count: number;
 }
 
 export interface HealthResponse {
@@ -69,6 +101,13 @@ export interface SchemaTableDefinition {
   is_active: boolean;
 }
 
+export interface SchemaBulkImportResponse {
+  imported: number;
+  created: number;
+  updated: number;
+  elapsed_ms: number;
+}
+
 export interface SchemaBusinessContextResponse {
   business_context: Record<string, unknown>;
   explicit: boolean;
@@ -5,15 +5,19 @@ export interface Message {
   timestamp: number;
   sql?: string;
   results?: QueryResult;
+  resultHash?: string;
   error?: string;
   metadata?: Record<string, unknown>;
   feedback?: 'like' | 'dislike' | null;
+  serverId?: number;
 }
 
 export interface QueryResult {
   rows: Array<Record<string, unknown>>;
   count: number;
   columns?: string[];
+  result_id?: string;
+  has_more?: boolean;
 }
 
 export interface ConversationMetadata {
@@ -38,6 +38,8 @@ export interface ResultEvent {
   rows: Array<Record<string, unknown>>;
   count: number;
   columns?: string[];
+  result_id?: string;
+  has_more?: boolean;
 }
 
 export interface ErrorEvent {
@@ -54,6 +56,7 @@ export interface FormattedResponseEvent {
 export interface CompleteEvent {
   success: boolean;
   message?: string;
+  message_id?: number | null;
 }
 
 export type SSEEvent =